@@ -6,6 +6,14 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     DATABASE_URL: str = "sqlite:///./sql_app.db" # Defaulting to SQLite for self-contained clone
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
+
+    # Background Report Jobs
+    REPORT_WORKERS: int = 2 # Worker threads per process (0 disables the pool)
+    REPORT_JOB_TTL_SECONDS: int = 3600 # How long finished results are kept
+    REPORT_JOB_POLL_SECONDS: float = 1.0
+
+    # Master Search (type-ahead ranking window)
+    SEARCH_USAGE_DAYS: int = 90 # Postings in this many days count towards "recently used"
     
     # Fix for SQLAlchemy requiring postgresql:// instead of postgres://
     @property
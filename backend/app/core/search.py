@@ -0,0 +1,99 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+class PrefixIndex:
+    """
+    In-process type-ahead index over master names.
+    Keys are (word, id) pairs in one sorted list - every word of a name is a key, so "cash"
+    finds "Petty Cash" too - and a prefix is the bisect range [prefix, prefix + U+FFFF).
+    Matches are ranked by usage count (postings in the recent window), then name.
+    Writers (master create / update / delete, voucher posting) go through the lock;
+    lookups take it too, so a search never sees a half-applied update.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys: List[Tuple[str, int]] = []  # (word, id)
+        self._names: List[Tuple[str, int]] = [] # (full name, id) - plain listing order
+        self._records: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        self._usage: Dict[int, int] = {}
+        self.loaded = False
+
+    @staticmethod
+    def _words(name: str) -> List[str]:
+        words = {name}
+        words.update(w for w in name.replace("-", " ").replace("/", " ").split() if w)
+        return sorted(words)
+
+    def load(self, records: Iterable[Tuple[int, str, Dict[str, Any]]], usage: Optional[Dict[int, int]] = None):
+        keys = []
+        names = []
+        data = {}
+        for record_id, name, payload in records:
+            name = name.lower()
+            data[record_id] = (name, payload)
+            names.append((name, record_id))
+            keys.extend((w, record_id) for w in self._words(name))
+        keys.sort()
+        names.sort()
+        with self._lock:
+            self._keys = keys
+            self._names = names
+            self._records = data
+            self._usage = dict(usage or {})
+            self.loaded = True
+
+    @staticmethod
+    def _discard(keys: List[Tuple[str, int]], key: Tuple[str, int]):
+        k = bisect_left(keys, key)
+        if k < len(keys) and keys[k] == key:
+            del keys[k]
+
+    def _unlink(self, record_id: int):
+        old = self._records.get(record_id)
+        if not old:
+            return
+        for w in self._words(old[0]):
+            self._discard(self._keys, (w, record_id))
+        self._discard(self._names, (old[0], record_id))
+
+    def put(self, record_id: int, name: str, payload: Dict[str, Any]):
+        name = name.lower()
+        with self._lock:
+            self._unlink(record_id)
+            self._records[record_id] = (name, payload)
+            insort(self._names, (name, record_id))
+            for w in self._words(name):
+                insort(self._keys, (w, record_id))
+
+    def remove(self, record_id: int):
+        with self._lock:
+            self._unlink(record_id)
+            self._records.pop(record_id, None)
+            self._usage.pop(record_id, None)
+
+    def touch(self, record_ids: Iterable[int]):
+        with self._lock:
+            for record_id in record_ids:
+                if record_id in self._records:
+                    self._usage[record_id] = self._usage.get(record_id, 0) + 1
+
+    def search(self, prefix: Optional[str] = None, offset: int = 0, limit: int = 20) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        (number of matches, one page of payloads).
+        Without a prefix the page is simply in name order.
+        """
+        prefix = (prefix or "").strip().lower()
+        with self._lock:
+            records = self._records
+            if not prefix:
+                page = self._names[offset:offset + limit]
+                return len(self._names), [records[record_id][1] for _, record_id in page]
+
+            lo = bisect_left(self._keys, (prefix,))
+            hi = bisect_left(self._keys, (prefix + "\uffff",))
+            ids = {record_id for _, record_id in self._keys[lo:hi]}
+            usage = self._usage
+            top = heapq.nsmallest(offset + limit, ids, key=lambda i: (-usage.get(i, 0), records[i][0], i))
+            return len(ids), [records[i][1] for i in top[offset:]]
@@ -12,8 +12,17 @@ from app.modules.tax.router import router as tax_router
 from app.modules.reports.router import router as reports_router
 from app.modules.banking.router import router as banking_router
 from app.modules.audit.router import router as audit_router
-from app.modules.impex.router import router as impex_router
+from app.modules.impex.router import router as impex_router, export_router
 import app.modules.auth.models # Ensure tables created
+import app.modules.accounting.versioning # Data version table + mutation listeners
+import app.modules.accounting.period_close # Locked opening balance guard
+import app.modules.reports.models # Report job table
+from app.modules.inventory.balances import ensure_stock_balances # Stock item balance listeners
+from app.modules.tax.rates import rebuild_effective_gst_rates # Stored effective GST rate listeners
+from app.modules.reports.outstanding import ensure_bill_ledgers
+from app.modules.accounting.search import load_ledger_index
+from app.modules.inventory.search import load_item_index
+from app.modules.reports.jobs import worker_pool
 
 # Database Setup (Quick Init)
 
@@ -26,6 +35,12 @@ def startup_event():
     try:
         # Create Tables
         Base.metadata.create_all(bind=engine)
+        ensure_stock_balances(db)
+        rebuild_effective_gst_rates(db)
+        ensure_bill_ledgers(db) # Party ledger on bill allocations from before the column
+        # Type-ahead indexes for ledgers / stock items
+        load_ledger_index(db)
+        load_item_index(db)
         
         from app.modules.auth import models, security
         # Check if admin exists
@@ -49,6 +64,11 @@ def startup_event():
     finally:
         db.close()
 
+    worker_pool.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    worker_pool.stop()
 
 app.add_middleware(
     CORSMiddleware,
@@ -68,6 +88,7 @@ app.include_router(reports_router, prefix="/api/v1/reports")
 app.include_router(banking_router, prefix="/api/v1")
 app.include_router(audit_router, prefix="/api/v1")
 app.include_router(impex_router, prefix="/api/v1")
+app.include_router(export_router, prefix="/api/v1")
 
 @app.get("/")
 def root():
@@ -0,0 +1,86 @@
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.modules.accounting.models import AccountGroup, Ledger
+
+class GroupIndex:
+    """
+    All account groups, loaded once per call.
+    Ancestor walks are memoized per group, so classifying N ledgers costs
+    O(groups x depth) instead of one lazy-loaded parent chain per ledger.
+    Names are matched case-insensitively (seed uses "Cash-in-hand", older code "Cash-in-Hand").
+    """
+    def __init__(self, db: Session):
+        rows = db.query(
+            AccountGroup.id, AccountGroup.name, AccountGroup.parent_id, AccountGroup.gst_rate, AccountGroup.hsn_code
+        ).all()
+        self.names = {r.id: r.name for r in rows}
+        self.parents = {r.id: r.parent_id for r in rows}
+        self.gst_rates = {r.id: r.gst_rate or 0.0 for r in rows}
+        self.hsn_codes = {r.id: r.hsn_code for r in rows}
+        self.by_name = {r.name.lower(): r.id for r in rows}
+        self.children = {}
+        for r in rows:
+            self.children.setdefault(r.parent_id, []).append(r.id)
+        self._ancestor_names = {}
+
+    def find(self, name: str) -> Optional[int]:
+        return self.by_name.get(name.lower())
+
+    def ancestor_names(self, group_id: int) -> Set[str]:
+        """
+        Lower-cased names of the group and everything above it.
+        """
+        cached = self._ancestor_names.get(group_id)
+        if cached is not None:
+            return cached
+        parent = self.parents.get(group_id)
+        names = set(self.ancestor_names(parent)) if parent else set()
+        if group_id in self.names:
+            names.add(self.names[group_id].lower())
+        self._ancestor_names[group_id] = names
+        return names
+
+    def subtree_ids(self, group_id: int) -> List[int]:
+        ids = []
+        stack = [group_id]
+        while stack:
+            g_id = stack.pop()
+            ids.append(g_id)
+            stack.extend(self.children.get(g_id, []))
+        return ids
+
+    def nearest_gst_rate(self, group_id: Optional[int]) -> float:
+        while group_id:
+            if self.gst_rates.get(group_id):
+                return self.gst_rates[group_id]
+            group_id = self.parents.get(group_id)
+        return 0.0
+
+    def nearest_hsn(self, group_id: Optional[int]) -> Optional[str]:
+        while group_id:
+            if self.hsn_codes.get(group_id):
+                return self.hsn_codes[group_id]
+            group_id = self.parents.get(group_id)
+        return None
+
+def classify_ledgers(
+    db: Session, classes: Dict[str, List[str]], index: Optional[GroupIndex] = None
+) -> Dict[int, str]:
+    """
+    {ledger_id: class} for every ledger under one of the named groups.
+    `classes` maps a class to group names, e.g. {"duty": ["Duties & Taxes"]};
+    the first class (in dict order) whose group is an ancestor wins.
+    """
+    index = index or GroupIndex(db)
+    wanted = [(cls, {n.lower() for n in names}) for cls, names in classes.items()]
+    by_group = {}
+    result = {}
+    for ledger_id, group_id in db.query(Ledger.id, Ledger.group_id).all():
+        if group_id not in by_group:
+            ancestors = index.ancestor_names(group_id)
+            by_group[group_id] = next((cls for cls, names in wanted if ancestors & names), None)
+        if by_group[group_id]:
+            result[ledger_id] = by_group[group_id]
+    return result
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey, Enum, Float
+from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey, Enum, Float, Index, JSON
 from sqlalchemy.orm import relationship
 from app.core.db import Base
 import enum
@@ -85,6 +85,7 @@ class AccountGroup(Base):
     hsn_code = Column(String, nullable=True)
     gst_rate = Column(Float, default=0.0) 
     taxability = Column(String, default="Taxable")
+    effective_gst_rate = Column(Float, default=0.0) # Own gst_rate or the nearest ancestor's
 
 class Ledger(Base):
     """
@@ -115,38 +116,15 @@ class Ledger(Base):
     tax_type = Column(String, nullable=True) # GST, Others
     duty_head = Column(String, nullable=True) # CGST, SGST, IGST, Cess
     percentage_of_calculation = Column(Float, default=0.0) # For auto calc if needed
+
+    # percentage_of_calculation if set, else the nearest group gst_rate, else 0.
+    # Stored, and kept current by app.modules.tax.rates (group changes reach the whole subtree)
+    effective_gst_rate = Column(Float, default=0.0)
     
     # Relationships
     group = relationship("AccountGroup", back_populates="ledgers")
     entries = relationship("VoucherEntry", back_populates="ledger")
 
-    @property
-    def effective_gst_rate(self):
-        # Only relevant for Duty ledgers or Sales/Purchase?
-        # Usually tax is calculated ON the ledger amount if it's an Item line (but Ledger doesn't have rate usually).
-        # Actually, for Service Ledgers (Sales of Services), we need effective rate.
-        
-        # If this is a Duty ledger, it has percentage_of_calculation? No, that's different.
-        
-        # Logic:
-        # If tax_type is GST, look for percentage.
-        # But if this is a Party Ledger, no tax rate.
-        # If this is a Sales/Expense Ledger, it might have tax rate.
-        
-        # If percentage_of_calculation is set, use it? Tally uses "percentage_of_calculation" for Duty ledgers.
-        # But for Sales/Purchase ledgers, we check "GST Details".
-        
-        # Let's use 'percentage_of_calculation' if set, else traverse.
-        if self.percentage_of_calculation and self.percentage_of_calculation > 0:
-             return self.percentage_of_calculation
-             
-        # Traverse Group
-        grp = self.group
-        while grp:
-            if grp.gst_rate and grp.gst_rate > 0:
-                return grp.gst_rate
-            grp = grp.parent
-        return 0.0
 
 # --- Voucher Models ---
 
@@ -160,6 +138,7 @@ class VoucherTypeNature(str, enum.Enum):
     MEMORANDUM = "Memorandum"
     REVERSING_JOURNAL = "Reversing Journal"
     STOCK_JOURNAL = "Stock Journal"
+    STOCK_TRANSFER = "Stock Transfer"
 
 class VoucherType(Base):
     """
@@ -220,6 +199,9 @@ class VoucherEntry(Base):
     stock_item_id = Column(Integer, ForeignKey("stock_items.id"), nullable=True, index=True)
     quantity = Column(Float, default=0.0)
     rate = Column(Float, default=0.0)
+    godown_id = Column(Integer, ForeignKey("godowns.id"), nullable=True, index=True) # None = Main Location
+    unit_id = Column(Integer, ForeignKey("units.id"), nullable=True) # Unit quantity was entered in (None = item's unit)
+    base_quantity = Column(Float, nullable=True) # quantity in the item's stock unit; what stock reports sum
 
     # Banking Details (For BRS)
     bank_date = Column(Date, nullable=True)  # Bank Clearing Date
@@ -230,8 +212,16 @@ class VoucherEntry(Base):
     voucher = relationship("Voucher", back_populates="entries")
     ledger = relationship("Ledger", back_populates="entries")
     stock_item = relationship("StockItem")
+    godown = relationship("Godown")
     bill_allocations = relationship("BillAllocation", back_populates="entry", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Item registers: an item's lines, then their vouchers in (date, id) order
+        Index("ix_voucher_entries_item_voucher", "stock_item_id", "voucher_id"),
+        # Bank reconciliation: a bank ledger's uncleared (bank_date IS NULL) or cleared-in-range lines
+        Index("ix_voucher_entries_ledger_bank_date", "ledger_id", "bank_date"),
+    )
+
 class BillAllocation(Base):
     """
     Bill-wise Details (New Ref, Agst Ref, etc.) for Outstanding Management.
@@ -240,6 +230,7 @@ class BillAllocation(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     voucher_entry_id = Column(Integer, ForeignKey("voucher_entries.id"), nullable=False, index=True)
+    ledger_id = Column(Integer, ForeignKey("ledgers.id"), nullable=True) # Party ledger (copy of entry.ledger_id) for matching
     
     ref_type = Column(String, nullable=False) # New Ref, Agst Ref, Advance, On Account
     ref_name = Column(String, nullable=False) # Invoice Number / Bill Name
@@ -250,3 +241,35 @@ class BillAllocation(Base):
     # Relationships
     entry = relationship("VoucherEntry", back_populates="bill_allocations")
 
+    __table_args__ = (
+        Index("ix_bill_allocations_party_ref", "ledger_id", "ref_name"),
+    )
+
+
+# --- Period Close ---
+
+class PeriodCloseSnapshot(Base):
+    """
+    Balances frozen when a Financial Year is locked.
+    One row per ledger (signed closing balance, Dr positive) or per stock item (qty / value / rate,
+    plus the open cost layers under FIFO / LIFO).
+    Reports for later dates start from the latest snapshot instead of the first voucher.
+    """
+    __tablename__ = "period_close_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    financial_year_id = Column(Integer, ForeignKey("financial_years.id"), nullable=False, index=True)
+    as_of_date = Column(Date, nullable=False, index=True) # FY end date; includes vouchers ON this date
+
+    ledger_id = Column(Integer, ForeignKey("ledgers.id"), nullable=True, index=True)
+    balance = Column(Float, default=0.0)
+
+    stock_item_id = Column(Integer, ForeignKey("stock_items.id"), nullable=True, index=True)
+    quantity = Column(Float, default=0.0)
+    value = Column(Float, default=0.0)
+    rate = Column(Float, default=0.0)
+    valuation_method = Column(String, nullable=True) # Method the stock state was computed with
+    cost_layers = Column(JSON, nullable=True) # FIFO / LIFO open layers, so valuation resumes exactly
+
+# Registers data_versions on Base.metadata (and the mutation listeners) with the books' tables
+from app.modules.accounting import versioning  # noqa: E402,F401
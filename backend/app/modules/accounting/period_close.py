@@ -0,0 +1,159 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from app.modules.accounting.models import FinancialYear, Ledger, PeriodCloseSnapshot
+from app.modules.inventory.models import StockItem
+
+# --- Snapshot Lookup ---
+
+def latest_close_date(db: Session, upto_date: Optional[date] = None) -> Optional[date]:
+    """
+    as_of_date of the newest snapshot on or before upto_date (any, if None).
+    """
+    query = db.query(func.max(PeriodCloseSnapshot.as_of_date))
+    if upto_date:
+        query = query.filter(PeriodCloseSnapshot.as_of_date <= upto_date)
+    return query.scalar()
+
+def ledger_snapshot(db: Session, as_of_date: date) -> Dict[int, float]:
+    rows = db.query(PeriodCloseSnapshot.ledger_id, PeriodCloseSnapshot.balance).filter(
+        PeriodCloseSnapshot.as_of_date == as_of_date,
+        PeriodCloseSnapshot.ledger_id != None
+    ).all()
+    return {ledger_id: balance or 0.0 for ledger_id, balance in rows}
+
+def stock_snapshot(db: Session, as_of_date: date) -> Dict[int, Tuple[List[float], Optional[str], Optional[Dict[str, Any]]]]:
+    """
+    {stock_item_id: ([qty, value, rate], method, cost layers)} - the running state valuation resumes from.
+    """
+    rows = db.query(
+        PeriodCloseSnapshot.stock_item_id,
+        PeriodCloseSnapshot.quantity,
+        PeriodCloseSnapshot.value,
+        PeriodCloseSnapshot.rate,
+        PeriodCloseSnapshot.valuation_method,
+        PeriodCloseSnapshot.cost_layers
+    ).filter(
+        PeriodCloseSnapshot.as_of_date == as_of_date,
+        PeriodCloseSnapshot.stock_item_id != None
+    ).all()
+    return {
+        r.stock_item_id: ([r.quantity or 0.0, r.value or 0.0, r.rate or 0.0], r.valuation_method, r.cost_layers)
+        for r in rows
+    }
+
+# --- Posting Guard ---
+
+def locked_upto(db: Session) -> Optional[date]:
+    """
+    End of the latest locked Financial Year. Years lock in order, so every date up to it is closed.
+    """
+    return db.query(func.max(FinancialYear.end_date)).filter(FinancialYear.is_locked == True).scalar()
+
+def ensure_period_open(db: Session, *dates: date):
+    """
+    Rejects postings on or before the latest locked year-end.
+    Anything earlier is already baked into the snapshot, so it has to stay untouched.
+    """
+    closed_upto = locked_upto(db)
+    if not closed_upto:
+        return
+    for d in dates:
+        if d and d <= closed_upto:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Books are locked up to {closed_upto.isoformat()}; cannot post or modify a voucher dated {d.isoformat()}"
+            )
+
+# --- Lock / Unlock ---
+
+def lock_financial_year(db: Session, fy: FinancialYear) -> int:
+    """
+    Freezes every ledger's closing balance and every stock item's valuation at fy.end_date.
+    Returns the number of snapshot rows written.
+    """
+    from app.modules.reports.engine import ReportEngine
+    from app.modules.inventory.valuation import stock_valuers_at
+
+    if fy.is_locked:
+        raise HTTPException(status_code=400, detail="Financial Year is already locked")
+    earlier_open = db.query(FinancialYear).filter(
+        FinancialYear.end_date < fy.end_date,
+        FinancialYear.is_locked == False
+    ).first()
+    if earlier_open:
+        raise HTTPException(status_code=400, detail=f"Lock earlier Financial Year '{earlier_open.name}' first")
+
+    # Both computations resume from the previous snapshot, so closing a year only reads that year.
+    balances = ReportEngine(db).get_ledger_balances(fy.end_date, include_opening=True)
+    valuers = stock_valuers_at(db, fy.end_date)
+
+    rows = [
+        PeriodCloseSnapshot(financial_year_id=fy.id, as_of_date=fy.end_date, ledger_id=ledger_id, balance=bal)
+        for ledger_id, bal in balances.items()
+    ]
+    for item_id, valuer in valuers.items():
+        qty, value, rate = valuer.state()
+        rows.append(PeriodCloseSnapshot(
+            financial_year_id=fy.id, as_of_date=fy.end_date, stock_item_id=item_id,
+            quantity=qty, value=value, rate=rate,
+            valuation_method=valuer.method, cost_layers=valuer.layer_state()
+        ))
+    db.add_all(rows)
+    fy.is_locked = True
+    db.commit()
+    return len(rows)
+
+def unlock_financial_year(db: Session, fy: FinancialYear):
+    if not fy.is_locked:
+        raise HTTPException(status_code=400, detail="Financial Year is not locked")
+    later_locked = db.query(FinancialYear).filter(
+        FinancialYear.start_date > fy.start_date,
+        FinancialYear.is_locked == True
+    ).first()
+    if later_locked:
+        raise HTTPException(status_code=400, detail=f"Unlock later Financial Year '{later_locked.name}' first")
+
+    db.query(PeriodCloseSnapshot).filter(
+        PeriodCloseSnapshot.financial_year_id == fy.id
+    ).delete(synchronize_session=False)
+    fy.is_locked = False
+    db.commit()
+
+# --- Opening Balance Guard ---
+# Openings sit before every year-end, so a locked year's snapshot already includes them.
+# Editing one would leave every later report starting from stale totals, so it is rejected
+# (for ledgers / items present in a snapshot) until the years are unlocked.
+
+class PeriodLockedError(ValueError):
+    """
+    Raised on flush when an edit would change totals a locked year's snapshot already holds.
+    Routers turn it into a 400.
+    """
+
+OPENING_FIELDS = (
+    (Ledger, "ledger_id", ("opening_balance", "opening_balance_is_dr")),
+    (StockItem, "stock_item_id", ("opening_qty", "opening_rate", "opening_value")),
+)
+
+@event.listens_for(Session, "before_flush")
+def _guard_locked_openings(session, flush_context, instances):
+    for model, snapshot_col, fields in OPENING_FIELDS:
+        edited = [
+            obj for obj in session.dirty
+            if isinstance(obj, model) and any(inspect(obj).attrs[f].history.has_changes() for f in fields)
+        ]
+        if not edited:
+            continue
+        column = getattr(PeriodCloseSnapshot, snapshot_col)
+        frozen = session.query(column).filter(column.in_([obj.id for obj in edited])).first()
+        if frozen:
+            obj = next(o for o in edited if o.id == frozen[0])
+            raise PeriodLockedError(
+                f"Books are locked up to {locked_upto(session).isoformat()}; "
+                f"unlock the Financial Year to change the opening balance of '{obj.name}'"
+            )
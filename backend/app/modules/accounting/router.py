@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
@@ -6,6 +6,11 @@ from pydantic import BaseModel
 from app.core.config import settings
 from app.modules.accounting.models import AccountGroup, Ledger, Base, Organization
 from app.core.db import get_db
+from app.modules.auth.models import User
+from app.modules.auth.permissions import allow_admin
+from app.modules.reports.cache import cached_report
+from app.modules.accounting.search import ensure_ledger_index, index_ledger, ledger_index
+from app.modules.accounting.period_close import PeriodLockedError
 
 router = APIRouter()
 
@@ -51,8 +56,34 @@ class LedgerCreate(BaseModel):
     duty_head: Optional[str] = None # CGST/SGST...
     percentage_of_calculation: float = 0.0
 
+class LedgerListItem(BaseModel):
+    id: int
+    name: str
+    group_id: int
+    parent_group: Optional[str] = None
+    gstin: Optional[str] = None
+    state: Optional[str] = None
+    tax_type: Optional[str] = None
+    duty_head: Optional[str] = None
+
 # --- API ---
 
+@router.get("/ledgers", response_model=List[LedgerListItem])
+def list_ledgers(
+    response: Response,
+    q: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """
+    Ledgers by name, or type-ahead matches for `q` (any word of the name starts with it),
+    most used first. The total number of matches is in the X-Total-Count header.
+    """
+    total, page = ensure_ledger_index(db).search(q, offset, limit)
+    response.headers["X-Total-Count"] = str(total)
+    return page
+
 @router.post("/ledgers", response_model=LedgerSchema)
 def create_ledger(ledger_in: LedgerCreate, db: Session = Depends(get_db)):
     """
@@ -74,6 +105,7 @@ def create_ledger(ledger_in: LedgerCreate, db: Session = Depends(get_db)):
     db.add(ledger)
     db.commit()
     db.refresh(ledger)
+    index_ledger(db, ledger)
     return ledger
 
 @router.delete("/ledgers/{id}", response_model=dict)
@@ -89,6 +121,7 @@ def delete_ledger(id: int, db: Session = Depends(get_db)):
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Cannot delete Ledger. It is likely used in Transactions.")
+    ledger_index.remove(id)
         
     return {"status": "deleted", "id": id}
 
@@ -112,12 +145,17 @@ def update_ledger(id: int, ledger_in: LedgerCreate, db: Session = Depends(get_db
     for key, value in data.items():
         setattr(ledger, key, value)
     
-    db.commit()
+    try:
+        db.commit()
+    except PeriodLockedError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     db.refresh(ledger)
+    index_ledger(db, ledger)
     return ledger
 
 @router.get("/chart-of-accounts", response_model=List[GroupSchema])
-def get_chart_of_accounts(db: Session = Depends(get_db)):
+def get_chart_of_accounts(request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Returns the full hierarchy starting from the Primary Groups.
     """
@@ -129,11 +167,15 @@ def get_chart_of_accounts(db: Session = Depends(get_db)):
     # Note: For fully recursive eager load, usually we need a specific query or lazy=False.
     # But let's try basic selectinload first.
     
-    roots = db.query(AccountGroup).filter(AccountGroup.parent_id == None).options(
-        selectinload(AccountGroup.children).selectinload(AccountGroup.children), # Level 2
-        selectinload(AccountGroup.ledgers)
-    ).all()
-    return roots # For deeper levels, might need loop or CTE. MVP: Level 2 depth.
+    def compute():
+        roots = db.query(AccountGroup).filter(AccountGroup.parent_id == None).options(
+            selectinload(AccountGroup.children).selectinload(AccountGroup.children), # Level 2
+            selectinload(AccountGroup.ledgers)
+        ).all()
+        # Serialize while the session is open; cached entries must not hold ORM objects.
+        return [GroupSchema.model_validate(r) for r in roots] # For deeper levels, might need loop or CTE. MVP: Level 2 depth.
+
+    return cached_report(request, response, db, "chart-of-accounts", {}, compute)
 
 # Schema for Ledger Vouchers
 from datetime import date
@@ -292,3 +334,82 @@ def update_voucher_type(id: int, vtype: VoucherTypeUpdate, db: Session = Depends
     db.refresh(db_obj)
     return db_obj
 
+
+# --- Financial Year / Period Close ---
+
+class FinancialYearCreate(BaseModel):
+    name: str
+    start_date: date
+    end_date: date
+
+class FinancialYearSchema(BaseModel):
+    id: int
+    name: Optional[str]
+    start_date: date
+    end_date: date
+    is_locked: bool
+
+    class Config:
+        from_attributes = True
+
+def _get_financial_year(db: Session, id: int):
+    from app.modules.accounting.models import FinancialYear
+    fy = db.query(FinancialYear).filter(FinancialYear.id == id).first()
+    if not fy:
+        raise HTTPException(status_code=404, detail="Financial Year not found")
+    return fy
+
+@router.get("/financial-years", response_model=List[FinancialYearSchema])
+def get_financial_years(db: Session = Depends(get_db)):
+    from app.modules.accounting.models import FinancialYear
+    return db.query(FinancialYear).order_by(FinancialYear.start_date).all()
+
+@router.post("/financial-years", response_model=FinancialYearSchema)
+def create_financial_year(fy_in: FinancialYearCreate, db: Session = Depends(get_db)):
+    from app.modules.accounting.models import FinancialYear
+    if fy_in.end_date < fy_in.start_date:
+        raise HTTPException(status_code=400, detail="end_date must be on or after start_date")
+    overlap = db.query(FinancialYear).filter(
+        FinancialYear.start_date <= fy_in.end_date,
+        FinancialYear.end_date >= fy_in.start_date
+    ).first()
+    if overlap:
+        raise HTTPException(status_code=400, detail=f"Overlaps Financial Year '{overlap.name}'")
+
+    org = db.query(Organization).first()
+    fy = FinancialYear(
+        organization_id=org.id if org else None,
+        name=fy_in.name,
+        start_date=fy_in.start_date,
+        end_date=fy_in.end_date
+    )
+    db.add(fy)
+    db.commit()
+    db.refresh(fy)
+    return fy
+
+@router.post("/financial-years/{id}/lock", response_model=dict)
+def lock_financial_year(
+    id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(allow_admin) # Only Admin can close or reopen a year
+):
+    """
+    Closes the year: balances are frozen into period_close_snapshots
+    and vouchers dated on or before its end can no longer be changed.
+    """
+    from app.modules.accounting.period_close import lock_financial_year as close_year
+    fy = _get_financial_year(db, id)
+    rows = close_year(db, fy)
+    return {"status": "locked", "id": fy.id, "snapshot_rows": rows}
+
+@router.post("/financial-years/{id}/unlock", response_model=dict)
+def unlock_financial_year(
+    id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(allow_admin)
+):
+    from app.modules.accounting.period_close import unlock_financial_year as reopen_year
+    fy = _get_financial_year(db, id)
+    reopen_year(db, fy)
+    return {"status": "unlocked", "id": fy.id}
@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.search import PrefixIndex
+from app.modules.accounting.models import AccountGroup, Ledger, Voucher, VoucherEntry
+
+# Process-wide ledger type-ahead index; loaded at startup (or on first search)
+ledger_index = PrefixIndex()
+
+def recent_usage(db: Session, column) -> Dict[int, int]:
+    """
+    {master id: postings in the last SEARCH_USAGE_DAYS}, one grouped query.
+    """
+    since = date.today() - timedelta(days=settings.SEARCH_USAGE_DAYS)
+    rows = db.query(column, func.count(VoucherEntry.id)).join(
+        Voucher, VoucherEntry.voucher_id == Voucher.id
+    ).filter(column != None, Voucher.date >= since).group_by(column).all()
+    return dict(rows)
+
+def ledger_payload(ledger: Ledger, group_name: str) -> Dict[str, Any]:
+    return {
+        "id": ledger.id,
+        "name": ledger.name,
+        "group_id": ledger.group_id,
+        "parent_group": group_name,
+        "gstin": ledger.gstin,
+        "state": ledger.state,
+        "tax_type": ledger.tax_type,
+        "duty_head": ledger.duty_head
+    }
+
+def load_ledger_index(db: Session):
+    rows = db.query(Ledger, AccountGroup.name).join(AccountGroup, Ledger.group_id == AccountGroup.id).all()
+    ledger_index.load(
+        ((ledger.id, ledger.name, ledger_payload(ledger, group_name)) for ledger, group_name in rows),
+        recent_usage(db, VoucherEntry.ledger_id)
+    )
+
+def ensure_ledger_index(db: Session) -> PrefixIndex:
+    if not ledger_index.loaded:
+        load_ledger_index(db)
+    return ledger_index
+
+def index_ledger(db: Session, ledger: Ledger):
+    if ledger_index.loaded:
+        group_name = db.query(AccountGroup.name).filter(AccountGroup.id == ledger.group_id).scalar()
+        ledger_index.put(ledger.id, ledger.name, ledger_payload(ledger, group_name))
+
+def record_usage(ledger_ids: Iterable[int], item_ids: Iterable[int]):
+    """
+    Bumps type-ahead ranking for the masters a voucher just used.
+    """
+    from app.modules.inventory.search import item_index
+    ledger_index.touch(ledger_ids)
+    item_index.touch(item_ids)
@@ -104,6 +104,7 @@ def seed_voucher_types(db: Session):
         ("Purchase", VoucherTypeNature.PURCHASE),
         ("Credit Note", VoucherTypeNature.JOURNAL), # Traditionally specific
         ("Debit Note", VoucherTypeNature.JOURNAL),
+        ("Stock Transfer", VoucherTypeNature.STOCK_TRANSFER),
     ]
     
     for name, nature in types:
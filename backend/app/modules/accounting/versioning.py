@@ -0,0 +1,82 @@
+from sqlalchemy import Column, Integer, event, select, update, insert
+from sqlalchemy.orm import Session
+from app.core.db import Base
+
+# Tables whose rows feed the financial reports.
+# Any write to one of these invalidates every cached report for the company.
+VERSIONED_TABLES = {
+    "organization",
+    "financial_years",
+    "account_groups",
+    "ledgers",
+    "voucher_types",
+    "vouchers",
+    "voucher_entries",
+    "bill_allocations",
+    "units",
+    "godowns",
+    "stock_groups",
+    "stock_items",
+    "gst_rate_history",
+}
+
+# Narrower counters (extra rows of data_versions) for caches that read a few masters only,
+# so the voucher saves that bump the company version do not rebuild them.
+COMPANY_SCOPE = 1
+UNITS_SCOPE = 2
+GST_RATES_SCOPE = 3
+
+SCOPED_TABLES = {
+    UNITS_SCOPE: {"units"},
+    GST_RATES_SCOPE: {"gst_rate_history", "stock_groups", "account_groups"},
+}
+
+class DataVersion(Base):
+    """
+    Counters for the Company's books: row COMPANY_SCOPE covers every versioned table, the
+    other rows one SCOPED_TABLES set each.
+    Bumped in the same transaction as every master / voucher mutation,
+    so (version, parameters) uniquely identifies a report result.
+    """
+    __tablename__ = "data_versions"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+def get_data_version(db: Session, scope: int = COMPANY_SCOPE) -> int:
+    version = db.execute(select(DataVersion.version).where(DataVersion.id == scope)).scalar()
+    return version or 0
+
+def bump_data_version(db: Session, scope: int = COMPANY_SCOPE):
+    # Core statements on the session's connection: no ORM flush, no recursion into the listeners below.
+    conn = db.connection()
+    table = DataVersion.__table__
+    res = conn.execute(
+        update(table).where(table.c.id == scope).values(version=table.c.version + 1)
+    )
+    if res.rowcount == 0:
+        conn.execute(insert(table).values(id=scope, version=1))
+
+def _bump_tables(session, tables):
+    if tables & VERSIONED_TABLES:
+        bump_data_version(session)
+    for scope, scoped in SCOPED_TABLES.items():
+        if tables & scoped:
+            bump_data_version(session, scope)
+
+@event.listens_for(Session, "before_flush")
+def _bump_on_flush(session, flush_context, instances):
+    tables = {
+        getattr(obj, "__tablename__", None)
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+    }
+    _bump_tables(session, tables)
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_on_bulk_statement(orm_execute_state):
+    # query(...).update() / .delete() bypass the flush.
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None:
+        _bump_tables(orm_execute_state.session, {mapper.local_table.name})
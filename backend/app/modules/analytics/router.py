@@ -1,11 +1,17 @@
-from typing import Optional, List
-from datetime import date
-from fastapi import APIRouter, Depends
+from typing import Optional, List, Literal
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session, selectinload
-from sqlalchemy import func
+from sqlalchemy import case, extract, func, literal, or_
 from app.core.db import get_db
+from app.modules.reports.cache import cached_report
+from app.modules.reports.outstanding import open_bills
 from app.modules.accounting import models
-from app.modules.accounting.models import AccountGroup, Ledger, Voucher, VoucherEntry
+from app.modules.accounting.models import AccountGroup, Ledger, PeriodCloseSnapshot, Voucher, VoucherEntry
+from app.modules.accounting.hierarchy import GroupIndex, classify_ledgers
+from app.modules.accounting.period_close import latest_close_date
+from app.modules.inventory.balances import stock_alerts
+from app.modules.inventory.units import ENTRY_BASE_QTY
 from app.modules.analytics.schemas import (
     BalanceSheetResponse, BalanceSheetItem, 
     PLResponse, PLItem,
@@ -19,7 +25,13 @@ from app.modules.analytics.schemas import (
 router = APIRouter()
 
 @router.get("/balance-sheet", response_model=BalanceSheetResponse)
-def get_balance_sheet(to_date: Optional[date] = None, db: Session = Depends(get_db)):
+def get_balance_sheet(request: Request, response: Response, to_date: Optional[date] = None, db: Session = Depends(get_db)):
+    return cached_report(
+        request, response, db, "analytics/balance-sheet", {"to_date": to_date or date.today()},
+        lambda: _compute_balance_sheet(db, to_date)
+    )
+
+def _compute_balance_sheet(db: Session, to_date: Optional[date] = None):
     """
     Calculates Balance Sheet.
     Logic:
@@ -115,24 +127,26 @@ from app.modules.accounting.models import VoucherEntry
 from app.modules.analytics.schemas import StockSummaryResponse, StockSummaryItem
 
 @router.get("/stock-summary", response_model=StockSummaryResponse)
-def get_stock_summary(db: Session = Depends(get_db)):
-    # Fetch all items (Naive implementation)
-    items = db.query(StockItem).all()
+def get_stock_summary(request: Request, response: Response, db: Session = Depends(get_db)):
+    return cached_report(request, response, db, "analytics/stock-summary", {}, lambda: _compute_stock_summary(db))
+
+def _stock_quantities(db: Session, target_date: Optional[date] = None) -> dict:
+    # {item_id: net movement in stock units}, one grouped query over base quantities
+    signed = case((VoucherEntry.is_debit, ENTRY_BASE_QTY), else_=-ENTRY_BASE_QTY)
+    query = db.query(VoucherEntry.stock_item_id, func.sum(signed)).filter(VoucherEntry.stock_item_id != None)
+    if target_date:
+        query = query.join(Voucher, VoucherEntry.voucher_id == Voucher.id).filter(Voucher.date <= target_date)
+    return dict(query.group_by(VoucherEntry.stock_item_id).all())
+
+def _compute_stock_summary(db: Session):
+    moved = _stock_quantities(db)
     summary = []
-    
-    # Pre-fetch entries? Better to query group.
-    # For MVP, iterate.
-    for item in items:
-        entries = db.query(VoucherEntry).filter(VoucherEntry.stock_item_id == item.id).all()
-        
-        inward_qty = sum(e.quantity for e in entries if e.is_debit)
-        outward_qty = sum(e.quantity for e in entries if not e.is_debit)
-        
-        closing_qty = item.opening_qty + inward_qty - outward_qty
+    for item in db.query(StockItem).all():
+        closing_qty = (item.opening_qty or 0.0) + (moved.get(item.id) or 0.0)
         
         # Simple Valuation: Closing Qty * Rate?
         # If we have opening rate, use it.
-        closing_value = closing_qty * item.opening_rate 
+        closing_value = closing_qty * (item.opening_rate or 0.0)
         
         if closing_qty != 0:
             summary.append(StockSummaryItem(
@@ -145,35 +159,28 @@ def get_stock_summary(db: Session = Depends(get_db)):
 
 
 def calculate_stock_value_at(db: Session, target_date: date) -> float:
-    # Value = Opening Qty * Opening Rate 
-    #       + (Inwards Qty * Rate) - (Outwards Qty * Rate) ... complex valuation (FIFO/Avg).
-    # MVP: Value = (Opening Qty + Inwards - Outwards) * Opening Rate.
-    # We must filter entries <= target_date.
-    
-    items = db.query(StockItem).all()
+    # MVP: Value = (Opening Qty + Inwards - Outwards) * Opening Rate, entries <= target_date.
+    moved = _stock_quantities(db, target_date)
     total_value = 0.0
-    
-    for item in items:
-        # Filter entries before or on target_date
-        entries = db.query(VoucherEntry).join(VoucherEntry.voucher).filter(
-            VoucherEntry.stock_item_id == item.id,
-            Voucher.date <= target_date
-        ).all()
-        
-        inward_qty = sum(e.quantity for e in entries if e.is_debit)
-        outward_qty = sum(e.quantity for e in entries if not e.is_debit)
-        current_qty = item.opening_qty + inward_qty - outward_qty
-        
-        total_value += current_qty * item.opening_rate
-        
+    for item_id, opening_qty, opening_rate in db.query(StockItem.id, StockItem.opening_qty, StockItem.opening_rate).all():
+        current_qty = (opening_qty or 0.0) + (moved.get(item_id) or 0.0)
+        total_value += current_qty * (opening_rate or 0.0)
     return total_value
 
 @router.get("/pl", response_model=PLResponse)
 def get_profit_loss(
+    request: Request,
+    response: Response,
     from_date: Optional[date] = None, 
     to_date: Optional[date] = None, 
     db: Session = Depends(get_db)
 ):
+    return cached_report(
+        request, response, db, "analytics/pl", {"from_date": from_date, "to_date": to_date or date.today()},
+        lambda: _compute_profit_loss(db, from_date, to_date)
+    )
+
+def _compute_profit_loss(db: Session, from_date: Optional[date] = None, to_date: Optional[date] = None):
     # Defaults
     if not to_date: to_date = date.today()
     if not from_date: from_date = date(to_date.year, 4, 1) # Default to Apr 1 logic if missing? Or just None?
@@ -230,7 +237,6 @@ def get_profit_loss(
     # Stock
     # Opening Stock: Value AT from_date - 1 day? 
     # Effectively Closing Stock of (from_date - 1).
-    from datetime import timedelta
     yesterday = from_date - timedelta(days=1)
     
     opening_stock = calculate_stock_value_at(db, yesterday)
@@ -267,114 +273,199 @@ def get_profit_loss(
 from app.modules.analytics.schemas import GroupSummaryResponse, GroupSummaryItem
 
 @router.get("/group-summary/{group_name}", response_model=GroupSummaryResponse)
+@router.get("/group-summary", response_model=GroupSummaryResponse)
 def get_group_summary(
-    group_name: str, 
+    request: Request,
+    response: Response,
+    group_name: Optional[str] = None,
+    group_id: Optional[int] = None,
     from_date: Optional[date] = None, 
     to_date: Optional[date] = None, 
+    page: int = 1,
+    page_size: int = 100,
+    sort: Literal["name", "balance"] = "name",
+    descending: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
+    """
+    Drill-down of one group (group_id, else the case-insensitive group_name): sub-groups,
+    then a page of its direct ledgers, each with opening / debit / credit / closing for the period.
+    sort=balance orders by absolute closing balance (largest first unless descending=false).
+    """
+    if group_id is None and not group_name:
+        raise HTTPException(status_code=400, detail="group_name or group_id is required")
+    page = max(page, 1)
+    page_size = min(max(page_size, 1), 1000)
+    if descending is None:
+        descending = sort == "balance"
+    return cached_report(
+        request, response, db, "analytics/group-summary",
+        {
+            "group_name": group_name, "group_id": group_id, "from_date": from_date, "to_date": to_date or date.today(),
+            "page": page, "page_size": page_size, "sort": sort, "descending": descending
+        },
+        lambda: _compute_group_summary(db, group_name, from_date, to_date, page, page_size, sort, descending, group_id)
+    )
+
+def _compute_group_summary(
+    db: Session,
+    group_name: Optional[str],
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    page: int = 1,
+    page_size: int = 100,
+    sort: str = "name",
+    descending: bool = False,
+    group_id: Optional[int] = None
+):
+    """
+    Only the target subtree is aggregated:
+    - one GROUP BY ledger over its entries (prior / Dr / Cr), wrapped in a GROUP BY group for sub-group totals,
+    - the same expression, filtered to the target's own ledgers, sorted and paged in SQL.
+    Opening is the balance brought forward to from_date (from the last period-close snapshot if any);
+    Income / Expense groups with a from_date start the period at zero, like the P&L.
+    """
+
     if not to_date: to_date = date.today()
 
-    # 1. Reuse Balance Calc Logic (Should be refactored)
-    # Filter entries based on provided dates.
-    # If from_date is None, implies start of time (As Of to_date).
-    
-    ledgers = db.query(Ledger).options(selectinload(Ledger.entries)).all()
-    ledger_map = {}
-    
-    for l in ledgers:
-        if l.entries:
-            relevant = [
-                e for e in l.entries 
-                if (not from_date or e.voucher.date >= from_date) and (e.voucher.date <= to_date)
-            ]
-            dr = sum(e.amount for e in relevant if e.is_debit)
-            cr = sum(e.amount for e in relevant if not e.is_debit)
-            
-            # Opening Balance handling:
-            # If from_date is present, Opening Balance for "Period" is (Actual Opening + Trans < From).
-            # If from_date is None, Opening Balance is Actual Opening.
-            # However, for P&L items (Rev/Exp), we usually ignore Opening if distinct period?
-            # Let's keep it simple: Balance = Opening (if no from_date) + (Dr - Cr).
-            # If from_date is set, we are looking at "Movement" + "Opening as of From"?
-            # Tally Group Summary shows: Opening (as of from), Transactions, Closing.
-            # Our Response Schema only has 'balance'.
-            # Let's just return SUM(Relevant Entries) for now?
-            # If I drill from BS (from=None), I want (Opening + All Trans).
-            # If I drill from PL (from=Apr1), I want (All Trans Apr1-Mar31). (Opening usually 0 for Exp).
-            
-            # Logic:
-            # If from_date is None (BS mode): Use l.opening_balance + (Dr-Cr).
-            # If from_date is Set (PL mode): Use (Dr-Cr) only? 
-            # (Assuming Expenses don't have b/f balance in MVP without closing entries).
-            
-            if from_date:
-                net = (dr - cr) # Just movement
-            else:
-                net = l.opening_balance + (dr - cr) # Cumulative
-            
-            ledger_map[l.id] = net
-        else:
-             ledger_map[l.id] = l.opening_balance if not from_date else 0
+    # 1. Resolve Target Group (id, else case-insensitive name; a name may well be all digits)
+    index = GroupIndex(db)
+    target_id = group_id if group_id is not None else index.find(group_name)
+    if target_id not in index.names:
+        return GroupSummaryResponse(group_name=group_name or "", group_id=group_id, items=[], total_debit=0, total_credit=0)
+    subtree = index.subtree_ids(target_id)
+    nature = db.query(AccountGroup.nature).filter(AccountGroup.id == target_id).scalar()
+
+    periodic = bool(from_date) and nature in ("Income", "Expenses")
+    closed_upto = None
+    if not periodic:
+        closed_upto = latest_close_date(db, from_date - timedelta(days=1) if from_date else to_date)
+
+    # 2. Per-ledger movements for the subtree
+    signed = case((VoucherEntry.is_debit, VoucherEntry.amount), else_=-VoucherEntry.amount)
+    if from_date and not periodic:
+        prior = func.sum(case((Voucher.date < from_date, signed), else_=0.0))
+        dr = func.sum(case((Voucher.date < from_date, 0.0), (VoucherEntry.is_debit, VoucherEntry.amount), else_=0.0))
+        cr = func.sum(case((Voucher.date < from_date, 0.0), (VoucherEntry.is_debit, 0.0), else_=VoucherEntry.amount))
+    else:
+        prior = literal(0.0)
+        dr = func.sum(case((VoucherEntry.is_debit, VoucherEntry.amount), else_=0.0))
+        cr = func.sum(case((VoucherEntry.is_debit, 0.0), else_=VoucherEntry.amount))
+
+    agg = db.query(
+        VoucherEntry.ledger_id.label("ledger_id"), prior.label("prior"), dr.label("dr"), cr.label("cr")
+    ).join(Voucher, VoucherEntry.voucher_id == Voucher.id).join(
+        Ledger, VoucherEntry.ledger_id == Ledger.id
+    ).filter(Ledger.group_id.in_(subtree), Voucher.date <= to_date)
+    if periodic:
+        agg = agg.filter(Voucher.date >= from_date)
+    if closed_upto:
+        agg = agg.filter(Voucher.date > closed_upto)
+    agg = agg.group_by(VoucherEntry.ledger_id).subquery()
+
+    # 3. Ledger columns (Dr positive)
+    ledger_opening = func.coalesce(Ledger.opening_balance, 0.0)
+    opening_signed = case((Ledger.opening_balance_is_dr == False, -ledger_opening), else_=ledger_opening)
+    snap = None
+    if periodic:
+        base = literal(0.0)
+    elif closed_upto:
+        snap = db.query(PeriodCloseSnapshot.ledger_id, PeriodCloseSnapshot.balance).filter(
+            PeriodCloseSnapshot.as_of_date == closed_upto,
+            PeriodCloseSnapshot.ledger_id != None
+        ).subquery()
+        base = func.coalesce(snap.c.balance, opening_signed)
+    else:
+        base = opening_signed
+
+    opening_col = base + func.coalesce(agg.c.prior, 0.0)
+    dr_col = func.coalesce(agg.c.dr, 0.0)
+    cr_col = func.coalesce(agg.c.cr, 0.0)
+    closing_col = opening_col + dr_col - cr_col
+
+    def ledger_query(*cols):
+        q = db.query(*cols).select_from(Ledger).outerjoin(agg, agg.c.ledger_id == Ledger.id)
+        if snap is not None:
+            q = q.outerjoin(snap, snap.c.ledger_id == Ledger.id)
+        return q
+
+    # 4. Sub-group totals: one aggregate per group, rolled up the subtree here
+    direct = {
+        g_id: [o or 0.0, d or 0.0, c or 0.0]
+        for g_id, o, d, c in ledger_query(
+            Ledger.group_id, func.sum(opening_col), func.sum(dr_col), func.sum(cr_col)
+        ).filter(Ledger.group_id.in_(subtree)).group_by(Ledger.group_id).all()
+    }
+    totals = {}
+    for g_id in reversed(subtree): # Children come after their parent in subtree order
+        t = list(direct.get(g_id, [0.0, 0.0, 0.0]))
+        for ch in index.children.get(g_id, []):
+            t = [a + b for a, b in zip(t, totals[ch])]
+        totals[g_id] = t
+
+    def make_item(id, name, type, opening, debit, credit):
+        closing = opening + debit - credit
+        return GroupSummaryItem(
+            id=id, name=name, type=type,
+            balance=abs(closing), is_debit=closing >= 0,
+            opening=opening, debit=debit, credit=credit, closing=closing
+        )
 
-    groups = db.query(AccountGroup).options(selectinload(AccountGroup.children), selectinload(AccountGroup.ledgers)).all()
-    
-    def get_group_val_recursive(g):
-        tot = sum(ledger_map.get(l.id, 0) for l in g.ledgers)
-        for ch in g.children:
-            tot += get_group_val_recursive(ch)
-        return tot
-
-    # 2. Find Target Group
-    target = next((g for g in groups if g.name == group_name), None)
-    if not target:
-        # Check if it is "Profit & Loss A/c" -> Special Case?
-        # Or maybe User clicked "Assets" (Standard Tally Group does exist).
-        return GroupSummaryResponse(group_name=group_name, items=[], total_debit=0, total_credit=0)
-        
     items = []
-    
-    # 3. Add Sub-Groups
-    for child in target.children:
-        bal = get_group_val_recursive(child)
-        if bal != 0:
-            items.append(GroupSummaryItem(
-                id=child.id,
-                name=child.name,
-                type="group",
-                balance=abs(bal),
-                is_debit=bal >= 0
-            ))
-            
-    # 4. Add Direct Ledgers
-    for l in target.ledgers:
-        bal = ledger_map.get(l.id, 0)
-        if bal != 0:
-             items.append(GroupSummaryItem(
-                id=l.id,
-                name=l.name,
-                type="ledger",
-                balance=abs(bal),
-                is_debit=bal >= 0
-            ))
-            
+    for ch in index.children.get(target_id, []):
+        o, d, c = totals[ch]
+        if o or d or c:
+            items.append(make_item(ch, index.names[ch], "group", o, d, c))
+    if sort == "balance":
+        items.sort(key=lambda i: abs(i.closing), reverse=descending)
+    else:
+        items.sort(key=lambda i: i.name.lower(), reverse=descending)
+
+    # 5. Direct Ledgers: sorted and paged in SQL
+    active = [Ledger.group_id == target_id, or_(opening_col != 0, dr_col != 0, cr_col != 0)]
+    count, ledger_dr, ledger_cr = ledger_query(
+        func.count(Ledger.id),
+        func.sum(case((closing_col > 0, closing_col), else_=0.0)),
+        func.sum(case((closing_col < 0, -closing_col), else_=0.0))
+    ).filter(*active).one()
+
+    sort_col = func.abs(closing_col) if sort == "balance" else Ledger.name
+    rows = ledger_query(Ledger.id, Ledger.name, opening_col, dr_col, cr_col).filter(*active).order_by(
+        sort_col.desc() if descending else sort_col.asc(), Ledger.id
+    ).offset((page - 1) * page_size).limit(page_size).all()
+    for l_id, name, o, d, c in rows:
+        items.append(make_item(l_id, name, "ledger", o or 0.0, d or 0.0, c or 0.0))
+
+    group_items = [i for i in items if i.type == "group"]
+    o, d, c = totals[target_id]
     return GroupSummaryResponse(
-        group_name=group_name,
+        group_name=index.names[target_id],
+        group_id=target_id,
         items=items,
-        total_debit=sum(i.balance for i in items if i.is_debit),
-        total_credit=sum(i.balance for i in items if not i.is_debit)
+        total_debit=sum(i.balance for i in group_items if i.is_debit) + (ledger_dr or 0.0),
+        total_credit=sum(i.balance for i in group_items if not i.is_debit) + (ledger_cr or 0.0),
+        opening=o,
+        debit=d,
+        credit=c,
+        closing=o + d - c,
+        page=page,
+        page_size=page_size,
+        total_ledgers=count or 0
     )
 
-from app.modules.analytics.schemas import RatioAnalysisResponse, CashFlowResponse, MonthlyFlow
+from app.modules.analytics.schemas import RatioAnalysisResponse, CashFlowResponse, MonthlyFlow, LedgerFlow
 
 @router.get("/ratio-analysis", response_model=RatioAnalysisResponse)
-def get_ratio_analysis(db: Session = Depends(get_db)):
+def get_ratio_analysis(request: Request, response: Response, db: Session = Depends(get_db)):
+    return cached_report(request, response, db, "analytics/ratio-analysis", {"as_of": date.today()}, lambda: _compute_ratio_analysis(db))
+
+def _compute_ratio_analysis(db: Session):
     # Calculate Components using existing logic (simplified)
     # Ideally, refactor Shared Logic into a Service. For MVP, we instantiate helper logic here or call internal functions?
     # Python internal calls are cheap.
     
     # 1. Get Balance Sheet Components
-    bs = get_balance_sheet(db=db)
+    bs = _compute_balance_sheet(db)
     
     # Extract Values from BS Response (This is inefficient but clean code-wise for MVP)
     # We need to find "Current Assets" and "Current Liabilities" groups
@@ -395,7 +486,7 @@ def get_ratio_analysis(db: Session = Depends(get_db)):
     capital_account = find_val(bs["liabilities"], "Capital Account")
     
     # 2. Get P&L Components
-    pl = get_profit_loss(db=db)
+    pl = _compute_profit_loss(db)
     
     # Sales
     sales_item = next((x for x in pl["incomes"] if x.name == "Sales Accounts"), None)
@@ -439,94 +530,161 @@ def get_ratio_analysis(db: Session = Depends(get_db)):
         return_on_working_capital=(net_profit_val / wc) * 100 if wc else 0
     )
 
-@router.get("/cash-flow", response_model=CashFlowResponse)
-def get_cash_flow(db: Session = Depends(get_db)):
-    """
-    Monthly Summary of Cash/Bank Inflow/Outflow.
-    """
-    from sqlalchemy import extract
-    
-    # 1. Identify Cash/Bank Ledgers
-    # We find groups "Cash-in-Hand" and "Bank Accounts"
-    target_groups = ["Cash-in-Hand", "Bank Accounts"]
-    all_groups = db.query(AccountGroup).all()
-    
-    target_ids = []
-    
-    def collect_ids(g_name):
-        g = next((x for x in all_groups if x.name == g_name), None)
-        if g:
-            # Get all childrens recursive
-            ids = [g.id]
-            # Simple recursive closure
-            def get_children(pid):
-                children = [x for x in all_groups if x.parent_id == pid]
-                for c in children:
-                    ids.append(c.id)
-                    get_children(c.id)
-            get_children(g.id)
-            return ids
-        return []
-
-    for name in target_groups:
-        target_ids.extend(collect_ids(name))
-        
-    cash_ledgers = db.query(Ledger).filter(Ledger.group_id.in_(target_ids)).all()
-    cash_ledger_ids = [l.id for l in cash_ledgers]
-    
-    if not cash_ledger_ids:
-        return CashFlowResponse(items=[], total_inflow=0, total_outflow=0, net_flow=0)
-        
-    # 2. Query Entries
-    entries = db.query(VoucherEntry).filter(VoucherEntry.ledger_id.in_(cash_ledger_ids)).all()
-    
-    # 3. Group by Month
-    from collections import defaultdict
-    monthly = defaultdict(lambda: {"in": 0.0, "out": 0.0})
-    
-    for e in entries:
-        m_key = e.voucher.date.strftime("%Y-%m") # 2024-04
-        if e.is_debit:
-            # Debit to Cash = Receipt (Inflow)
-            monthly[m_key]["in"] += e.amount
-        else:
-            # Credit to Cash = Payment (Outflow)
-            monthly[m_key]["out"] += e.amount
-            
-    # Format
+CASH_GROUPS = ["Cash-in-hand", "Bank Accounts"]
+
+def _bucket_label(d: date, granularity: str) -> str:
+    if granularity == "day":
+        return d.isoformat()
+    if granularity == "week":
+        iso = d.isocalendar()
+        return f"{iso[0]}-W{iso[1]:02d}"
+    return d.strftime("%Y-%m")
+
+def _flow_response(buckets, per_ledger, granularity: str, mode: str, names) -> CashFlowResponse:
     items = []
-    keys = sorted(monthly.keys())
-    
-    tot_in = 0
-    tot_out = 0
-    
-    for k in keys:
-        i = monthly[k]["in"]
-        o = monthly[k]["out"]
-        items.append(MonthlyFlow(
-            month=k,
-            inflow=i,
-            outflow=o,
-            net=i-o
-        ))
+    tot_in = 0.0
+    tot_out = 0.0
+    for k in sorted(buckets):
+        i, o = buckets[k]
+        items.append(MonthlyFlow(month=k, inflow=i, outflow=o, net=i - o))
         tot_in += i
         tot_out += o
-        
+
+    ledgers = [
+        LedgerFlow(ledger_id=l_id, name=names.get(l_id, ""), inflow=i, outflow=o, net=i - o)
+        for l_id, (i, o) in sorted(per_ledger.items(), key=lambda kv: -(kv[1][0] + kv[1][1]))
+    ]
     return CashFlowResponse(
         items=items,
         total_inflow=tot_in,
         total_outflow=tot_out,
-        net_flow=tot_in - tot_out
+        net_flow=tot_in - tot_out,
+        granularity=granularity,
+        mode=mode,
+        ledgers=ledgers
     )
 
+@router.get("/cash-flow", response_model=CashFlowResponse)
+def get_cash_flow(
+    request: Request,
+    response: Response,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    granularity: Literal["day", "week", "month"] = "month",
+    mode: Literal["actual", "projected"] = "actual",
+    db: Session = Depends(get_db)
+):
+    """
+    Cash/Bank inflow and outflow per day, week or month, with a per-ledger breakdown.
+    mode=projected buckets open receivables (in) and payables (out) by bill due date instead.
+    """
+    return cached_report(
+        request, response, db, "analytics/cash-flow",
+        {"from_date": from_date, "to_date": to_date, "granularity": granularity, "mode": mode, "as_of": date.today()},
+        lambda: _compute_cash_flow(db, from_date, to_date, granularity, mode)
+    )
+
+def _compute_cash_flow(
+    db: Session,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    granularity: str = "month",
+    mode: str = "actual"
+):
+    """
+    Summary of Cash/Bank Inflow/Outflow.
+    One GROUP BY (bucket, ledger) over the cash/bank entries: buckets are days or
+    (year, month) in SQL; weeks are folded from days here, so row count is bounded by
+    calendar days x cash ledgers, never by the number of entries.
+    """
+    if mode == "projected":
+        return _compute_projected_cash_flow(db, from_date, to_date, granularity)
+
+
+    # 1. Identify Cash/Bank Ledgers
+    cash_ledger_ids = list(classify_ledgers(db, {"cash": CASH_GROUPS}))
+    if not cash_ledger_ids:
+        return CashFlowResponse(items=[], total_inflow=0, total_outflow=0, net_flow=0, granularity=granularity, mode=mode)
+
+    # 2. Aggregate (Debit to Cash = Receipt / Inflow, Credit = Payment / Outflow)
+    if granularity == "month":
+        bucket_cols = [extract("year", Voucher.date), extract("month", Voucher.date)]
+    else:
+        bucket_cols = [Voucher.date]
+    inflow = func.sum(case((VoucherEntry.is_debit, VoucherEntry.amount), else_=0.0))
+    outflow = func.sum(case((VoucherEntry.is_debit, 0.0), else_=VoucherEntry.amount))
+
+    query = db.query(VoucherEntry.ledger_id, inflow, outflow, *bucket_cols).join(
+        Voucher, VoucherEntry.voucher_id == Voucher.id
+    ).filter(VoucherEntry.ledger_id.in_(cash_ledger_ids))
+    if from_date:
+        query = query.filter(Voucher.date >= from_date)
+    if to_date:
+        query = query.filter(Voucher.date <= to_date)
+    rows = query.group_by(VoucherEntry.ledger_id, *bucket_cols).all()
+
+    # 3. Fold into buckets / ledgers
+    buckets = {}
+    per_ledger = {}
+    for row in rows:
+        ledger_id, i, o = row[0], row[1] or 0.0, row[2] or 0.0
+        if granularity == "month":
+            key = f"{int(row[3])}-{int(row[4]):02d}"
+        else:
+            key = _bucket_label(row[3], granularity)
+        b = buckets.setdefault(key, [0.0, 0.0])
+        b[0] += i
+        b[1] += o
+        l = per_ledger.setdefault(ledger_id, [0.0, 0.0])
+        l[0] += i
+        l[1] += o
+
+    names = dict(db.query(Ledger.id, Ledger.name).filter(Ledger.id.in_(list(per_ledger))).all()) if per_ledger else {}
+    return _flow_response(buckets, per_ledger, granularity, mode, names)
+
+def _compute_projected_cash_flow(db: Session, from_date: Optional[date], to_date: Optional[date], granularity: str):
+    """
+    Expected collections (open receivables) and payments (open payables) by due date.
+    Overdue bills fall into the first bucket (today or from_date, whichever is later).
+    """
+
+    today = date.today()
+    start = max(today, from_date) if from_date else today
+
+    buckets = {}
+    per_ledger = {}
+    for bill in open_bills(db, today):
+        due = max(bill["due_date"] or start, start)
+        if to_date and due > to_date:
+            continue
+        pending = bill["pending"]
+        i, o = (pending, 0.0) if pending > 0 else (0.0, -pending)
+        b = buckets.setdefault(_bucket_label(due, granularity), [0.0, 0.0])
+        b[0] += i
+        b[1] += o
+        l = per_ledger.setdefault(bill["ledger_id"], [0.0, 0.0])
+        l[0] += i
+        l[1] += o
+
+    names = dict(db.query(Ledger.id, Ledger.name).filter(Ledger.id.in_(list(per_ledger))).all()) if per_ledger else {}
+    return _flow_response(buckets, per_ledger, granularity, "projected", names)
+
 from app.modules.analytics.schemas import TrialBalanceResponse, TrialBalanceItem
 
 @router.get("/trial-balance", response_model=TrialBalanceResponse)
 def get_trial_balance(
+    request: Request,
+    response: Response,
     from_date: Optional[date] = None, 
     to_date: Optional[date] = None, 
     db: Session = Depends(get_db)
 ):
+    return cached_report(
+        request, response, db, "analytics/trial-balance", {"from_date": from_date, "to_date": to_date or date.today()},
+        lambda: _compute_trial_balance(db, from_date, to_date)
+    )
+
+def _compute_trial_balance(db: Session, from_date: Optional[date] = None, to_date: Optional[date] = None):
     if not to_date: to_date = date.today()
     
     # 1. Fetch Stats
@@ -683,7 +841,7 @@ def get_dashboard_data(db: Session = Depends(get_db)):
     
     # Profit
     # Reuse PL logic partially?
-    pl = get_profit_loss(db=db)
+    pl = _compute_profit_loss(db)
     # Gross Profit from PL response
     # Our PL response separates incomes/expenses.
     # Gross Profit = (Sales + Direct Inc + Closing Stock) - (Opening Stock + Purchase + Direct Exp)
@@ -765,12 +923,24 @@ def get_dashboard_data(db: Session = Depends(get_db)):
 
     # 3. Alerts (Mock/Real)
     alerts = []
-    # Real Alert: Negative Stock
-    neg_stock = []
-    # We need stock summary?
-    # Reuse stock summary logic? Too expense?
-    # Simple check on cached vals if possible.
-    # For now, let's skip heavy stock check on Dashboard load.
+    # Negative / below-reorder stock: an indexed lookup on the maintained item balances
+    now = datetime.utcnow().isoformat()
+    for a in stock_alerts(db):
+        if a["kind"] == "negative":
+            title = f"Negative stock: {a['name']}"
+            description = f"Current quantity is {a['quantity']:g}."
+        else:
+            title = f"Reorder {a['name']}"
+            description = f"Quantity {a['quantity']:g} is below the reorder level of {a['reorder_level']:g}."
+        alerts.append(DashboardAlert(
+            id=f"stock-{a['kind']}-{a['stock_item_id']}",
+            type="error" if a["kind"] == "negative" else "warning",
+            title=title,
+            description=description,
+            action_label="Stock Summary",
+            action_href="/stock-summary",
+            timestamp=now
+        ))
     
     return DashboardData(
         cash_balance=cash,
@@ -41,12 +41,25 @@ class GroupSummaryItem(BaseModel):
     type: str # 'group' or 'ledger'
     balance: float # Absolute
     is_debit: bool
+    # Signed (Dr positive) columns
+    opening: float = 0.0
+    debit: float = 0.0
+    credit: float = 0.0
+    closing: float = 0.0
 
 class GroupSummaryResponse(BaseModel):
     group_name: str
-    items: List[GroupSummaryItem]
+    items: List[GroupSummaryItem] # Sub-groups, then one page of direct ledgers
     total_debit: float
     total_credit: float
+    group_id: Optional[int] = None
+    opening: float = 0.0
+    debit: float = 0.0
+    credit: float = 0.0
+    closing: float = 0.0
+    page: int = 1
+    page_size: int = 0
+    total_ledgers: int = 0 # Direct ledgers with a balance or activity, across all pages
     
 class RatioAnalysisResponse(BaseModel):
     working_capital: float
@@ -63,11 +76,21 @@ class MonthlyFlow(BaseModel):
     outflow: float
     net: float
 
+class LedgerFlow(BaseModel):
+    ledger_id: int
+    name: str
+    inflow: float
+    outflow: float
+    net: float
+
 class CashFlowResponse(BaseModel):
-    items: List[MonthlyFlow]
+    items: List[MonthlyFlow] # `month` holds the bucket label (2024-04, 2024-W14 or 2024-04-05)
     total_inflow: float
     total_outflow: float
     net_flow: float
+    granularity: str = "month"
+    mode: str = "actual" # actual (cash/bank entries) or projected (open bills by due date)
+    ledgers: List[LedgerFlow] = []
 
 class TrialBalanceItem(BaseModel):
     id: int
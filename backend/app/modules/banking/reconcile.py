@@ -0,0 +1,81 @@
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.modules.accounting.models import VoucherEntry
+from app.modules.accounting.versioning import bump_data_version
+from app.modules.audit.service import log_change
+
+# SQLite's default limit is 999 bound parameters per statement; IN lists stay under it.
+ID_CHUNK = 900
+# Rows per executemany UPDATE batch
+UPDATE_CHUNK = 5000
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for k in range(0, len(items), size):
+        yield items[k:k + size]
+
+def reconcile_bank_dates(
+    db: Session,
+    pairs: Iterable[Tuple[int, date]],
+    user_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Sets bank_date on unreconciled entries with set-based UPDATEs, no ORM objects loaded.
+    Ids that do not exist, or already carry a bank_date, are reported and left alone.
+    The whole batch is one audit log record; everything commits together.
+    """
+    dates = {}
+    for entry_id, bank_date in pairs:
+        dates[entry_id] = bank_date # last one wins for a repeated id
+    ids = list(dates)
+
+    table = VoucherEntry.__table__
+    conn = db.connection()
+    existing = {}
+    for chunk in _chunks(ids, ID_CHUNK):
+        existing.update(
+            (r.id, (r.ledger_id, r.bank_date))
+            for r in conn.execute(select(table.c.id, table.c.ledger_id, table.c.bank_date).where(table.c.id.in_(chunk)))
+        )
+
+    not_found = [i for i in ids if i not in existing]
+    already = [i for i in ids if i in existing and existing[i][1] is not None]
+    todo = [{"entry_id": i, "new_bank_date": dates[i]} for i in ids if i in existing and existing[i][1] is None]
+
+    stmt = update(table).where(
+        table.c.id == bindparam("entry_id"),
+        table.c.bank_date == None # a concurrent reconcile wins; never overwritten here
+    ).values(bank_date=bindparam("new_bank_date"))
+    reconciled = 0
+    for chunk in _chunks(todo, UPDATE_CHUNK):
+        reconciled += conn.execute(stmt, chunk).rowcount
+
+    result = {
+        "reconciled": reconciled,
+        "not_found": not_found,
+        "already_reconciled": already
+    }
+    if not reconciled:
+        db.commit()
+        return result
+
+    bump_data_version(db) # Core UPDATE: the flush listener never sees it
+    ledger_ids = sorted({existing[p["entry_id"]][0] for p in todo})
+    log_change( # commits
+        db,
+        "BankReconciliation",
+        ledger_ids[0] if len(ledger_ids) == 1 else None,
+        "RECONCILE",
+        user_id,
+        {
+            "ledger_ids": ledger_ids,
+            "reconciled": reconciled,
+            "entries": [[p["entry_id"], p["new_bank_date"]] for p in todo],
+            "not_found": not_found,
+            "already_reconciled": already
+        }
+    )
+    return result
@@ -1,87 +1,182 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List
+import json
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Response, UploadFile
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import Session, aliased
+from typing import List, Optional
 from datetime import date
 
 from app.core.db import get_db
 from app.modules.accounting.models import VoucherEntry, Voucher, Ledger, VoucherType
-from .schemas import BankEntry, ReconcileRequest
+from .schemas import BankEntry, BankReconciliationSummary, ReconcileRequest, StatementColumns
+from app.modules.auth.deps import get_current_user
+from app.modules.auth.models import User
+from .reconcile import reconcile_bank_dates
+from .statement import match_statement, parse_statement
 
 router = APIRouter(
     prefix="/banking",
     tags=["Banking"]
 )
 
+def _bank_entries_query(db: Session, ledger_id: int, start_date: Optional[date], end_date: Optional[date]):
+    """
+    A bank ledger's lines that are unreconciled, or reconciled within the range.
+    The contra ledger (first other line of the voucher) is a correlated subquery, so
+    rows come back complete without loading vouchers / sibling entries.
+    """
+    other = aliased(VoucherEntry)
+    contra = select(Ledger.name).join(other, other.ledger_id == Ledger.id).where(
+        other.voucher_id == VoucherEntry.voucher_id,
+        other.id != VoucherEntry.id
+    ).order_by(other.id).limit(1).scalar_subquery()
+
+    query = db.query(
+        VoucherEntry.id,
+        Voucher.date.label("voucher_date"),
+        Voucher.voucher_number,
+        VoucherType.name.label("voucher_type"),
+        func.coalesce(contra, "Multiple").label("particulars"),
+        VoucherEntry.instrument_number,
+        VoucherEntry.instrument_date,
+        VoucherEntry.bank_date,
+        VoucherEntry.amount,
+        VoucherEntry.is_debit
+    ).join(Voucher, VoucherEntry.voucher_id == Voucher.id).join(
+        VoucherType, Voucher.voucher_type_id == VoucherType.id
+    ).filter(VoucherEntry.ledger_id == ledger_id)
+
+    in_range = []
+    if start_date:
+        in_range.append(VoucherEntry.bank_date >= start_date)
+    if end_date:
+        in_range.append(VoucherEntry.bank_date <= end_date)
+    if in_range:
+        query = query.filter(or_(VoucherEntry.bank_date == None, and_(*in_range)))
+    return query
+
 @router.get("/reconciliation/{ledger_id}", response_model=List[BankEntry])
 def get_bank_entries(
     ledger_id: int,
+    response: Response,
     start_date: date = Query(None), # Optional filter
     end_date: date = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """
+    Unreconciled entries plus those reconciled within [start_date, end_date], in voucher date order.
+    Paged; the total number of rows is in the X-Total-Count header.
+    """
+    query = _bank_entries_query(db, ledger_id, start_date, end_date)
+    response.headers["X-Total-Count"] = str(query.order_by(None).count())
+    rows = query.order_by(Voucher.date, Voucher.id, VoucherEntry.id).offset(offset).limit(limit).all()
+
+    return [
+        BankEntry(
+            id=r.id,
+            voucher_date=r.voucher_date,
+            voucher_number=r.voucher_number,
+            voucher_type=r.voucher_type,
+            particulars=r.particulars,
+            instrument_number=r.instrument_number,
+            instrument_date=r.instrument_date,
+            bank_date=r.bank_date,
+            debit=r.amount if r.is_debit else 0,
+            credit=r.amount if not r.is_debit else 0
+        )
+        for r in rows
+    ]
+
+@router.get("/reconciliation/{ledger_id}/summary", response_model=BankReconciliationSummary)
+def get_reconciliation_summary(
+    ledger_id: int,
+    as_of: Optional[date] = None,
     db: Session = Depends(get_db)
 ):
-    # Verify Ledger is a Bank Ledger? (Optional check)
-    
-    # Query Entries for this Ledger
-    # Logic: Fetch ALL Unreconciled + Reconciled within range (if range provided)
-    query = db.query(VoucherEntry).join(Voucher).filter(VoucherEntry.ledger_id == ledger_id)
-    
-    # Order by Voucher Date
-    query = query.order_by(Voucher.date)
-    
-    results = []
-    entries = query.all()
-    
-    for e in entries:
-        # Filter Logic in Python for complexity (Unreconciled OR in Date Range)
-        is_unreconciled = e.bank_date is None
-        is_in_range = True
-        if start_date and end_date and e.bank_date:
-            is_in_range = start_date <= e.bank_date <= end_date
-            
-        if is_unreconciled or is_in_range:
-            v = e.voucher
-            # Determine "Particulars" (The other side of the entry)
-            # Simple heuristic: The first entry that is NOT this entry
-            # But Voucher has multiple entries.
-            # Tally shows "By PartyName".
-            other_entry = next((xe for xe in v.entries if xe.id != e.id), None)
-            particulars = "Multiple"
-            if other_entry:
-                # We need to fetch ledger name via relationship. 
-                # e.voucher.entries is populated.
-                # Accessing other_entry.ledger.name might trigger lazy load.
-                particulars = other_entry.ledger.name if other_entry.ledger else "Unknown"
+    """
+    Balance as per books vs. balance as per bank on `as_of` (default today).
+    A line is uncleared when its voucher is on or before as_of and its bank_date is empty or later.
+    One conditional-aggregation query; the ledger's opening balance rides along on the same row.
+    """
+    as_of = as_of or date.today()
+    in_books = Voucher.id != None # entry's voucher dated on or before as_of (see the join)
+    uncleared = in_books & or_(VoucherEntry.bank_date == None, VoucherEntry.bank_date > as_of)
+    deposit = uncleared & (VoucherEntry.is_debit == True)
+    payment = uncleared & (VoucherEntry.is_debit == False)
+    signed = case((VoucherEntry.is_debit, VoucherEntry.amount), else_=-VoucherEntry.amount)
 
-            results.append(BankEntry(
-                id=e.id,
-                voucher_date=v.date,
-                voucher_number=v.voucher_number,
-                voucher_type=v.voucher_type.name,
-                particulars=particulars,
-                instrument_number=e.instrument_number,
-                instrument_date=e.instrument_date,
-                bank_date=e.bank_date,
-                debit=e.amount if e.is_debit else 0,
-                credit=e.amount if not e.is_debit else 0
-            ))
-            
-    return results
+    row = db.query(
+        Ledger.opening_balance,
+        Ledger.opening_balance_is_dr,
+        func.coalesce(func.sum(case((in_books, signed), else_=0.0)), 0.0).label("movement"),
+        func.coalesce(func.sum(case((deposit, VoucherEntry.amount), else_=0.0)), 0.0).label("deposits"),
+        func.coalesce(func.sum(case((deposit, 1), else_=0)), 0).label("deposit_count"),
+        func.coalesce(func.sum(case((payment, VoucherEntry.amount), else_=0.0)), 0.0).label("payments"),
+        func.coalesce(func.sum(case((payment, 1), else_=0)), 0).label("payment_count")
+    ).select_from(Ledger).outerjoin(
+        VoucherEntry, VoucherEntry.ledger_id == Ledger.id
+    ).outerjoin(
+        Voucher, and_(VoucherEntry.voucher_id == Voucher.id, Voucher.date <= as_of)
+    ).filter(Ledger.id == ledger_id).group_by(
+        Ledger.id, Ledger.opening_balance, Ledger.opening_balance_is_dr
+    ).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Ledger not found")
+
+    opening = (row.opening_balance or 0.0) * (1 if row.opening_balance_is_dr else -1)
+    books = opening + row.movement
+    return BankReconciliationSummary(
+        ledger_id=ledger_id,
+        as_of=as_of,
+        balance_as_per_books=round(books, 2),
+        uncleared_deposits=round(row.deposits, 2),
+        uncleared_deposit_count=row.deposit_count,
+        uncleared_payments=round(row.payments, 2),
+        uncleared_payment_count=row.payment_count,
+        balance_as_per_bank=round(books - row.deposits + row.payments, 2)
+    )
 
 @router.post("/reconcile")
 def reconcile_entries(
     reqs: List[ReconcileRequest],
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Sets bank dates in bulk. Unknown and already reconciled entries are reported, not changed.
+    """
+    result = reconcile_bank_dates(db, ((r.entry_id, r.bank_date) for r in reqs), current_user.id)
+    return {"message": f"Reconciled {result['reconciled']} entries", **result}
+
+# --- Statement Import ---
+
+@router.post("/statement/{ledger_id}/match")
+def match_bank_statement(
+    ledger_id: int,
+    file: UploadFile = File(...),
+    columns: Optional[str] = Form(None), # JSON StatementColumns; headers are auto-detected without it
+    date_window_days: int = Query(5, ge=0, le=60),
     db: Session = Depends(get_db)
 ):
-    ids = [r.entry_id for r in reqs]
-    entries = db.query(VoucherEntry).filter(VoucherEntry.id.in_(ids)).all()
-    
-    entry_map = {e.id: e for e in entries}
-    
-    count = 0
-    for r in reqs:
-        if r.entry_id in entry_map:
-            entry_map[r.entry_id].bank_date = r.bank_date
-            count += 1
-            
-    db.commit()
-    return {"message": f"Reconciled {count} entries"}
+    """
+    Proposes matches between a CSV bank statement and the ledger's unreconciled entries.
+    Nothing is saved: confirmed matches are sent to /banking/statement/apply.
+    """
+    try:
+        mapping = StatementColumns(**json.loads(columns)) if columns else None
+        lines = parse_statement(file.file.read().decode("utf-8-sig"), mapping)
+    except (ValueError, TypeError) as e: # bad JSON / mapping / rows
+        raise HTTPException(status_code=400, detail=f"Invalid statement: {e}")
+    return match_statement(db, ledger_id, lines, date_window_days)
+
+@router.post("/statement/apply")
+def apply_statement_matches(
+    reqs: List[ReconcileRequest],
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Saves confirmed statement matches (same bulk path as /banking/reconcile).
+    """
+    return reconcile_entries(reqs, db=db, current_user=current_user)
@@ -17,6 +17,29 @@ class BankEntry(BaseModel):
     class Config:
         from_attributes = True
 
+class BankReconciliationSummary(BaseModel):
+    ledger_id: int
+    as_of: date
+    balance_as_per_books: float # Dr positive
+    uncleared_deposits: float # Debited in the books, not yet credited by the bank
+    uncleared_deposit_count: int
+    uncleared_payments: float # Cheques issued / payments not yet presented
+    uncleared_payment_count: int
+    balance_as_per_bank: float # books - uncleared deposits + uncleared payments
+
 class ReconcileRequest(BaseModel):
     entry_id: int
     bank_date: date
+
+class StatementColumns(BaseModel):
+    """
+    Which CSV header holds what. Either `amount` (signed, + deposit / - withdrawal)
+    or `debit` (withdrawal) / `credit` (deposit) columns.
+    """
+    date: str
+    description: Optional[str] = None
+    instrument_number: Optional[str] = None
+    amount: Optional[str] = None
+    debit: Optional[str] = None
+    credit: Optional[str] = None
+    date_format: Optional[str] = None # strptime format; common formats are tried when empty
@@ -0,0 +1,217 @@
+import csv
+import io
+import re
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.modules.accounting.models import Voucher, VoucherEntry
+from .schemas import StatementColumns
+
+# --- Statement Parsing ---
+
+# Header names banks commonly use, tried in order when no column mapping is given
+COLUMN_ALIASES = {
+    "date": ["date", "txn date", "transaction date", "value date", "posting date"],
+    "description": ["description", "narration", "particulars", "remarks", "details"],
+    "instrument_number": ["cheque no", "cheque number", "chq no", "chq./ref.no.", "ref no", "reference", "instrument no"],
+    "amount": ["amount"],
+    "debit": ["debit", "withdrawal", "withdrawals", "withdrawal amt", "dr"],
+    "credit": ["credit", "deposit", "deposits", "deposit amt", "cr"],
+}
+
+DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d/%m/%y", "%d-%m-%y", "%d-%b-%Y", "%d %b %Y", "%d-%b-%y")
+
+def _detect_columns(headers: List[str]) -> StatementColumns:
+    by_name = {h.strip().lower(): h for h in headers if h}
+    found = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        found[field] = next((by_name[a] for a in aliases if a in by_name), None)
+    if not found["date"]:
+        raise ValueError("No date column found; pass a column mapping")
+    if not (found["amount"] or found["debit"] or found["credit"]):
+        raise ValueError("No amount / debit / credit column found; pass a column mapping")
+    return StatementColumns(**found)
+
+@lru_cache(maxsize=4096)
+def _parse_date(value: str, fmt: Optional[str] = None) -> date:
+    # Statements repeat the same few dates thousands of times; parse each once
+    value = value.strip()
+    for f in ([fmt] if fmt else DATE_FORMATS):
+        try:
+            return datetime.strptime(value, f).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date {value!r}")
+
+def _parse_amount(value: Optional[str]) -> float:
+    value = (value or "").replace(",", "").strip()
+    return float(value) if value else 0.0
+
+def _norm_instrument(value: Optional[str]) -> str:
+    # "000123", "0001-23" and "123" are the same cheque
+    return re.sub(r"[^0-9A-Za-z]", "", value or "").upper().lstrip("0")
+
+def parse_statement(content: str, columns: Optional[StatementColumns] = None) -> List[Dict[str, Any]]:
+    """
+    One record per statement line: date, signed amount (+ deposit / - withdrawal),
+    instrument number and description. Raises ValueError naming the bad line.
+    """
+    reader = csv.DictReader(io.StringIO(content))
+    cols = columns or _detect_columns(reader.fieldnames or [])
+    lines = []
+    for line_no, row in enumerate(reader, start=2):
+        if not any((v or "").strip() for v in row.values()):
+            continue # blank line
+        try:
+            if cols.amount:
+                amount = _parse_amount(row.get(cols.amount))
+            else:
+                amount = _parse_amount(row.get(cols.credit)) if cols.credit else 0.0
+                amount -= _parse_amount(row.get(cols.debit)) if cols.debit else 0.0
+            instrument = (row.get(cols.instrument_number) or "").strip() if cols.instrument_number else ""
+            lines.append({
+                "line": line_no,
+                "date": _parse_date(row.get(cols.date) or "", cols.date_format),
+                "amount": round(amount, 2),
+                "instrument_number": instrument or None,
+                "description": (row.get(cols.description) or "").strip() if cols.description else ""
+            })
+        except ValueError as e:
+            raise ValueError(f"Line {line_no}: {e}")
+    return lines
+
+# --- Matching ---
+# Statement deposits are debits to the bank ledger in the books, withdrawals are credits.
+# Two indexes over the ledger's unreconciled lines, built once per upload:
+#   (instrument number, side)  -> entries                        exact cheque / reference match
+#   (amount in paise, side)    -> entries sorted by voucher date  bisect for the date window
+# Each statement line costs a hash lookup plus a short scan, never a pass over all entries.
+
+CONFIDENCE_INSTRUMENT = 1.0      # instrument + amount
+CONFIDENCE_INSTRUMENT_ONLY = 0.6 # instrument matches, amount differs
+CONFIDENCE_AMOUNT_DATE = 0.8     # amount + the only candidate in the window
+CONFIDENCE_AMOUNT_NEAREST = 0.5  # amount + nearest of several candidates
+
+def _paise(amount: float) -> int:
+    return int(round(abs(amount) * 100))
+
+def _unreconciled(db: Session, ledger_id: int) -> List[Any]:
+    return db.query(
+        VoucherEntry.id,
+        VoucherEntry.amount,
+        VoucherEntry.is_debit,
+        VoucherEntry.instrument_number,
+        Voucher.date,
+        Voucher.voucher_number
+    ).join(Voucher, VoucherEntry.voucher_id == Voucher.id).filter(
+        VoucherEntry.ledger_id == ledger_id,
+        VoucherEntry.bank_date == None
+    ).order_by(Voucher.date, VoucherEntry.id).all()
+
+def _nearest_in_window(
+    candidates: List[Tuple[date, int]], on_date: date, window: int, used: set
+) -> Tuple[Optional[int], int]:
+    """
+    (index of the unclaimed candidate closest to on_date within the window, candidates in the window).
+    `candidates` is sorted by date, so the window is a bisect range.
+    """
+    lo = bisect_left(candidates, (on_date - timedelta(days=window), -1))
+    best, best_gap, in_window = None, None, 0
+    for k in range(lo, len(candidates)):
+        c_date, idx = candidates[k]
+        if c_date > on_date + timedelta(days=window):
+            break
+        if idx in used:
+            continue
+        in_window += 1
+        gap = abs((c_date - on_date).days)
+        if best is None or gap < best_gap:
+            best, best_gap = idx, gap
+    return best, in_window
+
+def match_statement(
+    db: Session,
+    ledger_id: int,
+    lines: List[Dict[str, Any]],
+    date_window_days: int = 5
+) -> Dict[str, Any]:
+    """
+    Proposed (statement line -> entry) matches with a confidence, plus the lines left unmatched.
+    Instrument matches are claimed first, so an amount-only guess never takes their entry.
+    Nothing is written; confirmed matches go to reconcile_bank_dates.
+    """
+    entries = _unreconciled(db, ledger_id)
+    by_instrument: Dict[Tuple[str, bool], List[int]] = {}
+    by_amount: Dict[Tuple[int, bool], List[Tuple[date, int]]] = {}
+    for idx, e in enumerate(entries):
+        inst = _norm_instrument(e.instrument_number)
+        if inst:
+            by_instrument.setdefault((inst, e.is_debit), []).append(idx)
+        by_amount.setdefault((_paise(e.amount), e.is_debit), []).append((e.date, idx)) # already date ordered
+
+    used = set()
+    proposals = {}
+
+    # Pass 1: cheque / reference number on the same side
+    for line in lines:
+        inst = _norm_instrument(line["instrument_number"])
+        if not inst or not line["amount"]:
+            continue
+        is_debit = line["amount"] > 0
+        for idx in by_instrument.get((inst, is_debit), ()):
+            if idx in used:
+                continue
+            same_amount = _paise(entries[idx].amount) == _paise(line["amount"])
+            used.add(idx)
+            proposals[line["line"]] = (idx, CONFIDENCE_INSTRUMENT if same_amount else CONFIDENCE_INSTRUMENT_ONLY,
+                                       "instrument" if same_amount else "instrument_only")
+            break
+
+    # Pass 2: amount on the same side, nearest voucher date within the window
+    for line in lines:
+        if line["line"] in proposals or not line["amount"]:
+            continue
+        candidates = by_amount.get((_paise(line["amount"]), line["amount"] > 0))
+        if not candidates:
+            continue
+        idx, in_window = _nearest_in_window(candidates, line["date"], date_window_days, used)
+        if idx is None:
+            continue
+        used.add(idx)
+        proposals[line["line"]] = (idx, CONFIDENCE_AMOUNT_DATE if in_window == 1 else CONFIDENCE_AMOUNT_NEAREST,
+                                   "amount_date")
+
+    matches, unmatched = [], []
+    for line in lines:
+        proposal = proposals.get(line["line"])
+        if not proposal:
+            unmatched.append(line)
+            continue
+        idx, confidence, basis = proposal
+        e = entries[idx]
+        matches.append({
+            "line": line["line"],
+            "statement_date": line["date"],
+            "amount": line["amount"],
+            "instrument_number": line["instrument_number"],
+            "description": line["description"],
+            "entry_id": e.id,
+            "voucher_number": e.voucher_number,
+            "voucher_date": e.date,
+            "bank_date": line["date"], # proposed clearing date
+            "confidence": confidence,
+            "basis": basis
+        })
+
+    return {
+        "ledger_id": ledger_id,
+        "lines": len(lines),
+        "matched": len(matches),
+        "unmatched_lines": len(unmatched),
+        "matches": matches,
+        "unmatched": unmatched
+    }
@@ -0,0 +1,134 @@
+import csv
+import io
+from datetime import date, timedelta
+from typing import Any, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, case, select
+from sqlalchemy.orm import Session, aliased
+
+from app.modules.accounting.models import Ledger, Voucher, VoucherEntry, VoucherType
+from app.modules.reports.engine import ReportEngine
+from app.modules.accounting.period_close import latest_close_date, ledger_snapshot
+
+# Rows fetched per round-trip from the server-side cursor
+YIELD_PER = 1000
+
+def _contra_ledger_name():
+    """
+    Correlated subquery: the first 'other side' ledger of the entry's voucher.
+    Replaces the per-row e.voucher.entries lazy load.
+    """
+    other = aliased(VoucherEntry)
+    other_ledger = aliased(Ledger)
+    return select(func.min(other_ledger.name)).where(
+        other.voucher_id == VoucherEntry.voucher_id,
+        other.id != VoucherEntry.id,
+        other_ledger.id == other.ledger_id
+    ).correlate(VoucherEntry).scalar_subquery()
+
+def trial_balance_rows(db: Session, to_date: date) -> Tuple[List[str], Iterator[List[Any]]]:
+    headers = ["Particulars", "Type", "Debit", "Credit"]
+    tree = ReportEngine(db).build_trial_balance_tree(to_date)
+
+    def walk(nodes, depth):
+        for node in nodes:
+            bal = node["total_balance"]
+            if bal == 0 and not node["children"] and not node["ledgers"]:
+                continue
+            yield ["  " * depth + node["name"], "Group", bal if bal > 0 else None, -bal if bal < 0 else None]
+            for l in node["ledgers"]:
+                lb = l["closing_balance"]
+                yield ["  " * (depth + 1) + l["name"], "Ledger", lb if lb > 0 else None, -lb if lb < 0 else None]
+            yield from walk(node["children"], depth + 1)
+
+    return headers, walk(tree, 0)
+
+def day_book_rows(db: Session, from_date: date, to_date: date) -> Tuple[List[str], Iterator[List[Any]]]:
+    headers = ["Date", "Voucher No", "Voucher Type", "Ledger", "Debit", "Credit", "Narration"]
+    query = db.query(
+        Voucher.date,
+        Voucher.voucher_number,
+        VoucherType.name,
+        Ledger.name,
+        VoucherEntry.amount,
+        VoucherEntry.is_debit,
+        Voucher.narration
+    ).join(Voucher, VoucherEntry.voucher_id == Voucher.id).join(
+        VoucherType, Voucher.voucher_type_id == VoucherType.id
+    ).join(Ledger, VoucherEntry.ledger_id == Ledger.id).filter(
+        Voucher.date >= from_date,
+        Voucher.date <= to_date
+    ).order_by(Voucher.date, Voucher.id, VoucherEntry.id)
+
+    def rows():
+        for v_date, number, v_type, ledger, amount, is_debit, narration in query.yield_per(YIELD_PER):
+            yield [v_date, number, v_type, ledger, amount if is_debit else None, None if is_debit else amount, narration]
+
+    return headers, rows()
+
+def ledger_statement_rows(
+    db: Session, ledger_id: int, from_date: Optional[date], to_date: date
+) -> Tuple[List[str], Iterator[List[Any]]]:
+    ledger = db.query(Ledger).filter(Ledger.id == ledger_id).first()
+    if not ledger:
+        raise HTTPException(status_code=404, detail="Ledger not found")
+
+    headers = ["Date", "Particulars", "Voucher Type", "Voucher No", "Debit", "Credit", "Balance"]
+    signed = case((VoucherEntry.is_debit, VoucherEntry.amount), else_=-VoucherEntry.amount)
+
+    opening = (ledger.opening_balance or 0.0) * (1 if ledger.opening_balance_is_dr else -1)
+    if from_date:
+        prior = db.query(func.coalesce(func.sum(signed), 0.0)).join(Voucher).filter(
+            VoucherEntry.ledger_id == ledger_id,
+            Voucher.date < from_date
+        )
+        closed_upto = latest_close_date(db, from_date - timedelta(days=1))
+        if closed_upto:
+            opening = ledger_snapshot(db, closed_upto).get(ledger_id, opening)
+            prior = prior.filter(Voucher.date > closed_upto)
+        opening += prior.scalar() or 0.0
+
+    query = db.query(
+        Voucher.date,
+        _contra_ledger_name(),
+        VoucherType.name,
+        Voucher.voucher_number,
+        VoucherEntry.amount,
+        VoucherEntry.is_debit
+    ).join(Voucher, VoucherEntry.voucher_id == Voucher.id).join(
+        VoucherType, Voucher.voucher_type_id == VoucherType.id
+    ).filter(
+        VoucherEntry.ledger_id == ledger_id,
+        Voucher.date <= to_date
+    )
+    if from_date:
+        query = query.filter(Voucher.date >= from_date)
+    query = query.order_by(Voucher.date, Voucher.id, VoucherEntry.id)
+
+    def rows():
+        balance = opening
+        yield [from_date, "Opening Balance", None, None, None, None, balance]
+        for v_date, particulars, v_type, number, amount, is_debit in query.yield_per(YIELD_PER):
+            balance += amount if is_debit else -amount
+            yield [v_date, particulars or "", v_type, number, amount if is_debit else None, None if is_debit else amount, balance]
+
+    return headers, rows()
+
+def iter_csv(headers: List[str], rows: Iterator[List[Any]], flush_every: int = 500) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(headers)
+    yield buf.getvalue() # Header goes out before the first fetch completes
+    buf.seek(0)
+    buf.truncate()
+
+    count = 0
+    for row in rows:
+        writer.writerow(["" if v is None else v for v in row])
+        count += 1
+        if count % flush_every == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
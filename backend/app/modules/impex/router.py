@@ -1,17 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from datetime import date
+from typing import Optional
 import csv
 import io
-from app.core.db import get_db
+from app.core.db import get_db, SessionLocal
 from app.modules.accounting.models import Ledger, AccountGroup
+from app.modules.accounting.search import index_ledger
 from app.modules.auth.deps import get_current_user
 from app.modules.auth.models import User
+from app.modules.impex.export import trial_balance_rows, day_book_rows, ledger_statement_rows, iter_csv
+from app.modules.impex.xlsx import iter_xlsx
+from app.modules.reports.engine import fy_start_for
 
 router = APIRouter(
     prefix="/impex",
     tags=["Import/Export"]
 )
 
+export_router = APIRouter(
+    prefix="/export",
+    tags=["Import/Export"]
+)
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
 @router.post("/import-ledgers")
 async def import_ledgers(
     file: UploadFile = File(...),
@@ -30,6 +44,7 @@ async def import_ledgers(
     
     success_count = 0
     errors = []
+    imported = []
     
     row_num = 1
     for row in csv_reader:
@@ -68,6 +83,7 @@ async def import_ledgers(
                 address=row.get("Address")
             )
             db.add(ledger)
+            imported.append(ledger)
             success_count += 1
         except Exception as e:
             errors.append(f"Row {row_num}: {str(e)}")
@@ -77,9 +93,79 @@ async def import_ledgers(
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
+
+    for ledger in imported:
+        index_ledger(db, ledger)
         
     return {
         "status": "completed",
         "imported": success_count,
         "errors": errors
     }
+
+# --- Streaming Export ---
+
+def _export_source(report: str, from_date: Optional[date], to_date: Optional[date], ledger_id: Optional[int]):
+    to_date = to_date or date.today()
+    if report == "trial-balance":
+        return lambda db: trial_balance_rows(db, to_date)
+    if report == "day-book":
+        start = from_date or fy_start_for(to_date)
+        return lambda db: day_book_rows(db, start, to_date)
+    if report == "ledger-statement":
+        if not ledger_id:
+            raise HTTPException(status_code=400, detail="ledger_id is required for ledger-statement")
+        return lambda db: ledger_statement_rows(db, ledger_id, from_date, to_date)
+    raise HTTPException(status_code=404, detail=f"Unknown export '{report}'")
+
+def _stream_export(report: str, fmt: str, build) -> StreamingResponse:
+    # The response outlives the request scope, so the generator owns its own session.
+    db = SessionLocal()
+    try:
+        headers, rows = build(db)
+    except Exception:
+        db.close()
+        raise
+
+    def body():
+        try:
+            if fmt == "csv":
+                for chunk in iter_csv(headers, rows):
+                    yield chunk.encode("utf-8")
+            else:
+                yield from iter_xlsx(headers, rows, sheet_name=report)
+        finally:
+            db.close()
+
+    media_type = "text/csv" if fmt == "csv" else XLSX_MEDIA_TYPE
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{report}.{fmt}"'}
+    )
+
+@export_router.get("/{report}.csv")
+def export_csv(
+    report: str,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    ledger_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Streams trial-balance / day-book / ledger-statement as CSV.
+    """
+    return _stream_export(report, "csv", _export_source(report, from_date, to_date, ledger_id))
+
+@export_router.get("/{report}.xlsx")
+def export_xlsx(
+    report: str,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    ledger_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Streams trial-balance / day-book / ledger-statement as an Excel workbook.
+    """
+    return _stream_export(report, "xlsx", _export_source(report, from_date, to_date, ledger_id))
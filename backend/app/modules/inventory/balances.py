@@ -0,0 +1,166 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import case, delete, event, func, insert, inspect, or_, update
+from sqlalchemy.orm import Session
+
+from app.modules.accounting.models import VoucherEntry
+from app.modules.inventory.models import StockItem, StockItemBalance
+from app.modules.inventory.units import ENTRY_BASE_QTY
+
+# --- Incremental Maintenance ---
+# Every flush turns its new / changed / deleted entries and item openings into per-item
+# quantity deltas and applies them to stock_item_balances in the same transaction.
+# Bulk query(...).update() / .delete() on voucher_entries bypass this; rebuild_stock_balances
+# recomputes the table from scratch if that ever happens.
+
+def _signed(item_id, qty, is_debit) -> float:
+    if not item_id or not qty:
+        return 0.0
+    return qty if is_debit else -qty
+
+def _entry_qty(obj, committed: bool = False) -> float:
+    # Stock-unit quantity; lines without base_quantity were entered in the stock unit
+    if committed:
+        base = _committed(obj, "base_quantity")
+        return base if base is not None else _committed(obj, "quantity")
+    return obj.base_quantity if obj.base_quantity is not None else obj.quantity
+
+def _committed(obj, attr: str):
+    # Value as loaded from the database, before this flush's changes
+    hist = inspect(obj).attrs[attr].history
+    if hist.deleted:
+        return hist.deleted[0]
+    if hist.unchanged:
+        return hist.unchanged[0]
+    return getattr(obj, attr)
+
+def _changed(obj, *attrs) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+def _add(deltas: Dict[int, float], item_id, amount: float):
+    if item_id and amount:
+        deltas[item_id] = deltas.get(item_id, 0.0) + amount
+
+@event.listens_for(Session, "before_flush")
+def _collect_stock_changes(session, flush_context, instances):
+    # Old values of changed / deleted rows are read here, while those rows still exist.
+    deltas = {}
+    removed = []
+    for obj in session.deleted:
+        if isinstance(obj, VoucherEntry):
+            item_id = _committed(obj, "stock_item_id")
+            _add(deltas, item_id, -_signed(item_id, _entry_qty(obj, True), _committed(obj, "is_debit")))
+        elif isinstance(obj, StockItem):
+            removed.append(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, VoucherEntry) and _changed(obj, "stock_item_id", "quantity", "base_quantity", "is_debit"):
+            old_item = _committed(obj, "stock_item_id")
+            _add(deltas, old_item, -_signed(old_item, _entry_qty(obj, True), _committed(obj, "is_debit")))
+            _add(deltas, obj.stock_item_id, _signed(obj.stock_item_id, _entry_qty(obj), obj.is_debit))
+        elif isinstance(obj, StockItem) and _changed(obj, "opening_qty"):
+            _add(deltas, obj.id, (obj.opening_qty or 0.0) - (_committed(obj, "opening_qty") or 0.0))
+    session.info["stock_balance_changes"] = (deltas, removed)
+
+@event.listens_for(Session, "after_flush")
+def _apply_stock_changes(session, flush_context):
+    # New rows are handled here, once they have ids and foreign keys.
+    deltas, removed = session.info.pop("stock_balance_changes", ({}, []))
+    created = []
+    for obj in session.new:
+        if isinstance(obj, StockItem):
+            created.append(obj.id)
+            _add(deltas, obj.id, obj.opening_qty or 0.0)
+        elif isinstance(obj, VoucherEntry):
+            _add(deltas, obj.stock_item_id, _signed(obj.stock_item_id, _entry_qty(obj), obj.is_debit))
+
+    if not (deltas or created or removed):
+        return
+    conn = session.connection()
+    table = StockItemBalance.__table__
+    if removed:
+        conn.execute(delete(table).where(table.c.stock_item_id.in_(removed)))
+    for item_id in created:
+        conn.execute(insert(table).values(stock_item_id=item_id, quantity=deltas.pop(item_id, 0.0)))
+    for item_id, delta in deltas.items():
+        if item_id in removed or not delta:
+            continue
+        res = conn.execute(
+            update(table).where(table.c.stock_item_id == item_id).values(quantity=table.c.quantity + delta)
+        )
+        if res.rowcount == 0:
+            # Item predates the table: seed its row from the full history
+            conn.execute(insert(table).values(stock_item_id=item_id, quantity=_full_quantity(session, item_id)))
+
+# Keep the pre-change value of these on assignment even when the instance was expired by a
+# commit, so the flush can subtract what the row used to contribute.
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+for _attr in (
+    VoucherEntry.stock_item_id, VoucherEntry.quantity, VoucherEntry.base_quantity, VoucherEntry.is_debit,
+    StockItem.opening_qty
+):
+    event.listen(_attr, "set", _keep_old_value, active_history=True, retval=True)
+
+def _signed_qty():
+    return func.coalesce(func.sum(
+        case((VoucherEntry.is_debit, ENTRY_BASE_QTY), else_=-ENTRY_BASE_QTY)
+    ), 0.0)
+
+def _full_quantity(session, item_id: int) -> float:
+    # Runs after this flush's rows were written, so they are already included
+    with session.no_autoflush:
+        opening = session.query(StockItem.opening_qty).filter(StockItem.id == item_id).scalar() or 0.0
+        moved = session.query(_signed_qty()).filter(VoucherEntry.stock_item_id == item_id).scalar()
+    return opening + (moved or 0.0)
+
+def rebuild_stock_balances(db: Session) -> int:
+    """
+    Recomputes every item's quantity with one grouped query. Returns the number of items.
+    """
+    moved = dict(db.query(VoucherEntry.stock_item_id, _signed_qty()).filter(
+        VoucherEntry.stock_item_id != None
+    ).group_by(VoucherEntry.stock_item_id).all())
+    rows = [
+        {"stock_item_id": item_id, "quantity": (opening or 0.0) + moved.get(item_id, 0.0)}
+        for item_id, opening in db.query(StockItem.id, StockItem.opening_qty).all()
+    ]
+    conn = db.connection()
+    conn.execute(delete(StockItemBalance.__table__))
+    if rows:
+        conn.execute(insert(StockItemBalance.__table__), rows)
+    db.commit()
+    return len(rows)
+
+def ensure_stock_balances(db: Session):
+    """
+    Startup hook: fills the table the first time it exists alongside older data.
+    """
+    if db.query(StockItem.id).first() and not db.query(StockItemBalance.stock_item_id).first():
+        rebuild_stock_balances(db)
+
+# --- Alerts ---
+
+def stock_alerts(db: Session, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Items below zero or below their reorder level, most negative first.
+    """
+    rows = db.query(
+        StockItem.id, StockItem.name, StockItem.reorder_level, StockItemBalance.quantity
+    ).join(StockItemBalance, StockItemBalance.stock_item_id == StockItem.id).filter(
+        or_(
+            StockItemBalance.quantity < 0,
+            (StockItem.reorder_level != None) & (StockItemBalance.quantity < StockItem.reorder_level)
+        )
+    ).order_by(StockItemBalance.quantity, StockItem.name).limit(limit).all()
+    return [
+        {
+            "stock_item_id": r.id,
+            "name": r.name,
+            "quantity": r.quantity,
+            "reorder_level": r.reorder_level,
+            "kind": "negative" if r.quantity < 0 else "reorder"
+        }
+        for r in rows
+    ]
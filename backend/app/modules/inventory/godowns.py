@@ -0,0 +1,136 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.modules.accounting.models import Voucher, VoucherEntry
+from app.modules.inventory.models import Godown, StockItem
+from app.modules.inventory.units import ENTRY_BASE_QTY
+
+# Lines without a godown, and item openings, sit here
+MAIN_LOCATION = "Main Location"
+
+class GodownTree:
+    """
+    All godowns loaded once, with every godown's ancestor chain (itself first) precomputed,
+    so rolling a quantity up the tree is a walk over a short list instead of lazy parent loads.
+    """
+    def __init__(self, db: Session):
+        rows = db.query(Godown.id, Godown.name, Godown.parent_id).all()
+        self.names = {r.id: r.name for r in rows}
+        self.parents = {r.id: r.parent_id for r in rows}
+        self.children = {}
+        for r in sorted(rows, key=lambda r: r.name):
+            self.children.setdefault(r.parent_id, []).append(r.id)
+        self.ancestry = {}
+        for g_id in self.names:
+            self._chain(g_id)
+
+    def _chain(self, godown_id: int) -> List[int]:
+        cached = self.ancestry.get(godown_id)
+        if cached is not None:
+            return cached
+        chain = []
+        g_id = godown_id
+        # Stops at the root, at an already known chain, or on a (corrupt) cycle
+        while g_id in self.names and g_id not in chain:
+            if g_id in self.ancestry:
+                chain.extend(self.ancestry[g_id])
+                break
+            chain.append(g_id)
+            g_id = self.parents.get(g_id)
+        self.ancestry[godown_id] = chain
+        return chain
+
+    def ordered(self, root: Optional[int] = None) -> List[tuple]:
+        """
+        (godown_id, depth) pairs, parents before children, siblings by name.
+        """
+        out = []
+        stack = [(root, 0)] if root is not None else [(g, 0) for g in reversed(self.children.get(None, []))]
+        while stack:
+            g_id, depth = stack.pop()
+            out.append((g_id, depth))
+            stack.extend((c, depth + 1) for c in reversed(self.children.get(g_id, [])))
+        return out
+
+def get_godown_stock(
+    db: Session,
+    as_of: Optional[date] = None,
+    stock_item_id: Optional[int] = None,
+    godown_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Location-wise closing quantities.
+    One query groups every stock movement by (godown, item); each godown then adds its own
+    quantities to every ancestor, so a parent's `total_quantity` covers its whole subtree.
+    Stock Transfers are included here (they are what moves stock between godowns).
+    """
+    signed_qty = case((VoucherEntry.is_debit, ENTRY_BASE_QTY), else_=-ENTRY_BASE_QTY)
+    query = db.query(
+        VoucherEntry.godown_id,
+        VoucherEntry.stock_item_id,
+        func.sum(signed_qty).label("qty")
+    ).join(Voucher, VoucherEntry.voucher_id == Voucher.id).filter(VoucherEntry.stock_item_id != None)
+    if as_of:
+        query = query.filter(Voucher.date <= as_of)
+    if stock_item_id is not None:
+        query = query.filter(VoucherEntry.stock_item_id == stock_item_id)
+    rows = query.group_by(VoucherEntry.godown_id, VoucherEntry.stock_item_id).all()
+
+    own = {} # godown_id -> {item_id: qty}
+    for g_id, item_id, qty in rows:
+        bucket = own.setdefault(g_id, {})
+        bucket[item_id] = bucket.get(item_id, 0.0) + (qty or 0.0)
+
+    openings = db.query(StockItem.id, StockItem.opening_qty).filter(StockItem.opening_qty != 0)
+    if stock_item_id is not None:
+        openings = openings.filter(StockItem.id == stock_item_id)
+    for item_id, qty in openings.all():
+        bucket = own.setdefault(None, {})
+        bucket[item_id] = bucket.get(item_id, 0.0) + qty
+
+    tree = GodownTree(db)
+    total = {}
+    for g_id, items in own.items():
+        for anc in (tree.ancestry.get(g_id) or [g_id]):
+            bucket = total.setdefault(anc, {})
+            for item_id, qty in items.items():
+                bucket[item_id] = bucket.get(item_id, 0.0) + qty
+
+    item_ids = {item_id for items in own.values() for item_id in items}
+    item_names = dict(db.query(StockItem.id, StockItem.name).filter(StockItem.id.in_(item_ids)).all()) if item_ids else {}
+
+    def node(g_id, depth):
+        own_items = own.get(g_id, {})
+        total_items = total.get(g_id, {})
+        items = [
+            {
+                "stock_item_id": item_id,
+                "name": item_names.get(item_id),
+                "quantity": own_items.get(item_id, 0.0),
+                "total_quantity": qty
+            }
+            for item_id, qty in total_items.items() if qty or own_items.get(item_id)
+        ]
+        items.sort(key=lambda i: i["name"] or "")
+        return {
+            "godown_id": g_id,
+            "name": tree.names.get(g_id, MAIN_LOCATION),
+            "parent_id": tree.parents.get(g_id),
+            "depth": depth,
+            "quantity": sum(own_items.values()),
+            "total_quantity": sum(total_items.values()),
+            "items": items
+        }
+
+    godowns = [node(g_id, depth) for g_id, depth in tree.ordered(godown_id)]
+    if godown_id is None and None in own:
+        godowns.insert(0, node(None, 0))
+
+    return {
+        "as_of": as_of,
+        "stock_item_id": stock_item_id,
+        "godowns": godowns
+    }
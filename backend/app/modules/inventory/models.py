@@ -39,6 +39,10 @@ class StockGroup(Base):
     hsn_code = Column(String, nullable=True)
     gst_rate = Column(Float, default=0.0) 
     taxability = Column(String, default="Taxable")
+    effective_gst_rate = Column(Float, default=0.0) # Own gst_rate or the nearest ancestor's
+
+    # Valuation (Inheritable): Weighted Average, FIFO, LIFO, Standard Cost
+    valuation_method = Column(String, nullable=True)
 
 class StockItem(Base):
     __tablename__ = "stock_items"
@@ -57,20 +61,25 @@ class StockItem(Base):
     hsn_code = Column(String, nullable=True)
     gst_rate = Column(Float, default=0.0) # Percentage (e.g. 18.0)
     taxability = Column(String, default="Taxable") # Taxable, Exempt, Nil Rated
+    # gst_rate if set, else the nearest stock group rate; kept current by app.modules.tax.rates
+    effective_gst_rate = Column(Float, default=0.0)
+
+    # Valuation - None inherits from the stock group chain (Weighted Average at the top)
+    valuation_method = Column(String, nullable=True)
+    standard_cost = Column(Float, default=0.0) # Rate used by "Standard Cost"
+
+    # Alerts: warn on the dashboard when current quantity drops below this
+    reorder_level = Column(Float, nullable=True)
     
     group = relationship("StockGroup", back_populates="items")
     unit = relationship("Unit")
 
-    @property
-    def effective_gst_rate(self):
-        if self.gst_rate and self.gst_rate > 0:
-            return self.gst_rate
-        
-        # Traverse Group Hierarchy
-        grp = self.group
-        while grp:
-            if grp.gst_rate and grp.gst_rate > 0:
-                return grp.gst_rate
-            grp = grp.parent
-            
-        return 0.0 # Default fallback
+class StockItemBalance(Base):
+    """
+    Current quantity per item (opening + all movements), kept up to date on every flush
+    by app.modules.inventory.balances, so stock alerts are an indexed lookup.
+    """
+    __tablename__ = "stock_item_balances"
+
+    stock_item_id = Column(Integer, ForeignKey("stock_items.id"), primary_key=True)
+    quantity = Column(Float, nullable=False, default=0.0, index=True)
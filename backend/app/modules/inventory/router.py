@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import json
+import zlib
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 from datetime import date
 
 from app.core.db import get_db
 from app.modules.inventory.models import Unit, StockGroup, StockItem
-from app.modules.inventory.valuation import calculate_weighted_average
+from app.modules.inventory.valuation import calculate_item_valuation, item_movements
+from app.modules.inventory.search import ensure_item_index, index_item, item_index
+from app.modules.accounting.period_close import PeriodLockedError
+
+ValuationMethod = Literal["Weighted Average", "FIFO", "LIFO", "Standard Cost"]
 
 router = APIRouter()
 
@@ -29,16 +36,17 @@ class UnitCreate(BaseModel):
     base_unit_id: Optional[int] = None
     conversion_factor: float = 1.0
 
-class StockGroupSchema(BaseModel):
-    id: int
-    name: str
-    parent_id: Optional[int]
-    class Config:
-        from_attributes = True
-
 class StockGroupCreate(BaseModel):
     name: str
     parent_id: Optional[int] = None
+    hsn_code: Optional[str] = None
+    gst_rate: float = 0.0
+    valuation_method: Optional[ValuationMethod] = None # None inherits from parent
+
+class StockGroupSchema(StockGroupCreate):
+    id: int
+    class Config:
+        from_attributes = True
 
 class StockItemCreate(BaseModel):
     name: str
@@ -53,11 +61,25 @@ class StockItemCreate(BaseModel):
     gst_rate: float = 0.0
     taxability: str = "Taxable"
 
+    # Valuation
+    valuation_method: Optional[ValuationMethod] = None # None inherits from group
+    standard_cost: float = 0.0
+    reorder_level: Optional[float] = None
+
 class StockItemSchema(StockItemCreate):
     id: int
     effective_gst_rate: float
     class Config:
         from_attributes = True
+
+class StockItemListItem(BaseModel):
+    id: int
+    name: str
+    group_id: Optional[int] = None
+    unit_id: Optional[int] = None
+    hsn_code: Optional[str] = None
+    gst_rate: Optional[float] = None
+    taxability: Optional[str] = None
         
 class StockValuationResponse(BaseModel):
     stock_item_id: int
@@ -65,9 +87,40 @@ class StockValuationResponse(BaseModel):
     closing_quantity: float
     closing_rate: float
     closing_value: float
+    valuation_method: str
     as_of_date: Optional[date] = None
 
-# ... (Previous Endpoints)
+@router.get("/items", response_model=List[StockItemListItem])
+def list_stock_items(
+    response: Response,
+    q: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """
+    Stock Items by name, or type-ahead matches for `q`, most used first.
+    The total number of matches is in the X-Total-Count header.
+    """
+    total, page = ensure_item_index(db).search(q, offset, limit)
+    response.headers["X-Total-Count"] = str(total)
+    return page
+
+@router.post("/items", response_model=StockItemSchema)
+def create_stock_item(item_in: StockItemCreate, db: Session = Depends(get_db)):
+    existing = db.query(StockItem).filter(StockItem.name == item_in.name).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="Stock Item name already exists")
+
+    if item_in.opening_value == 0 and item_in.opening_qty > 0 and item_in.opening_rate > 0:
+        item_in.opening_value = item_in.opening_qty * item_in.opening_rate
+
+    item = StockItem(**item_in.dict())
+    db.add(item)
+    db.commit()
+    db.refresh(item)
+    index_item(item)
+    return item
 
 @router.put("/items/{id}", response_model=StockItemSchema)
 def update_stock_item(id: int, item_in: StockItemCreate, db: Session = Depends(get_db)):
@@ -96,9 +149,19 @@ def update_stock_item(id: int, item_in: StockItemCreate, db: Session = Depends(g
     db_item.hsn_code = item_in.hsn_code
     db_item.gst_rate = item_in.gst_rate
     db_item.taxability = item_in.taxability
+
+    # Valuation
+    db_item.valuation_method = item_in.valuation_method
+    db_item.standard_cost = item_in.standard_cost
+    db_item.reorder_level = item_in.reorder_level
     
-    db.commit()
+    try:
+        db.commit()
+    except PeriodLockedError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     db.refresh(db_item)
+    index_item(db_item)
     return db_item
 
 @router.delete("/items/{id}", response_model=dict)
@@ -114,28 +177,121 @@ def delete_stock_item(id: int, db: Session = Depends(get_db)):
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Cannot delete Stock Item. Likely used in Vouchers.")
+    item_index.remove(id)
         
     return {"status": "deleted", "id": id}
 
 @router.get("/items/{id}/valuation", response_model=StockValuationResponse)
-def get_item_valuation(id: int, date: Optional[date] = None, db: Session = Depends(get_db)):
+def get_item_valuation(
+    id: int,
+    date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    method: Optional[ValuationMethod] = None
+):
     """
-    Returns the Weighted Average Valuation for a Stock Item as of a specific date.
+    Returns the Valuation for a Stock Item as of a specific date, by its configured method
+    (item, else nearest stock group, else Weighted Average) unless `method` overrides it.
     """
     stock_item = db.query(StockItem).filter(StockItem.id == id).first()
     if not stock_item:
         raise HTTPException(status_code=404, detail="Stock Item not found")
 
-    res = calculate_weighted_average(db, id, date)
+    res = calculate_item_valuation(db, id, date, method)
     return StockValuationResponse(
         stock_item_id=id,
         stock_item_name=stock_item.name,
-        closing_qty=res.closing_qty,
+        closing_quantity=res.closing_qty,
         closing_rate=res.closing_rate,
         closing_value=res.closing_value,
+        valuation_method=res.method,
         as_of_date=date
     )
 
+# Cursor = last row's key + the running valuation state after it, so the next page
+# starts where this one ended instead of replaying everything before it.
+# Opaque to clients: compressed JSON, URL-safe base64 (FIFO layers can be long).
+
+def _encode_cursor(key, state) -> Optional[str]:
+    if not key:
+        return None
+    d, voucher_id, entry_id = key
+    payload = json.dumps({"k": [d.isoformat(), voucher_id, entry_id], "s": state}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(zlib.compress(payload.encode("utf-8"))).decode("ascii")
+
+def _decode_cursor(cursor: str):
+    try:
+        payload = json.loads(zlib.decompress(base64.urlsafe_b64decode(cursor.encode("ascii"))))
+        d, voucher_id, entry_id = payload["k"]
+        state = payload["s"]
+        if not isinstance(state, dict) or len(state["state"]) != 3:
+            raise ValueError("bad state")
+        return (date.fromisoformat(d), int(voucher_id), int(entry_id)), state
+    except (ValueError, TypeError, KeyError, zlib.error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/items/{id}/movements", response_model=dict)
+def get_item_movements(
+    id: int,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    method: Optional[ValuationMethod] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Stock ledger for an item: every inward / outward with running qty, value and rate.
+    Pass the returned `next_cursor` to get the following page.
+    """
+    after, resume = _decode_cursor(cursor) if cursor else (None, None)
+    if resume and method and resume["method"] != method:
+        raise HTTPException(status_code=400, detail="Cursor belongs to a different valuation method")
+    res = item_movements(db, id, from_date, to_date, after, limit, method, resume)
+    if res is None:
+        raise HTTPException(status_code=404, detail="Stock Item not found")
+    res["next_cursor"] = _encode_cursor(res.pop("next_key"), res.pop("next_state"))
+    return res
+
+# --- Stock Group Endpoints ---
+
+@router.get("/groups", response_model=List[StockGroupSchema])
+def read_stock_groups(db: Session = Depends(get_db)):
+    return db.query(StockGroup).order_by(StockGroup.name).all()
+
+@router.post("/groups", response_model=StockGroupSchema)
+def create_stock_group(group_in: StockGroupCreate, db: Session = Depends(get_db)):
+    existing = db.query(StockGroup).filter(StockGroup.name == group_in.name).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="Stock Group name already exists")
+
+    group = StockGroup(**group_in.dict())
+    db.add(group)
+    db.commit()
+    db.refresh(group)
+    return group
+
+@router.put("/groups/{id}", response_model=StockGroupSchema)
+def update_stock_group(id: int, group_in: StockGroupCreate, db: Session = Depends(get_db)):
+    group = db.query(StockGroup).filter(StockGroup.id == id).first()
+    if not group:
+        raise HTTPException(status_code=404, detail="Stock Group not found")
+    if group_in.name != group.name and db.query(StockGroup).filter(StockGroup.name == group_in.name).first():
+        raise HTTPException(status_code=400, detail="Stock Group name already in use")
+    # The new parent may not be the group itself or anything under it
+    parents = dict(db.query(StockGroup.id, StockGroup.parent_id).all())
+    g_id, seen = group_in.parent_id, set()
+    while g_id is not None and g_id not in seen:
+        if g_id == id:
+            raise HTTPException(status_code=400, detail="Stock Group cannot be placed under itself or its own sub-group")
+        seen.add(g_id)
+        g_id = parents.get(g_id)
+
+    for field, value in group_in.dict().items():
+        setattr(group, field, value)
+    db.commit()
+    db.refresh(group)
+    return group
+
 # --- Unit Endpoints ---
 
 @router.post("/units/", response_model=UnitSchema)
@@ -192,3 +348,21 @@ def create_godown(godown_in: GodownCreate, db: Session = Depends(get_db)):
 def read_godowns(db: Session = Depends(get_db)):
     from app.modules.inventory.models import Godown
     return db.query(Godown).all()
+
+@router.get("/godowns/stock", response_model=dict)
+def read_godown_stock(
+    as_of: Optional[date] = None,
+    stock_item_id: Optional[int] = None,
+    godown_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Location-wise stock: each godown's own quantities and totals rolled up its sub-godowns.
+    `godown_id` limits the tree to that godown and everything under it.
+    """
+    from app.modules.inventory.models import Godown
+    from app.modules.inventory.godowns import get_godown_stock
+
+    if godown_id is not None and not db.query(Godown).filter(Godown.id == godown_id).first():
+        raise HTTPException(status_code=404, detail="Godown not found")
+    return get_godown_stock(db, as_of, stock_item_id, godown_id)
@@ -0,0 +1,37 @@
+from typing import Any, Dict
+
+from sqlalchemy.orm import Session
+
+from app.core.search import PrefixIndex
+from app.modules.accounting.models import VoucherEntry
+from app.modules.accounting.search import recent_usage
+from app.modules.inventory.models import StockItem
+
+# Process-wide stock item type-ahead index; loaded at startup (or on first search)
+item_index = PrefixIndex()
+
+def item_payload(item: StockItem) -> Dict[str, Any]:
+    return {
+        "id": item.id,
+        "name": item.name,
+        "group_id": item.group_id,
+        "unit_id": item.unit_id,
+        "hsn_code": item.hsn_code,
+        "gst_rate": item.gst_rate,
+        "taxability": item.taxability
+    }
+
+def load_item_index(db: Session):
+    item_index.load(
+        ((item.id, item.name, item_payload(item)) for item in db.query(StockItem).all()),
+        recent_usage(db, VoucherEntry.stock_item_id)
+    )
+
+def ensure_item_index(db: Session) -> PrefixIndex:
+    if not item_index.loaded:
+        load_item_index(db)
+    return item_index
+
+def index_item(item: StockItem):
+    if item_index.loaded:
+        item_index.put(item.id, item.name, item_payload(item))
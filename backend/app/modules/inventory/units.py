@@ -0,0 +1,70 @@
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.modules.accounting.models import VoucherEntry
+from app.modules.accounting.versioning import UNITS_SCOPE, get_data_version
+from app.modules.inventory.models import Unit
+
+# Quantity of a line in its item's stock unit. Lines written before base_quantity existed
+# (or without a unit) were entered in the stock unit already.
+ENTRY_BASE_QTY = func.coalesce(VoucherEntry.base_quantity, VoucherEntry.quantity)
+
+Converter = Callable[[float, Optional[int], Optional[int]], float]
+
+def _root_factors(rows) -> Dict[int, Tuple[int, float]]:
+    """
+    {unit_id: (root unit id, how many root units one of it is)}.
+    1 Carton = 12 Box, 1 Box = 10 Nos  ->  Carton: (Nos, 120), Box: (Nos, 10), Nos: (Nos, 1).
+    """
+    base = {r.id: (r.base_unit_id, r.conversion_factor or 1.0) for r in rows}
+    roots = {}
+
+    def resolve(unit_id: int, seen=()) -> Tuple[int, float]:
+        if unit_id in roots:
+            return roots[unit_id]
+        parent, factor = base[unit_id]
+        if parent is None or parent not in base or parent in seen:
+            roots[unit_id] = (unit_id, 1.0)
+        else:
+            root, parent_factor = resolve(parent, seen + (unit_id,))
+            roots[unit_id] = (root, factor * parent_factor)
+        return roots[unit_id]
+
+    for unit_id in base:
+        resolve(unit_id)
+    return roots
+
+def build_converter(db: Session) -> Converter:
+    roots = _root_factors(db.query(Unit.id, Unit.base_unit_id, Unit.conversion_factor).all())
+
+    def convert(qty: float, from_unit: Optional[int], to_unit: Optional[int]) -> float:
+        """
+        qty in from_unit expressed in to_unit. Raises ValueError across unrelated units.
+        """
+        if from_unit is None or to_unit is None or from_unit == to_unit or not qty:
+            return qty
+        from_root, from_factor = roots.get(from_unit, (from_unit, 1.0))
+        to_root, to_factor = roots.get(to_unit, (to_unit, 1.0))
+        if from_root != to_root:
+            raise ValueError(f"Unit {from_unit} cannot be converted to unit {to_unit}")
+        return qty * from_factor / to_factor
+
+    return convert
+
+# One converter per (database, units version): a unit edit rebuilds it, voucher saves do not.
+_cache_lock = threading.Lock()
+_cached: Tuple[Optional[tuple], Optional[Converter]] = (None, None)
+
+def unit_converter(db: Session) -> Converter:
+    global _cached
+    key = (id(db.get_bind()), get_data_version(db, UNITS_SCOPE))
+    cached_key, convert = _cached
+    if convert is not None and cached_key == key:
+        return convert
+    convert = build_converter(db)
+    with _cache_lock:
+        _cached = (key, convert)
+    return convert
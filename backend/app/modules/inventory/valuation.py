@@ -1,16 +1,343 @@
+from collections import deque
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import date
-from typing import Optional, Dict
+from sqlalchemy import and_, or_
+from datetime import date, timedelta
+from typing import Any, Optional, Dict, List, Tuple
 
-from app.modules.inventory.models import StockItem
-from app.modules.accounting.models import VoucherEntry, Voucher
+from app.modules.inventory.models import StockItem, StockGroup
+from app.modules.inventory.units import ENTRY_BASE_QTY
+from app.modules.accounting.models import VoucherEntry, Voucher, VoucherType, VoucherTypeNature
+from app.modules.accounting.period_close import latest_close_date, stock_snapshot
+
+# --- Valuation Methods ---
+# Each method is a running state fed one item's movements in date order:
+# inward(qty, amount) adds stock at cost, outward(qty) removes it and returns its cost.
+# All of them expose qty / value / rate, so report code never cares which one it holds.
+
+WEIGHTED_AVERAGE = "Weighted Average"
+FIFO_METHOD = "FIFO"
+LIFO_METHOD = "LIFO"
+STANDARD_COST = "Standard Cost"
+
+DEFAULT_METHOD = WEIGHTED_AVERAGE
+
+# Layer residue below this is treated as consumed (float quantities)
+_EPS = 1e-9
+
+class WeightedAverage:
+    method = WEIGHTED_AVERAGE
+
+    def __init__(self, qty: float = 0.0, value: float = 0.0, rate: float = 0.0, standard_cost: float = 0.0):
+        self.qty = qty
+        self.value = value
+        self.rate = rate
+
+    def inward(self, qty: float, amount: float):
+        self.value += amount
+        self.qty += qty
+        if self.qty != 0:
+            self.rate = self.value / self.qty
+
+    def outward(self, qty: float) -> float:
+        # Issues go out at the running average; the voucher rate is the selling price, not cost.
+        cost = qty * self.rate
+        self.value -= cost
+        self.qty -= qty
+        return cost
+
+    def state(self) -> Tuple[float, float, float]:
+        return (self.qty, self.value, self.rate)
+
+    def layer_state(self) -> Optional[Dict[str, Any]]:
+        # What qty / value / rate alone cannot restore; nothing for an average
+        return None
+
+    def restore_layers(self, saved: Dict[str, Any]):
+        pass
+
+class FIFO(WeightedAverage):
+    """
+    Cost layers [qty, rate] in a deque, oldest on the left.
+    Every layer is pushed once and popped once, so a movement stream costs O(movements)
+    however many layers a bulk item builds up. Inwards at the newest layer's rate are merged.
+    Issues beyond the available layers (negative stock) are costed at the last rate and
+    netted against the next inward.
+    """
+    method = FIFO_METHOD
+
+    def __init__(self, qty: float = 0.0, value: float = 0.0, rate: float = 0.0, standard_cost: float = 0.0):
+        super().__init__(qty, value, rate)
+        self.layers = deque()
+        self.short = 0.0
+        # An opening becomes one layer at its average; snapshots then restore their saved layers.
+        if qty > _EPS:
+            self.rate = value / qty
+            self.layers.append([qty, self.rate])
+        elif qty < -_EPS:
+            self.short = -qty
+
+    def _next_layer(self) -> List[float]:
+        return self.layers[0]
+
+    def _drop_layer(self):
+        self.layers.popleft()
+
+    def inward(self, qty: float, amount: float):
+        self.qty += qty
+        self.value += amount
+        if qty <= _EPS:
+            # Value-only adjustment (e.g. landed cost): goes onto the newest layer
+            if self.layers and amount:
+                newest = self.layers[-1]
+                newest[1] += amount / newest[0]
+            return
+
+        rate = amount / qty
+        self.rate = rate
+        if self.short > _EPS:
+            covered = min(self.short, qty)
+            self.short -= covered
+            qty -= covered
+            if self.short <= _EPS:
+                self.short = 0.0
+                # Back to non-negative stock: value is exactly what the remaining layer holds
+                self.value = qty * rate
+            if qty <= _EPS:
+                return
+
+        if self.layers and abs(self.layers[-1][1] - rate) < _EPS:
+            self.layers[-1][0] += qty
+        else:
+            self.layers.append([qty, rate])
+
+    def outward(self, qty: float) -> float:
+        self.qty -= qty
+        cost = 0.0
+        while qty > _EPS and self.layers:
+            layer = self._next_layer()
+            used = min(qty, layer[0])
+            cost += used * layer[1]
+            layer[0] -= used
+            qty -= used
+            if layer[0] <= _EPS:
+                self._drop_layer()
+        if qty > _EPS:
+            cost += qty * self.rate
+            self.short += qty
+        self.value -= cost
+        return cost
+
+    def state(self) -> Tuple[float, float, float]:
+        rate = (self.value / self.qty) if self.qty > _EPS else self.rate
+        return (self.qty, self.value, rate)
+
+    def layer_state(self) -> Optional[Dict[str, Any]]:
+        return {"layers": [list(layer) for layer in self.layers], "short": self.short, "rate": self.rate}
+
+    def restore_layers(self, saved: Dict[str, Any]):
+        self.layers = deque([list(layer) for layer in saved.get("layers") or []])
+        self.short = saved.get("short") or 0.0
+        self.rate = saved.get("rate", self.rate)
+
+class LIFO(FIFO):
+    """
+    Same layers as FIFO, consumed from the newest end.
+    """
+    method = LIFO_METHOD
+
+    def _next_layer(self) -> List[float]:
+        return self.layers[-1]
+
+    def _drop_layer(self):
+        self.layers.pop()
+
+class StandardCost(WeightedAverage):
+    """
+    Stock carried at the item's standard cost; purchase price variance stays in the P&L.
+    Falls back to the opening rate while no standard cost is set.
+    """
+    method = STANDARD_COST
+
+    def __init__(self, qty: float = 0.0, value: float = 0.0, rate: float = 0.0, standard_cost: float = 0.0):
+        super().__init__(qty, value, rate)
+        self.rate = standard_cost or rate
+        self.value = qty * self.rate
+
+    def inward(self, qty: float, amount: float):
+        self.qty += qty
+        self.value = self.qty * self.rate
+
+    def outward(self, qty: float) -> float:
+        self.qty -= qty
+        self.value = self.qty * self.rate
+        return qty * self.rate
+
+VALUATION_METHODS = {
+    WEIGHTED_AVERAGE: WeightedAverage,
+    FIFO_METHOD: FIFO,
+    LIFO_METHOD: LIFO,
+    STANDARD_COST: StandardCost,
+}
+
+def make_valuer(
+    method: Optional[str], state: List[float], standard_cost: float = 0.0, layers: Optional[Dict[str, Any]] = None
+):
+    qty, value, rate = state
+    valuer = VALUATION_METHODS.get(method or DEFAULT_METHOD, WeightedAverage)(qty, value, rate, standard_cost)
+    if layers:
+        valuer.restore_layers(layers)
+    return valuer
+
+def valuer_state(valuer) -> Dict[str, Any]:
+    """
+    JSON-able running state (method, qty / value / rate, layers) that make_valuer resumes from.
+    """
+    return {"method": valuer.method, "state": list(valuer.state()), "layers": valuer.layer_state()}
+
+def item_valuation_settings(db: Session, item_id: Optional[int] = None) -> Dict[int, Tuple[str, float]]:
+    """
+    {item_id: (method, standard_cost)}.
+    An item without its own method takes the nearest one up its stock group chain.
+    """
+    groups = {g.id: (g.parent_id, g.valuation_method) for g in db.query(
+        StockGroup.id, StockGroup.parent_id, StockGroup.valuation_method
+    ).all()}
+    resolved = {}
+
+    def group_method(group_id: Optional[int]) -> str:
+        if group_id in resolved:
+            return resolved[group_id]
+        chain = []
+        method = None
+        g_id = group_id
+        # Stops at the root, at an already resolved group, or on a (corrupt) cycle
+        while g_id and g_id in groups and g_id not in resolved and g_id not in chain:
+            chain.append(g_id)
+            parent_id, method = groups[g_id]
+            if method:
+                break
+            g_id = parent_id
+        if not method:
+            method = resolved.get(g_id) or DEFAULT_METHOD
+        for g in chain:
+            resolved[g] = method
+        return method
+
+    query = db.query(StockItem.id, StockItem.group_id, StockItem.valuation_method, StockItem.standard_cost)
+    if item_id is not None:
+        query = query.filter(StockItem.id == item_id)
+    return {
+        i.id: (i.valuation_method or group_method(i.group_id), i.standard_cost or 0.0)
+        for i in query.all()
+    }
 
 class StockValuationResult:
-    def __init__(self, qty=0.0, rate=0.0, value=0.0):
+    def __init__(self, qty=0.0, rate=0.0, value=0.0, method=DEFAULT_METHOD):
         self.closing_qty = qty
         self.closing_rate = rate
         self.closing_value = value
+        self.method = method
+
+def _is_inward(is_debit: bool) -> bool:
+    # The side of the stock line is the movement: Purchase / Receipt Note / Credit Note
+    # and Stock Journal production debit stock, Sales / Delivery Note / Debit Note and
+    # consumption credit it. This also gets returns booked inside Purchase / Sales right.
+    return is_debit
+
+def _opening_states(
+    db: Session, upto_date: Optional[date], item_id: Optional[int] = None, use_snapshot: bool = True
+) -> Tuple[Optional[date], Dict[int, List[float]], Dict[int, Tuple[Optional[str], Any]]]:
+    """
+    Per-item [qty, value, rate] that valuation starts from, the date it is valid for, and
+    {item_id: (method, cost layers)} of the snapshot it came from.
+    The latest period-close snapshot on or before upto_date wins over item openings.
+    """
+    query = db.query(StockItem.id, StockItem.opening_qty, StockItem.opening_value, StockItem.opening_rate)
+    if item_id is not None:
+        query = query.filter(StockItem.id == item_id)
+    states = {}
+    for i in query.all():
+        qty = i.opening_qty or 0.0
+        value = i.opening_value or 0.0
+        states[i.id] = [qty, value, (value / qty) if qty != 0 else (i.opening_rate or 0.0)]
+
+    closed_upto = latest_close_date(db, upto_date) if use_snapshot else None
+    saved = {}
+    if closed_upto:
+        snap = stock_snapshot(db, closed_upto)
+        if item_id is not None:
+            snap = {item_id: snap[item_id]} if item_id in snap else {}
+        for i_id, (state, method, layers) in snap.items():
+            states[i_id] = state
+            saved[i_id] = (method, layers)
+    return closed_upto, states, saved
+
+def _opening_valuers(db: Session, upto_date: Optional[date], item_id: Optional[int] = None, method: Optional[str] = None):
+    """
+    (since, {item_id: valuer}) - each item's configured method (or `method`, if given)
+    primed with its opening state. A snapshot resumes with the cost layers it saved.
+    One item valued by a method other than its snapshot's replays from its opening instead,
+    so an override gives the same figures before and after a year is locked.
+    """
+    since, states, saved = _opening_states(db, upto_date, item_id)
+    if method and item_id is not None and item_id in saved and saved[item_id][0] not in (None, method):
+        since, states, saved = _opening_states(db, upto_date, item_id, use_snapshot=False)
+    settings = item_valuation_settings(db, item_id)
+    valuers = {}
+    for i_id, state in states.items():
+        item_method, standard_cost = settings.get(i_id, (DEFAULT_METHOD, 0.0))
+        valuers[i_id] = make_valuer(method or item_method, state, standard_cost, saved.get(i_id, (None, None))[1])
+    return since, valuers
+
+def _movements_query(db: Session, since: Optional[date], upto_date: Optional[date], item_id: Optional[int] = None):
+    query = db.query(
+        VoucherEntry.stock_item_id,
+        Voucher.date,
+        VoucherEntry.is_debit,
+        ENTRY_BASE_QTY,
+        VoucherEntry.amount
+    ).join(Voucher, VoucherEntry.voucher_id == Voucher.id).join(
+        VoucherType, Voucher.voucher_type_id == VoucherType.id
+    )
+    # Transfers move stock between godowns; company-wide quantity and cost are unchanged
+    query = query.filter(VoucherType.nature != VoucherTypeNature.STOCK_TRANSFER.value)
+    if item_id is not None:
+        query = query.filter(VoucherEntry.stock_item_id == item_id)
+    else:
+        query = query.filter(VoucherEntry.stock_item_id != None)
+    if upto_date:
+        query = query.filter(Voucher.date <= upto_date)
+    if since:
+        query = query.filter(Voucher.date > since)
+    return query.order_by(VoucherEntry.stock_item_id, Voucher.date, Voucher.id, VoucherEntry.id)
+
+def _apply_movement(valuer, is_debit: bool, qty: float, amount: float):
+    if _is_inward(is_debit):
+        valuer.inward(qty or 0.0, amount or 0.0)
+    else:
+        valuer.outward(qty or 0.0)
+
+def calculate_item_valuation(
+    db: Session,
+    item_id: int,
+    upto_date: Optional[date] = None,
+    method: Optional[str] = None
+) -> StockValuationResult:
+    """
+    Closing qty / rate / value of one item up to a date (inclusive), using the item's
+    configured valuation method unless `method` overrides it.
+    Resumes from the last period-close snapshot, FIFO / LIFO layers included.
+    """
+    since, valuers = _opening_valuers(db, upto_date, item_id, method)
+    valuer = valuers.get(item_id)
+    if valuer is None:
+        return StockValuationResult()
+
+    for _, _, is_debit, qty, amount in _movements_query(db, since, upto_date, item_id):
+        _apply_movement(valuer, is_debit, qty, amount)
+
+    qty, value, rate = valuer.state()
+    return StockValuationResult(qty, rate, value, valuer.method)
 
 def calculate_weighted_average(
     db: Session, 
@@ -18,96 +345,212 @@ def calculate_weighted_average(
     upto_date: Optional[date] = None
 ) -> StockValuationResult:
     """
-    Calculates Weighted Average Cost up to a specific date.
-    Algorithm:
-    1. Start with Opening Balance (Qty, Value).
-    2. Fetch all Inwards (Purchases) and Outwards (Sales) sorted by Date.
-    3. Iterate:
-       - If Inward: 
-            New Value = OLD_VAL + (New Qty * New Rate)
-            New Qty = OLD_QTY + New Qty
-            New Rate = New Value / New Qty
-       - If Outward:
-            Value Reduced = OLD_RATE * Outward Qty
-            New Value = OLD_VAL - Value Reduced
-            New Qty = OLD_QTY - Outward Qty
-            (Rate remains same)
-    """
-    
-    item = db.query(StockItem).filter(StockItem.id == item_id).first()
-    if not item:
-        return StockValuationResult()
-        
-    current_qty = item.opening_qty
-    current_value = item.opening_value
-    
-    # Avoid div by zero
-    current_rate = (current_value / current_qty) if current_qty != 0 else item.opening_rate
-
-    # Fetch ledger entries
-    query = db.query(VoucherEntry).join(Voucher).filter(
-        VoucherEntry.stock_item_id == item_id
-    ).order_by(Voucher.date, Voucher.id)
-    
-    if upto_date:
-        query = query.filter(Voucher.date <= upto_date)
-        
-    entries = query.all()
-    
-    for e in entries:
-        # Determine movement type.
-        # This is tricky without explicit movement type.
-        # Heuristic: 
-        # - Sales Voucher (Nature=Sales) => Outward ?
-        # - Purchase Voucher (Nature=Purchase) => Inward ?
-        # - Debit/Credit Note?
-        # - Journal?
-        
-        # Simpler Heuristic based on Voucher Type Nature?
-        vtype = e.voucher.voucher_type.nature
-        
-        is_inward = False
-        
-        if vtype == "Purchase":
-            is_inward = True
-        elif vtype == "Sales":
-            is_inward = False
-        elif vtype == "Receipt": # Sales Return?
-             # Complex. MVP: Assume Debit to Stock is Inward, Credit is Outward?
-             # Stock Item Account logic: 
-             # Purchase: Dr Stock (Inward)
-             # Sales: Cr Stock (Outward)
-             # So is_debit = True => Inward.
-             if e.is_debit:
-                 is_inward = True
-             else:
-                 is_inward = False
+    Weighted Average Cost up to a specific date, whatever the item is configured for.
+    Inwards re-average the rate; outwards go out at the current rate, which stays unchanged.
+    """
+    return calculate_item_valuation(db, item_id, upto_date, WEIGHTED_AVERAGE)
+
+# --- Item Movement Register ---
+
+MovementKey = Tuple[date, int, int] # (voucher date, voucher id, entry id)
+
+def _key_after(key: MovementKey):
+    d, v_id, e_id = key
+    return or_(
+        Voucher.date > d,
+        and_(Voucher.date == d, or_(Voucher.id > v_id, and_(Voucher.id == v_id, VoucherEntry.id > e_id)))
+    )
+
+def _key_upto(key: MovementKey):
+    d, v_id, e_id = key
+    return or_(
+        Voucher.date < d,
+        and_(Voucher.date == d, or_(Voucher.id < v_id, and_(Voucher.id == v_id, VoucherEntry.id <= e_id)))
+    )
+
+def _item_register_query(db: Session, item_id: int, *columns):
+    return db.query(*columns).select_from(VoucherEntry).join(
+        Voucher, VoucherEntry.voucher_id == Voucher.id
+    ).join(
+        VoucherType, Voucher.voucher_type_id == VoucherType.id
+    ).filter(
+        VoucherEntry.stock_item_id == item_id,
+        VoucherType.nature != VoucherTypeNature.STOCK_TRANSFER.value
+    ).order_by(Voucher.date, Voucher.id, VoucherEntry.id)
+
+def item_movements(
+    db: Session,
+    item_id: int,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    after: Optional[MovementKey] = None,
+    limit: int = 100,
+    method: Optional[str] = None,
+    resume: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Stock ledger of one item: movements in (date, voucher, entry) order with running
+    qty / value / rate from the same valuer the closing valuation uses.
+    Keyset paged: `after` is the key of the previous page's last row and `resume` the
+    `next_state` that page returned, so each page costs O(limit) however deep it is.
+    Without `resume`, the state at the page start is replayed from the last period-close
+    snapshot on narrow tuples.
+    """
+    if after and resume:
+        if not db.query(StockItem.id).filter(StockItem.id == item_id).first():
+            return None
+        valuer = make_valuer(resume["method"], resume["state"], layers=resume.get("layers"))
+    else:
+        if after:
+            boundary = after[0] - timedelta(days=1)
+        elif from_date:
+            boundary = from_date - timedelta(days=1)
         else:
-             # Default fallback: Debit is Inward (Asset Increase)
-             is_inward = e.is_debit
-             
-        qty = e.quantity
-        rate = e.rate
-        amount = e.amount # qty * rate usually
-        
-        if is_inward:
-            # Add to Stock
-            current_value += amount
-            current_qty += qty
-            
-            # Re-calculate Weighted Rate
-            if current_qty != 0:
-                current_rate = current_value / current_qty
+            boundary = date.min
+        since, valuers = _opening_valuers(db, boundary, item_id, method)
+        valuer = valuers.get(item_id)
+        if valuer is None:
+            return None
+
+        # 1. Running state up to the page start
+        replay = _item_register_query(
+            db, item_id, VoucherEntry.is_debit, ENTRY_BASE_QTY, VoucherEntry.amount
+        )
+        if since:
+            replay = replay.filter(Voucher.date > since)
+        if after:
+            replay = replay.filter(_key_upto(after))
+        elif from_date:
+            replay = replay.filter(Voucher.date < from_date)
         else:
-            # Deduct from Stock
-            # Valuation at CURRENT AVG RATE, not the rate sold at!
-            # The rate in voucher is "Selling Price", not "Cost".
-            # COGS = qty * current_rate
-            
-            cogs = qty * current_rate
-            current_value -= cogs
-            current_qty -= qty
-            
-            # Rate remains same (Avg doesn't change on sale)
-            
-    return StockValuationResult(current_qty, current_rate, current_value)
+            replay = None
+        if replay is not None:
+            for is_debit, qty, amount in replay:
+                _apply_movement(valuer, is_debit, qty, amount)
+    opening = valuer.state()
+
+    # 2. The page itself
+    page = _item_register_query(
+        db, item_id,
+        VoucherEntry.id, Voucher.id.label("voucher_id"), Voucher.date, Voucher.voucher_number,
+        VoucherType.name.label("voucher_type"), VoucherEntry.is_debit,
+        ENTRY_BASE_QTY.label("quantity"), VoucherEntry.amount, VoucherEntry.godown_id
+    )
+    if after:
+        page = page.filter(_key_after(after))
+    elif from_date:
+        page = page.filter(Voucher.date >= from_date)
+    if to_date:
+        page = page.filter(Voucher.date <= to_date)
+    rows = page.limit(limit + 1).all()
+
+    movements = []
+    for row in rows[:limit]:
+        qty = row.quantity or 0.0
+        if _is_inward(row.is_debit):
+            valuer.inward(qty, row.amount or 0.0)
+            inward, outward, cost = qty, 0.0, row.amount or 0.0
+        else:
+            cost = valuer.outward(qty)
+            inward, outward = 0.0, qty
+        running_qty, running_value, running_rate = valuer.state()
+        movements.append({
+            "entry_id": row.id,
+            "voucher_id": row.voucher_id,
+            "date": row.date,
+            "voucher_number": row.voucher_number,
+            "voucher_type": row.voucher_type,
+            "godown_id": row.godown_id,
+            "inward_qty": inward,
+            "outward_qty": outward,
+            "cost": cost,
+            "running_qty": running_qty,
+            "running_value": running_value,
+            "running_rate": running_rate
+        })
+
+    next_key = None
+    next_state = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_key = (last.date, last.voucher_id, last.id)
+        next_state = valuer_state(valuer) # running state after the page's last row
+
+    return {
+        "stock_item_id": item_id,
+        "valuation_method": valuer.method,
+        "opening": {"qty": opening[0], "value": opening[1], "rate": opening[2]},
+        "movements": movements,
+        "next_key": next_key,
+        "next_state": next_state
+    }
+
+def stock_valuers_at(db: Session, as_of_date: date) -> Dict[int, Any]:
+    """
+    {item_id: valuer} for every item, run up to as_of_date by its own method (period close).
+    """
+    since, valuers = _opening_valuers(db, as_of_date)
+    for item_id, _, is_debit, qty, amount in _movements_query(db, since, as_of_date):
+        valuer = valuers.get(item_id)
+        if valuer is None:
+            valuer = valuers[item_id] = make_valuer(DEFAULT_METHOD, [0.0, 0.0, 0.0])
+        _apply_movement(valuer, is_debit, qty, amount)
+    return valuers
+
+def stock_states_at(db: Session, as_of_date: date) -> Dict[int, Tuple[float, float, float]]:
+    """
+    {item_id: (qty, value, rate)} for every item at as_of_date, each by its own method.
+    """
+    return {item_id: valuer.state() for item_id, valuer in stock_valuers_at(db, as_of_date).items()}
+
+def value_stock_at_dates(db: Session, dates: List[date]) -> List[float]:
+    """
+    Total stock value of all items at each of `dates`, in one pass, each item by its method.
+    Single query over every stock movement (ordered by item, date, voucher),
+    snapshotting the running value whenever a boundary date is crossed.
+    Used for columnar reports: 12 months need 13 boundaries, not 24 valuations.
+    Starts from the latest period-close snapshot before the earliest date.
+    """
+    if not dates:
+        return []
+    order = sorted(range(len(dates)), key=lambda i: dates[i])
+    totals = [0.0] * len(dates)
+
+    since, valuers = _opening_valuers(db, dates[order[0]])
+    rows = _movements_query(db, since, dates[order[-1]]).all()
+
+    def close_item(valuer, pos):
+        # Every boundary not yet crossed sees the item's final state.
+        for k in order[pos:]:
+            totals[k] += valuer.value
+
+    current_id = None
+    valuer = None
+    pos = 0
+    seen = set()
+
+    for item_id, v_date, is_debit, qty, amount in rows:
+        if item_id != current_id:
+            if valuer is not None:
+                close_item(valuer, pos)
+            current_id = item_id
+            seen.add(item_id)
+            valuer = valuers.get(item_id) or make_valuer(DEFAULT_METHOD, [0.0, 0.0, 0.0])
+            pos = 0
+
+        while pos < len(order) and v_date > dates[order[pos]]:
+            totals[order[pos]] += valuer.value
+            pos += 1
+
+        _apply_movement(valuer, is_debit, qty, amount)
+
+    if valuer is not None:
+        close_item(valuer, pos)
+
+    # Items without movements keep their opening value at every boundary
+    for item_id, op in valuers.items():
+        if item_id not in seen:
+            for k in range(len(dates)):
+                totals[k] += op.value
+
+    return totals
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app.modules.accounting.versioning import get_data_version
+
+class ReportCache:
+    """
+    In-process LRU of computed reports.
+    Keys carry the data version, so entries never need explicit invalidation:
+    after a mutation the new version simply misses and old entries age out.
+    """
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+report_cache = ReportCache()
+
+def _params_key(params: Dict[str, Any]) -> str:
+    return json.dumps(jsonable_encoder(params), sort_keys=True)
+
+def make_etag(version: int, report: str, params: Dict[str, Any]) -> str:
+    digest = hashlib.sha1(f"{report}|{_params_key(params)}".encode("utf-8")).hexdigest()[:16]
+    return f'"v{version}-{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def cached_report(
+    request: Request,
+    response: Response,
+    db: Session,
+    report: str,
+    params: Dict[str, Any],
+    compute: Callable[[], Any]
+):
+    """
+    Serves a report through the data-version ETag and the in-process cache.
+    - If-None-Match with the current ETag -> 304, nothing computed.
+    - Cache hit for (database, version, report, params) -> stored result.
+    - Otherwise compute() once and remember it.
+    Cost of a repeat request is a single primary-key read of the version row.
+    """
+    version = get_data_version(db)
+    etag = make_etag(version, report, params)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    key = (str(db.get_bind().url), version, report, _params_key(params))
+    result = report_cache.get(key)
+    if result is None:
+        result = compute()
+        # A voucher committed while we were computing: serve it, but don't pin it to the old version.
+        if get_data_version(db) == version:
+            report_cache.put(key, result)
+
+    response.headers.update(headers)
+    return result
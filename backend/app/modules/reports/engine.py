@@ -1,22 +1,60 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Dict, Any, Optional
-from datetime import date
+from sqlalchemy import func, case, extract
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from datetime import date, timedelta
 
 from app.modules.accounting.models import AccountGroup, Ledger, VoucherEntry, Voucher, GroupNature
 from app.modules.inventory.models import StockItem
-from app.modules.inventory.valuation import calculate_weighted_average
+from app.modules.inventory.valuation import value_stock_at_dates
+from app.modules.accounting.period_close import latest_close_date, ledger_snapshot
+
+COLUMN_STEPS = {"monthly": 1, "quarterly": 3}
+
+def fy_start_for(end_date: date) -> date:
+    # Naive FY (April - March). If month < 4, year-1.
+    fy_year = end_date.year if end_date.month >= 4 else end_date.year - 1
+    return date(fy_year, 4, 1)
+
+def build_periods(start_date: date, end_date: date, columns: str) -> List[Tuple[date, date]]:
+    """
+    Splits [start_date, end_date] into monthly / quarterly columns.
+    Chunks follow calendar months counted from start_date's month,
+    so an April start gives Indian FY quarters.
+    """
+    step = COLUMN_STEPS[columns]
+    periods = []
+    cur = start_date
+    while cur <= end_date:
+        month = cur.month + step
+        year = cur.year + (month - 1) // 12
+        month = (month - 1) % 12 + 1
+        nxt = date(year, month, 1)
+        periods.append((cur, min(nxt - timedelta(days=1), end_date)))
+        cur = nxt
+    return periods
+
+def _period_label(start: date, end: date, columns: str) -> str:
+    if columns == "monthly":
+        return start.strftime("%b %Y")
+    return f"{start.strftime('%b')} - {end.strftime('%b %Y')}"
 
 class ReportEngine:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, progress: Optional[Callable[[int], None]] = None):
         self.db = db
+        self.progress = progress # Background jobs pass one; reports call it as each phase completes
+
+    def _progress(self, pct: int):
+        if self.progress:
+            self.progress(pct)
 
     def get_ledger_balances(self, end_date: date, start_date: Optional[date] = None, include_opening: bool = True) -> Dict[int, float]:
         """
         Returns {ledger_id: balance}.
         Positive = Debit, Negative = Credit.
+        Cumulative balances resume from the latest period-close snapshot.
         """
         balances = {}
+        closed_upto = None
         
         # 1. Opening Balances
         if include_opening:
@@ -26,6 +64,11 @@ class ReportEngine:
                 if not l.opening_balance_is_dr:
                     open_bal = -open_bal # Credit is negative
                 balances[l.id] = open_bal
+
+            if not start_date:
+                closed_upto = latest_close_date(self.db, end_date)
+                if closed_upto:
+                    balances.update(ledger_snapshot(self.db, closed_upto))
         
         # 2. Voucher Movements
         query = self.db.query(
@@ -38,6 +81,8 @@ class ReportEngine:
         
         if start_date:
             query = query.filter(Voucher.date >= start_date)
+        if closed_upto:
+            query = query.filter(Voucher.date > closed_upto)
             
         query = query.group_by(VoucherEntry.ledger_id, VoucherEntry.is_debit)
         rows = query.all()
@@ -120,18 +165,14 @@ class ReportEngine:
         # TB uses Cumulative Balances (Asset/Liab) AND Total for Income/Exp?
         # Actually TB is always cumulative from start of books.
         balances = self.get_ledger_balances(end_date, include_opening=True)
+        self._progress(70)
         return self._build_tree(balances)
 
     def get_closing_stock_value(self, end_date: date) -> float:
         """
         Calculates total value of all stock items at end_date.
         """
-        total_value = 0.0
-        items = self.db.query(StockItem).all()
-        for item in items:
-            res = calculate_weighted_average(self.db, item.id, end_date)
-            total_value += res.closing_value
-        return total_value
+        return value_stock_at_dates(self.db, [end_date])[0]
 
     def get_profit_loss(self, start_date: date, end_date: date):
         """
@@ -143,10 +184,12 @@ class ReportEngine:
         # However, Tally often keeps P&L cumulative for the year.
         # Let's assume start_date is start of FY.
         balances = self.get_ledger_balances(end_date, start_date=start_date, include_opening=False)
+        self._progress(40)
         
         # 2. Build Trees
         expenses = self._build_tree(balances, root_nature_filter=["Expenses"])
         income = self._build_tree(balances, root_nature_filter=["Income"])
+        self._progress(50)
         
         # 3. Calculate Totals
         total_expense = sum(n["total_balance"] for n in expenses) # Likely Positive (Dr)
@@ -163,8 +206,10 @@ class ReportEngine:
         # My valuation function `upto_date` includes transactions ON that date. 
         # Ideally we want value BEFORE start_date transactions?
         # MVP: Use start_date.
+        self._progress(70)
         
         closing_stock = self.get_closing_stock_value(end_date)
+        self._progress(90)
         
         # 5. Net Profit Logic
         # Gross Profit (Trading Account) vs Net Profit (P&L).
@@ -193,15 +238,14 @@ class ReportEngine:
         Let's assume FY Start is April 1 of current year context.
         """
         # Determine FY Start (Naive)
-        # If month < 4, year-1.
-        fy_year = end_date.year if end_date.month >= 4 else end_date.year - 1
-        fy_start = date(fy_year, 4, 1)
+        fy_start = fy_start_for(end_date)
         
         # 1. Get Real Account Balances (Cumulative)
         balances = self.get_ledger_balances(end_date, include_opening=True)
         
         assets = self._build_tree(balances, root_nature_filter=["Assets"])
         liabilities = self._build_tree(balances, root_nature_filter=["Liabilities"])
+        self._progress(30)
         
         # 2. Get P&L for "Current Period" (to add to Capital/Reserves)
         # Note: Previous years' P&L should theoretically be in "Retained Earnings" ledger already via Year-End process.
@@ -251,4 +295,168 @@ class ReportEngine:
             }
         }
 
+    # --- Columnar (Multi-Period) Reports ---
+
+    def get_period_movements(
+        self, start_date: date, end_date: date, columns: str, include_prior: bool = False,
+        prior_since: Optional[date] = None
+    ) -> Tuple[Dict[int, List[float]], Dict[int, float]]:
+        """
+        Returns ({ledger_id: [net movement per period]}, {ledger_id: movement before start_date}).
+        One GROUP BY (ledger_id, year, month) query for all periods.
+        Entries before start_date collapse into a single (0, 0) bucket when include_prior is set;
+        prior_since limits that bucket to entries after a period-close date.
+        """
+        periods = build_periods(start_date, end_date, columns)
+        step = COLUMN_STEPS[columns]
+        base_month = start_date.year * 12 + start_date.month
+
+        is_prior = Voucher.date < start_date
+        year_key = case((is_prior, 0), else_=extract("year", Voucher.date))
+        month_key = case((is_prior, 0), else_=extract("month", Voucher.date))
+        signed = case((VoucherEntry.is_debit, VoucherEntry.amount), else_=-VoucherEntry.amount)
+
+        query = self.db.query(
+            VoucherEntry.ledger_id, year_key, month_key, func.sum(signed)
+        ).join(Voucher).filter(Voucher.date <= end_date)
+        if not include_prior:
+            query = query.filter(Voucher.date >= start_date)
+        elif prior_since:
+            query = query.filter(Voucher.date > prior_since)
+        rows = query.group_by(VoucherEntry.ledger_id, year_key, month_key).all()
+
+        movements = {}
+        prior = {}
+        for ledger_id, year, month, total in rows:
+            if not year:
+                prior[ledger_id] = prior.get(ledger_id, 0.0) + total
+                continue
+            idx = (int(year) * 12 + int(month) - base_month) // step
+            vec = movements.setdefault(ledger_id, [0.0] * len(periods))
+            vec[idx] += total
+        return movements, prior
+
+    def _build_vector_tree(self, values: Dict[int, List[float]], width: int) -> List[Dict[str, Any]]:
+        """
+        Like _build_tree, but every node carries one balance per column.
+        Groups and ledgers are loaded once; callers split roots by nature.
+        """
+        tree_nodes = {}
+        for g in self.db.query(AccountGroup).all():
+            tree_nodes[g.id] = {
+                "id": g.id,
+                "name": g.name,
+                "parent_id": g.parent_id,
+                "nature": g.nature,
+                "closing_balance": [0.0] * width,
+                "total_balance": [0.0] * width,
+                "children": [],
+                "ledgers": []
+            }
+
+        for l in self.db.query(Ledger.id, Ledger.name, Ledger.group_id).all():
+            vec = values.get(l.id)
+            if not vec or not any(vec):
+                continue
+            node = tree_nodes.get(l.group_id)
+            if node:
+                node["ledgers"].append({"id": l.id, "name": l.name, "closing_balance": vec})
+                node["closing_balance"] = [a + b for a, b in zip(node["closing_balance"], vec)]
+
+        roots = []
+        for node in tree_nodes.values():
+            parent = tree_nodes.get(node["parent_id"]) if node["parent_id"] else None
+            if parent:
+                parent["children"].append(node)
+            elif not node["parent_id"]:
+                roots.append(node)
+
+        def calculate_recursive(node):
+            total = list(node["closing_balance"])
+            for child in node["children"]:
+                total = [a + b for a, b in zip(total, calculate_recursive(child))]
+            node["total_balance"] = total
+            return total
+
+        for root in roots:
+            calculate_recursive(root)
+        return roots
+
+    def _column_headers(self, periods: List[Tuple[date, date]], columns: str) -> List[Dict[str, Any]]:
+        return [
+            {"label": _period_label(p_start, p_end, columns), "start_date": p_start, "end_date": p_end}
+            for p_start, p_end in periods
+        ]
+
+    def build_columnar_trial_balance(self, start_date: date, end_date: date, columns: str):
+        """
+        Trial Balance with one closing balance column per period end.
+        """
+        periods = build_periods(start_date, end_date, columns)
+        closed_upto = latest_close_date(self.db, start_date - timedelta(days=1))
+        snapshot = ledger_snapshot(self.db, closed_upto) if closed_upto else {}
+        movements, prior = self.get_period_movements(
+            start_date, end_date, columns, include_prior=True, prior_since=closed_upto
+        )
+        self._progress(60)
+
+        values = {}
+        for l in self.db.query(Ledger.id, Ledger.opening_balance, Ledger.opening_balance_is_dr).all():
+            if l.id in snapshot:
+                running = snapshot[l.id]
+            else:
+                running = (l.opening_balance or 0.0) * (1 if l.opening_balance_is_dr else -1)
+            running += prior.get(l.id, 0.0)
+            vec = []
+            for delta in movements.get(l.id, [0.0] * len(periods)):
+                running += delta
+                vec.append(running)
+            values[l.id] = vec
+        self._progress(80)
+
+        return {
+            "columns": self._column_headers(periods, columns),
+            "groups": self._build_vector_tree(values, len(periods))
+        }
+
+    def get_columnar_profit_loss(self, start_date: date, end_date: date, columns: str):
+        """
+        P&L with one column per period.
+        Stock is valued at all period boundaries in one pass:
+        opening of a column is the closing of the one before it.
+        """
+        periods = build_periods(start_date, end_date, columns)
+        width = len(periods)
+        movements, _ = self.get_period_movements(start_date, end_date, columns)
+        self._progress(40)
+
+        roots = self._build_vector_tree(movements, width)
+        expenses = [n for n in roots if n["nature"] == "Expenses"]
+        income = [n for n in roots if n["nature"] == "Income"]
+        self._progress(50)
+
+        boundaries = [start_date - timedelta(days=1)] + [p_end for _, p_end in periods]
+        stock = value_stock_at_dates(self.db, boundaries)
+        self._progress(90)
+        opening_stock = stock[:-1]
+        closing_stock = stock[1:]
+
+        total_expense = [sum(n["total_balance"][k] for n in expenses) for k in range(width)]
+        abs_income = [abs(sum(n["total_balance"][k] for n in income)) for k in range(width)]
+        net_profit = [
+            (abs_income[k] + closing_stock[k]) - (total_expense[k] + opening_stock[k])
+            for k in range(width)
+        ]
 
+        return {
+            "columns": self._column_headers(periods, columns),
+            "income": income,
+            "expenses": expenses,
+            "totals": {
+                "total_income_ledgers": abs_income,
+                "total_expense_ledgers": total_expense,
+                "opening_stock": opening_stock,
+                "closing_stock": closing_stock,
+                "net_profit": net_profit
+            }
+        }
@@ -1,124 +1,116 @@
+import itertools
+import json
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Dict, List, Any
+from sqlalchemy import func, case, or_
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
 from datetime import date
 
 from app.modules.accounting.models import Voucher, VoucherEntry, Ledger, VoucherType, Organization
-from app.modules.inventory.models import StockItem
+from app.modules.accounting.hierarchy import GroupIndex, classify_ledgers
+from app.modules.inventory.models import StockItem, Unit
+from app.modules.inventory.units import ENTRY_BASE_QTY
+from app.modules.tax.engine import calculate_gst_arrays, gst_split_paise
+from app.modules.tax.history import GstRateBook, RateHsn, gst_rate_book
 
-def generate_gstr1_json(db: Session, from_date: date, to_date: date) -> Dict[str, Any]:
-    # 1. Fetch Organization Details
-    org = db.query(Organization).first()
-    if not org or not org.gstin:
-        return {"error": "Organization GSTIN not set"}
-        
-    fp = to_date.strftime("%m%Y") # Return Period e.g. 122024
-    
-    # 2. Fetch Sales Vouchers
-    # We look for voucher types of nature "Sales"
-    # Or just Type Name "Sales"
-    
-    # Get Sales Voucher Type IDs
-    # v_types = db.query(VoucherType).filter(VoucherType.nature == "Sales").all()
-    # ids = [v.id for v in v_types]
-    
-    # Simpler: Join VoucherType and filter nature
-    vouchers = db.query(Voucher).join(VoucherType).filter(
+# Ledger roles on a sales voucher, resolved once per call from the group hierarchy
+GSTR1_LEDGER_CLASSES = {
+    "party": ["Sundry Debtors", "Cash-in-hand", "Bank Accounts"],
+    "sales": ["Sales Accounts"],
+    "duty": ["Duties & Taxes"],
+}
+
+# Outward service lines whose ledger/group carries no rate
+DEFAULT_SERVICE_RATE = 18.0
+
+def _ledger_rate(ledger, book: GstRateBook, on_date: date, default: float = DEFAULT_SERVICE_RATE) -> RateHsn:
+    # Ledger's own rate, else its group chain's, as of the date; else `default`
+    rate, hsn = book.ledger(ledger.id, ledger.group_id, on_date, ledger.percentage_of_calculation)
+    return rate or default, hsn
+
+def _sales_entry_rows(db: Session, from_date: date, to_date: date):
+    """
+    Every entry of every sales voucher in the period, in one query, ordered by voucher.
+    """
+    return db.query(
+        Voucher.id,
+        Voucher.voucher_number,
+        Voucher.date,
+        VoucherEntry.ledger_id,
+        VoucherEntry.amount,
+        VoucherEntry.is_debit,
+        VoucherEntry.stock_item_id,
+        StockItem.gst_rate,
+        StockItem.group_id
+    ).join(Voucher, VoucherEntry.voucher_id == Voucher.id).join(
+        VoucherType, Voucher.voucher_type_id == VoucherType.id
+    ).outerjoin(StockItem, VoucherEntry.stock_item_id == StockItem.id).filter(
         VoucherType.nature == "Sales",
         Voucher.date >= from_date,
         Voucher.date <= to_date
-    ).all()
-    
-    b2b = []
-    b2cs = []
-    
-    for v in vouchers:
-        # Identify Party (Debtor)
-        # Usually the entry with 'is_debit=True' and Group='Sundry Debtors'
-        # But cash sales?
-        
-        party_ledger = None
-        # primary_entries = [e for e in v.entries if e.is_debit] # Sales usually credits Income, Debits Party/Cash
-        # Find the entry that IS NOT tax and IS NOT Sales Account
-        
-        # Better heuristic:
-        # Find entry where Ledger Group is "Sundry Debtors" or "Cash-in-Hand" or "Bank Accounts"
-        for e in v.entries:
-            # We need to check group. 
-            # Doing this in loop is N+1, but fine for MVP export (low volume).
-            # e.ledger lazy loaded? Yes.
-            group_name = _get_root_group_name(e.ledger.group)
-            if group_name in ["Sundry Debtors", "Cash-in-Hand", "Bank Accounts"]:
-                party_ledger = e.ledger
-                break
-                
-        if not party_ledger:
+    ).order_by(Voucher.date, Voucher.id, VoucherEntry.id)
+
+def _group_by_voucher(rows):
+    current = None
+    entries = []
+    for row in rows:
+        if current is not None and row.id != current.id:
+            yield current, entries
+            entries = []
+        current = row
+        entries.append(row)
+    if current is not None:
+        yield current, entries
+
+def gstr1_sections(db: Session, org: Organization, from_date: date, to_date: date) -> Iterator[Tuple[str, Any]]:
+    """
+    (key, value) pairs of the GSTR-1 payload in file order. Each section is built by its own
+    query and handed out before the next one runs, so only one section is held at a time.
+    """
+    yield "gstin", org.gstin
+    yield "fp", to_date.strftime("%m%Y") # Return Period e.g. 122024
+    org_state = org.state or "Karnataka"
+
+    # 2. Masters, once per call
+    groups = GroupIndex(db)
+    ledger_class = classify_ledgers(db, GSTR1_LEDGER_CLASSES, groups)
+    ledgers = {
+        l.id: l for l in db.query(
+            Ledger.id, Ledger.gstin, Ledger.state, Ledger.group_id, Ledger.percentage_of_calculation
+        ).all()
+    }
+    book = gst_rate_book(db) # Rates as of each invoice date
+
+    b2b = {} # ctin -> {"ctin", "inv"}; dict keeps first-seen order
+
+    # 3. Sales Vouchers
+    for v, entries in _group_by_voucher(_sales_entry_rows(db, from_date, to_date)):
+        # Party (Debtor / Cash / Bank) is the first entry under one of those groups
+        party = next((ledgers[e.ledger_id] for e in entries if ledger_class.get(e.ledger_id) == "party"), None)
+        if not party:
             continue # Skip invalid voucher
-            
+
         # Classify B2B or B2C
-        is_b2b = (party_ledger.gstin is not None and len(party_ledger.gstin) > 5)
-        
-        # Extract Items / Tax Breakdown
-        # We need to summarize by Rate.
-        # Find entries that are "Sales Accounts" (Taxable Value) or "StockItem" linked?
-        # And Tax entries.
-        
-        # Strategy: Iterate entries.
-        # If StockItem present -> It's a line item. Get value, rate.
-        # If Ledger is under "Sales Accounts" -> It's a line item (Service).
-        # If Ledger is under "Duties & Taxes" -> It's tax.
-        
-        # But GSTR1 requires grouping validation by Rate.
-        # We need to pair Line Item Value with its Rate.
-        
-        item_details = {} # Rate -> {txval, iamt, camt, samt}
-        
-        for e in v.entries:
-            if e.stock_item:
-                # Item Line
-                rate = e.stock_item.mst_gst_rate or e.stock_item.gst_rate or 0
-                val = e.amount
-                if rate not in item_details: item_details[rate] = {"txval":0, "iamt":0, "camt":0, "samt":0}
-                item_details[rate]["txval"] += val
-                
-            elif _is_sales_ledger(e.ledger):
-                # Service Line (Assume 18% if unknown or fetch from ledger)
-                # MVP: Mock 18% if not set
-                rate = 18.0
-                val = e.amount
-                if rate not in item_details: item_details[rate] = {"txval":0, "iamt":0, "camt":0, "samt":0}
-                item_details[rate]["txval"] += val
-                
-            elif _is_tax_ledger(e.ledger):
-                # Tax Line
-                # We need to attribute this to a rate.
-                # If we have multiple rates, it's hard to attribute without item link.
-                # Simplified: Distribute proportional? OR assume single rate.
-                # For MVP, accumulate total tax and assign to dominant rate?
-                # Actually, iterate items to calculate expected tax, and use that?
-                pass
-
-        # Calculate or Assign Tax
-        # For this MVP, we will auto-calculate Tax based on Rate and place in appropriate bucket (IGST vs CGST/SGST)
-        # Based on Place of Supply (Party State vs Org State).
-        
-        org_state = org.state or "Karnataka"
-        party_state = party_ledger.state or org_state
+        is_b2b = (party.gstin is not None and len(party.gstin) > 5)
+
+        # Taxable value per rate. Stock lines use the item (or its stock group) rate,
+        # service lines the sales ledger (or its group) rate. Duty lines are recomputed below.
+        item_details = {} # Rate -> txval
+        for e in entries:
+            if e.stock_item_id:
+                rate = book.item(e.stock_item_id, e.group_id, v.date, e.gst_rate)[0]
+            elif ledger_class.get(e.ledger_id) == "sales":
+                rate = _ledger_rate(ledgers[e.ledger_id], book, v.date)[0]
+            else:
+                continue
+            item_details[rate] = item_details.get(rate, 0.0) + e.amount
+
+        # Tax by Place of Supply (Party State vs Org State)
+        party_state = party.state or org_state
         is_inter_state = (org_state.lower() != party_state.lower())
-        
+
         inv_items = []
-        
-        for rate, data in item_details.items():
-            txval = data["txval"]
-            if is_inter_state:
-                iamt = txval * (rate / 100)
-                camt = 0
-                samt = 0
-            else:
-                iamt = 0
-                camt = txval * (rate / 200)
-                samt = txval * (rate / 200)
-                
+        for rate, txval in item_details.items():
+            iamt, camt, samt = (p / 100 for p in gst_split_paise(txval, rate, is_inter_state))
             inv_items.append({
                 "num": 1, # seq
                 "itm_det": {
@@ -130,55 +122,287 @@ def generate_gstr1_json(db: Session, from_date: date, to_date: date) -> Dict[str
                    "csamt": 0
                 }
             })
-            
+
         # Construct Invoice Object
         inv_obj = {
             "inum": v.voucher_number,
             "idt": v.date.strftime("%d-%m-%Y"),
-            "val": sum(e.amount for e in v.entries if e.is_debit), # Approx Invoice Value
-            "pos": _get_state_code(party_state), # Need state code map
+            "val": sum(e.amount for e in entries if e.is_debit), # Approx Invoice Value
+            "pos": _get_state_code(party_state),
             "rchrg": "N",
             "itms": inv_items
         }
-        
+
+        # B2C (Small) is grouped by POS + Rate, not invoice wise; not emitted yet
         if is_b2b:
-            # Group by CTIN
-            # Check if CTIN exists in b2b list
-            ctin = party_ledger.gstin
-            existing = next((x for x in b2b if x["ctin"] == ctin), None)
-            if existing:
-                existing["inv"].append(inv_obj)
-            else:
-                b2b.append({
-                    "ctin": ctin,
-                    "inv": [inv_obj]
-                })
+            ctin_group = b2b.get(party.gstin)
+            if not ctin_group:
+                ctin_group = b2b[party.gstin] = {"ctin": party.gstin, "inv": []}
+            ctin_group["inv"].append(inv_obj)
+
+    yield "b2b", list(b2b.values())
+    del b2b
+    yield "b2cl", [] # ignoring for brevity
+    yield "b2cs", [] # ignoring for brevity
+    yield "hsn", {"data": _hsn_data(db, from_date, to_date, "Sales")}
+
+def generate_gstr1_json(db: Session, from_date: date, to_date: date) -> Dict[str, Any]:
+    org = db.query(Organization).first()
+    if not org or not org.gstin:
+        return {"error": "Organization GSTIN not set"}
+    return dict(gstr1_sections(db, org, from_date, to_date))
+
+def iter_gstr1_json(
+    sections: Union[Dict[str, Any], Iterable[Tuple[str, Any]]], chunk_size: int = 65536
+) -> Iterator[str]:
+    """
+    Encodes a GSTR-1 payload (a dict, or gstr1_sections pairs) incrementally, handing it out
+    in ~chunk_size pieces. A section is encoded and released before the next is produced.
+    """
+    encoder = json.JSONEncoder()
+    buf = ["{"]
+    size = 1
+    pairs = sections.items() if isinstance(sections, dict) else sections
+    for n, (key, value) in enumerate(pairs):
+        head = (", " if n else "") + encoder.encode(key) + ": "
+        for part in itertools.chain((head,), encoder.iterencode(value)):
+            buf.append(part)
+            size += len(part)
+            if size >= chunk_size:
+                yield "".join(buf)
+                buf = []
+                size = 0
+    buf.append("}")
+    yield "".join(buf)
+
+# --- GSTR-3B / HSN Summary ---
+
+NIL_TAXABILITY = {"exempt", "nil rated", "non-gst"}
+
+def _taxable_lines(db: Session, from_date: date, to_date: date, nature: str) -> List[Dict[str, Any]]:
+    """
+    Taxable value of the period's Sales or Purchase lines, summed in SQL per
+    (stock item, ledger, inter-state, rate period) and then tagged with rate / HSN / unit.
+    Rate periods split the range at every recorded rate change, so each sum has one rate.
+    A voucher is inter-state when it carries an IGST duty line.
+    """
+    groups = GroupIndex(db)
+    book = gst_rate_book(db)
+    starts = book.periods(from_date, to_date)
+    line_class = "sales" if nature == "Sales" else "purchase"
+    ledger_class = classify_ledgers(db, {"sales": ["Sales Accounts"], "purchase": ["Purchase Accounts"]}, groups)
+    line_ledgers = [l_id for l_id, cls in ledger_class.items() if cls == line_class]
+
+    in_period = [Voucher.date >= from_date, Voucher.date <= to_date]
+    inter = db.query(
+        VoucherEntry.voucher_id.label("voucher_id"),
+        func.max(case((Ledger.duty_head == "IGST", 1), else_=0)).label("is_inter")
+    ).join(Ledger, VoucherEntry.ledger_id == Ledger.id).join(
+        Voucher, VoucherEntry.voucher_id == Voucher.id
+    ).filter(Ledger.duty_head != None, *in_period).group_by(VoucherEntry.voucher_id).subquery()
+
+    # Sales lines are credits, purchase lines debits; the other side (returns) nets off
+    if nature == "Purchase":
+        sign = case((VoucherEntry.is_debit, 1), else_=-1)
+    else:
+        sign = case((VoucherEntry.is_debit, -1), else_=1)
+    is_inter = func.coalesce(inter.c.is_inter, 0)
+    keys = [VoucherEntry.stock_item_id, VoucherEntry.ledger_id, is_inter.label("is_inter")]
+    split = len(starts) > 1
+    if split:
+        keys.append(case(*[(Voucher.date >= d, k) for k, d in reversed(list(enumerate(starts))) if k], else_=0).label("period"))
+
+    rows = db.query(
+        *keys,
+        func.sum(sign * VoucherEntry.amount).label("txval"),
+        func.sum(sign * func.coalesce(ENTRY_BASE_QTY, 0.0)).label("qty")
+    ).join(Voucher, VoucherEntry.voucher_id == Voucher.id).join(
+        VoucherType, Voucher.voucher_type_id == VoucherType.id
+    ).outerjoin(inter, inter.c.voucher_id == VoucherEntry.voucher_id).filter(
+        VoucherType.nature == nature,
+        or_(VoucherEntry.stock_item_id != None, VoucherEntry.ledger_id.in_(line_ledgers)),
+        *in_period
+    ).group_by(*keys).all()
+
+    item_ids = {r.stock_item_id for r in rows if r.stock_item_id}
+    items = {}
+    if item_ids:
+        items = {
+            i.id: i for i in db.query(
+                StockItem.id, StockItem.name, StockItem.group_id, StockItem.gst_rate,
+                StockItem.hsn_code, StockItem.taxability, Unit.symbol
+            ).outerjoin(Unit, StockItem.unit_id == Unit.id).filter(StockItem.id.in_(item_ids)).all()
+        }
+    ledger_ids = {r.ledger_id for r in rows if not r.stock_item_id}
+    ledgers = {}
+    if ledger_ids:
+        ledgers = {
+            l.id: l for l in db.query(
+                Ledger.id, Ledger.name, Ledger.group_id, Ledger.percentage_of_calculation
+            ).filter(Ledger.id.in_(ledger_ids)).all()
+        }
+
+    lines = []
+    for r in rows:
+        on_date = starts[r.period] if split else from_date
+        if r.stock_item_id:
+            item = items[r.stock_item_id]
+            rate, hsn = book.item(item.id, item.group_id, on_date, item.gst_rate, item.hsn_code)
+            desc, uqc, qty = item.name, item.symbol or "OTH", r.qty or 0.0
+            nil = (item.taxability or "").lower() in NIL_TAXABILITY or not rate
+        else:
+            ledger = ledgers[r.ledger_id]
+            # Only outward services fall back to 18%; an unrated purchase claims no ITC
+            rate, hsn = _ledger_rate(ledger, book, on_date, DEFAULT_SERVICE_RATE if nature == "Sales" else 0.0)
+            desc, uqc, qty = ledger.name, "NA", 0.0
+            nil = not rate
+        lines.append({
+            "rate": rate,
+            "hsn": hsn,
+            "desc": desc,
+            "uqc": uqc,
+            "qty": qty,
+            "txval": r.txval or 0.0,
+            "is_inter": bool(r.is_inter),
+            "nil": nil
+        })
+    return lines
+
+def _tax_totals(lines: List[Dict[str, Any]]) -> Dict[str, float]:
+    # Tax per line to the paisa (vectorized), then summed
+    iamt, camt, samt = calculate_gst_arrays(
+        [l["txval"] for l in lines], [l["rate"] for l in lines], [l["is_inter"] for l in lines]
+    )
+    totals = {
+        "txval": sum(l["txval"] for l in lines),
+        "iamt": float(sum(iamt)),
+        "camt": float(sum(camt)),
+        "samt": float(sum(samt)),
+        "csamt": 0.0
+    }
+    return {k: round(v, 2) for k, v in totals.items()}
+
+def _rate_wise(lines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    buckets = {}
+    for line in lines:
+        key = (line["rate"], "Inter-State" if line["is_inter"] else "Intra-State")
+        buckets.setdefault(key, []).append(line)
+    return [
+        {"rt": rate, "supply_type": supply_type, **_tax_totals(bucket)}
+        for (rate, supply_type), bucket in sorted(buckets.items())
+    ]
+
+def _booked_tax(db: Session, from_date: date, to_date: date) -> Dict[str, Dict[str, float]]:
+    """
+    Tax actually posted to duty ledgers, by voucher nature and duty head, in one grouped query.
+    """
+    signed = case((VoucherEntry.is_debit, VoucherEntry.amount), else_=-VoucherEntry.amount)
+    rows = db.query(VoucherType.nature, Ledger.duty_head, func.sum(signed)).select_from(VoucherEntry).join(
+        Voucher, VoucherEntry.voucher_id == Voucher.id
+    ).join(VoucherType, Voucher.voucher_type_id == VoucherType.id).join(
+        Ledger, VoucherEntry.ledger_id == Ledger.id
+    ).filter(
+        VoucherType.nature.in_(["Sales", "Purchase"]),
+        Ledger.duty_head != None,
+        Voucher.date >= from_date,
+        Voucher.date <= to_date
+    ).group_by(VoucherType.nature, Ledger.duty_head).all()
+
+    booked = {"outward": {}, "inward": {}}
+    for nature, head, total in rows:
+        if nature == "Sales":
+            booked["outward"][head] = round(-(total or 0.0), 2) # Output tax is a credit
         else:
-            # B2C (Small) - Grouped by POS + Rate (Not Invoice wise usually, but B2CL is invoice wise)
-            # Simplified: dumping into B2CS-like list (just inv list doesn't apply to B2CS structure)
-            # But let's use B2CL format for simplicity in this artifact
-            b2cs.append(inv_obj)
+            booked["inward"][head] = round(total or 0.0, 2)
+    return booked
+
+def generate_gstr3b_json(
+    db: Session, from_date: date, to_date: date, progress: Optional[Callable[[int], None]] = None
+) -> Dict[str, Any]:
+    org = db.query(Organization).first()
+    if not org or not org.gstin:
+        return {"error": "Organization GSTIN not set"}
+    progress = progress or (lambda pct: None)
+
+    outward = _taxable_lines(db, from_date, to_date, "Sales")
+    progress(40)
+    inward = [l for l in _taxable_lines(db, from_date, to_date, "Purchase") if not l["nil"]]
+    progress(75)
+    taxable_out = [l for l in outward if not l["nil"]]
+    nil_out = [l for l in outward if l["nil"]]
+
+    out_tax = _tax_totals(taxable_out)
+    itc = _tax_totals(inward)
+    itc_avl = {k: v for k, v in itc.items() if k != "txval"}
+    booked_tax = _booked_tax(db, from_date, to_date)
+    progress(95)
 
     return {
         "gstin": org.gstin,
-        "fp": fp,
-        "b2b": b2b,
-        "b2cl": [], # ignoring for brevity
-        "b2cs": []  #ignoring for brevity
+        "ret_period": to_date.strftime("%m%Y"),
+        "sup_details": {
+            "osup_det": out_tax,
+            "osup_nil_exmp": {"txval": round(sum(l["txval"] for l in nil_out), 2)}
+        },
+        "itc_elg": {
+            "itc_avl": [{"ty": "OTH", **itc_avl}],
+            "itc_net": itc_avl
+        },
+        "tax_payable": {k: round(out_tax[k] - itc_avl[k], 2) for k in itc_avl},
+        "rate_wise": {
+            "outward": _rate_wise(taxable_out),
+            "inward": _rate_wise(inward)
+        },
+        "booked_tax": booked_tax
     }
 
-def _get_root_group_name(group):
-    curr = group
-    while curr.parent:
-        curr = curr.parent
-    return curr.name
+def generate_hsn_summary(
+    db: Session, from_date: date, to_date: date, nature: str = "Sales",
+    progress: Optional[Callable[[int], None]] = None
+) -> Dict[str, Any]:
+    """
+    HSN-wise summary (GSTR-1 Table 12) - one row per (HSN, rate).
+    """
+    org = db.query(Organization).first()
+    if not org or not org.gstin:
+        return {"error": "Organization GSTIN not set"}
+
+    return {
+        "gstin": org.gstin,
+        "fp": to_date.strftime("%m%Y"),
+        "hsn": {"data": _hsn_data(db, from_date, to_date, nature, progress)}
+    }
 
-def _is_sales_ledger(ledger):
-    # Check if under "Sales Accounts"
-    return _get_root_group_name(ledger.group) == "Sales Accounts" or ledger.group.name == "Sales Accounts"
+def _hsn_data(
+    db: Session, from_date: date, to_date: date, nature: str,
+    progress: Optional[Callable[[int], None]] = None
+) -> List[Dict[str, Any]]:
+    lines = _taxable_lines(db, from_date, to_date, nature)
+    if progress:
+        progress(70)
+    rows = {}
+    for line in lines:
+        key = (line["hsn"] or "", line["rate"])
+        row = rows.get(key)
+        if not row:
+            row = rows[key] = {"lines": [], "desc": line["desc"], "uqc": line["uqc"], "qty": 0.0}
+        row["lines"].append(line)
+        row["qty"] += line["qty"]
 
-def _is_tax_ledger(ledger):
-    return _get_root_group_name(ledger.group) == "Duties & Taxes"
+    data = []
+    for num, ((hsn, rate), row) in enumerate(sorted(rows.items()), start=1):
+        totals = _tax_totals(row["lines"])
+        data.append({
+            "num": num,
+            "hsn_sc": hsn,
+            "desc": row["desc"],
+            "uqc": row["uqc"],
+            "qty": row["qty"],
+            "rt": rate,
+            "val": round(totals["txval"] + totals["iamt"] + totals["camt"] + totals["samt"] + totals["csamt"], 2),
+            **totals
+        })
+    return data
 
 def _get_state_code(state_name):
     # Mock Map
@@ -0,0 +1,216 @@
+import re
+from functools import lru_cache
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.modules.accounting.models import Ledger, Voucher, VoucherEntry, VoucherType
+
+# --- GSTR-2B ITC Reconciliation ---
+# Portal invoices (supplier GSTIN, invoice number, date, value, tax) are matched to purchase
+# vouchers through two hash indexes built per upload: (GSTIN, normalized invoice number) and,
+# for invoices whose number was keyed differently, (GSTIN, invoice value in paise).
+# Every lookup is O(1), so a month of 100k invoices is one pass over each side.
+# The supplier's invoice number is the purchase voucher's number.
+
+DUTY_HEADS = ("IGST", "CGST", "SGST", "Cess")
+
+_TOKENS = re.compile(r"[A-Z]+|[0-9]+")
+
+def _norm_gstin(gstin: Optional[str]) -> str:
+    return (gstin or "").strip().upper()
+
+def _norm_invoice(number: Optional[str]) -> str:
+    # "inv/24-25/007" and "INV-24-25-7" are the same invoice: the number is split into letter
+    # and digit runs, each number loses its leading zeros, and the runs are joined with "-"
+    # so "INV-2-4257" stays apart from "INV-24-25-7"
+    return "-".join(
+        t.lstrip("0") or "0" if t[0].isdigit() else t
+        for t in _TOKENS.findall((number or "").upper())
+    )
+
+def _paise(amount: float) -> int:
+    return int(round((amount or 0.0) * 100))
+
+@lru_cache(maxsize=4096)
+def _parse_date(value: str) -> date:
+    # The portal writes dd-mm-yyyy; ISO dates are accepted for hand-made files.
+    # A month has ~30 distinct dates, so strptime runs ~30 times per upload.
+    for fmt in ("%d-%m-%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except (TypeError, ValueError):
+            continue
+    raise ValueError(f"Invalid invoice date: {value!r}")
+
+def parse_gstr2b(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Flattens the B2B section of a GSTR-2B JSON (with or without the outer "data" wrapper)
+    to one record per invoice. Raises ValueError on a malformed file.
+    """
+    data = payload.get("data", payload) if isinstance(payload, dict) else None
+    docdata = (data or {}).get("docdata", data or {})
+    suppliers = docdata.get("b2b") if isinstance(docdata, dict) else None
+    if not isinstance(suppliers, list):
+        raise ValueError("No B2B section found in the GSTR-2B file")
+
+    invoices = []
+    for supplier in suppliers:
+        ctin = _norm_gstin(supplier.get("ctin"))
+        for inv in supplier.get("inv") or []:
+            tax = {head: 0.0 for head in DUTY_HEADS}
+            txval = 0.0
+            for item in inv.get("items") or inv.get("itms") or []:
+                det = item.get("itm_det", item)
+                txval += det.get("txval") or 0.0
+                tax["IGST"] += det.get("igst", det.get("iamt")) or 0.0
+                tax["CGST"] += det.get("cgst", det.get("camt")) or 0.0
+                tax["SGST"] += det.get("sgst", det.get("samt")) or 0.0
+                tax["Cess"] += det.get("cess", det.get("csamt")) or 0.0
+            invoices.append({
+                "ctin": ctin,
+                "supplier": supplier.get("trdnm"),
+                "inum": inv.get("inum"),
+                "date": _parse_date(inv.get("dt") or inv.get("idt")),
+                "value": inv.get("val") or 0.0,
+                "txval": round(txval, 2),
+                "tax": round(sum(tax.values()), 2),
+                "itc_available": inv.get("itcavl", "Y") != "N"
+            })
+    return invoices
+
+def _book_invoices(db: Session, from_date: date, to_date: date) -> List[Dict[str, Any]]:
+    """
+    Purchase vouchers in the range, one row each from a single grouped query:
+    supplier GSTIN and invoice value from the credited party line, tax from the duty lines.
+    """
+    party_line = (Ledger.gstin != None) & (Ledger.gstin != "") & (VoucherEntry.is_debit == False)
+    signed = case((VoucherEntry.is_debit, VoucherEntry.amount), else_=-VoucherEntry.amount)
+    rows = db.query(
+        Voucher.id,
+        Voucher.voucher_number,
+        Voucher.date,
+        func.max(case((party_line, Ledger.gstin))).label("ctin"),
+        func.max(case((party_line, Ledger.name))).label("supplier"),
+        func.sum(case((party_line, VoucherEntry.amount), else_=0.0)).label("value"),
+        func.sum(case((Ledger.duty_head.in_(DUTY_HEADS), signed), else_=0.0)).label("tax")
+    ).join(VoucherEntry, VoucherEntry.voucher_id == Voucher.id).join(
+        Ledger, VoucherEntry.ledger_id == Ledger.id
+    ).join(VoucherType, Voucher.voucher_type_id == VoucherType.id).filter(
+        VoucherType.nature == "Purchase",
+        Voucher.date >= from_date,
+        Voucher.date <= to_date
+    ).group_by(Voucher.id, Voucher.voucher_number, Voucher.date).all()
+
+    return [
+        {
+            "voucher_id": r.id,
+            "voucher_number": r.voucher_number,
+            "date": r.date,
+            "ctin": _norm_gstin(r.ctin),
+            "supplier": r.supplier,
+            "value": round(r.value or 0.0, 2),
+            "tax": round(r.tax or 0.0, 2)
+        }
+        for r in rows if r.ctin
+    ]
+
+def _closest(candidates: Optional[List[int]], books: List[Dict[str, Any]], used: set, on_date: date,
+             window: Optional[int] = None) -> Optional[int]:
+    # Nearest-dated unclaimed candidate (within the window when one is given)
+    best, best_gap = None, None
+    for k in candidates or ():
+        if k in used:
+            continue
+        gap = abs((books[k]["date"] - on_date).days)
+        if window is not None and gap > window:
+            continue
+        if best is None or gap < best_gap:
+            best, best_gap = k, gap
+    return best
+
+def reconcile_gstr2b(
+    db: Session,
+    payload: Dict[str, Any],
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    date_window_days: int = 3,
+    amount_tolerance: float = 1.0
+) -> Dict[str, Any]:
+    """
+    Matches a GSTR-2B upload against purchase vouchers.
+    `matched`: same GSTIN + invoice number, dates within the window, value and tax within tolerance.
+    `mismatched`: paired, with `reasons` (date / value / tax / invoice_number).
+    `missing_in_books`: on the portal, not booked. `missing_in_2b`: booked, not on the portal.
+    The period defaults to the span of the uploaded invoices.
+    """
+    portal = parse_gstr2b(payload)
+    if from_date is None:
+        from_date = min((p["date"] for p in portal), default=date.today())
+    if to_date is None:
+        to_date = max((p["date"] for p in portal), default=from_date)
+    # Vouchers just outside the period can still pair with invoices inside it
+    books = _book_invoices(
+        db, from_date - timedelta(days=date_window_days), to_date + timedelta(days=date_window_days)
+    )
+
+    by_number: Dict[Tuple[str, str], List[int]] = {}
+    by_value: Dict[Tuple[str, int], List[int]] = {}
+    for k, b in enumerate(books):
+        by_number.setdefault((b["ctin"], _norm_invoice(b["voucher_number"])), []).append(k)
+        by_value.setdefault((b["ctin"], _paise(b["value"])), []).append(k)
+
+    used = set()
+    matched, mismatched, missing_in_books = [], [], []
+    for p in portal:
+        reasons = []
+        k = _closest(by_number.get((p["ctin"], _norm_invoice(p["inum"]))), books, used, p["date"])
+        if k is None:
+            k = _closest(by_value.get((p["ctin"], _paise(p["value"]))), books, used, p["date"], date_window_days)
+            if k is None:
+                missing_in_books.append(p)
+                continue
+            reasons.append("invoice_number")
+        used.add(k)
+        b = books[k]
+        if abs((b["date"] - p["date"]).days) > date_window_days:
+            reasons.append("date")
+        if abs(b["value"] - p["value"]) > amount_tolerance:
+            reasons.append("value")
+        if abs(b["tax"] - p["tax"]) > amount_tolerance:
+            reasons.append("tax")
+        pair = {
+            "portal": p,
+            "books": b,
+            "value_difference": round(b["value"] - p["value"], 2),
+            "tax_difference": round(b["tax"] - p["tax"], 2)
+        }
+        if reasons:
+            pair["reasons"] = reasons
+            mismatched.append(pair)
+        else:
+            matched.append(pair)
+
+    # Only vouchers inside the period itself count as missing from the portal
+    missing_in_2b = [
+        b for k, b in enumerate(books) if k not in used and from_date <= b["date"] <= to_date
+    ]
+
+    return {
+        "from_date": from_date,
+        "to_date": to_date,
+        "summary": {
+            "portal_invoices": len(portal),
+            "matched": len(matched),
+            "mismatched": len(mismatched),
+            "missing_in_books": len(missing_in_books),
+            "missing_in_2b": len(missing_in_2b),
+            "matched_itc": round(sum(m["portal"]["tax"] for m in matched if m["portal"]["itc_available"]), 2)
+        },
+        "matched": matched,
+        "mismatched": mismatched,
+        "missing_in_books": missing_in_books,
+        "missing_in_2b": missing_in_2b
+    }
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+import traceback
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.modules.accounting.versioning import get_data_version
+from app.modules.reports.engine import ReportEngine, fy_start_for
+from app.modules.accounting.models import Organization
+from app.modules.reports.gst import generate_gstr3b_json, generate_hsn_summary, gstr1_sections
+from app.modules.reports.models import ReportJob, ReportJobStatus
+
+# A RUNNING job whose worker died is handed out again after this long
+STALE_RUNNING_AFTER = timedelta(minutes=30)
+
+ProgressFn = Callable[[int], None]
+
+def _date_param(params: Dict[str, Any], key: str, default: Optional[date] = None) -> date:
+    value = params.get(key)
+    if value is None:
+        if default is None:
+            raise HTTPException(status_code=400, detail=f"Parameter '{key}' is required")
+        return default
+    try:
+        return value if isinstance(value, date) else date.fromisoformat(str(value))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Parameter '{key}' must be YYYY-MM-DD")
+
+# --- Report Registry ---
+# name -> run(db, params, progress) -> JSON-serializable result
+# Runners call progress(pct) as each phase (query, section, column set) completes.
+
+def _trial_balance(db: Session, params: Dict[str, Any], progress: ProgressFn):
+    engine = ReportEngine(db, progress)
+    end_date = _date_param(params, "end_date")
+    if params.get("columns"):
+        start_date = _date_param(params, "start_date", fy_start_for(end_date))
+        return engine.build_columnar_trial_balance(start_date, end_date, params["columns"])
+    return engine.build_trial_balance_tree(end_date)
+
+def _profit_loss(db: Session, params: Dict[str, Any], progress: ProgressFn):
+    engine = ReportEngine(db, progress)
+    start_date = _date_param(params, "start_date")
+    end_date = _date_param(params, "end_date")
+    if params.get("columns"):
+        return engine.get_columnar_profit_loss(start_date, end_date, params["columns"])
+    return engine.get_profit_loss(start_date, end_date)
+
+def _balance_sheet(db: Session, params: Dict[str, Any], progress: ProgressFn):
+    return ReportEngine(db, progress).get_balance_sheet(_date_param(params, "end_date"))
+
+GSTR1_SECTIONS = 6 # gstin, fp, b2b, b2cl, b2cs, hsn
+
+def _gstr1(db: Session, params: Dict[str, Any], progress: ProgressFn):
+    from_date, to_date = _date_param(params, "from_date"), _date_param(params, "to_date")
+    org = db.query(Organization).first()
+    if not org or not org.gstin:
+        return {"error": "Organization GSTIN not set"}
+    result = {}
+    for key, value in gstr1_sections(db, org, from_date, to_date):
+        result[key] = value
+        progress(len(result) * 100 // GSTR1_SECTIONS)
+    return result
+
+def _gstr3b(db: Session, params: Dict[str, Any], progress: ProgressFn):
+    return generate_gstr3b_json(db, _date_param(params, "from_date"), _date_param(params, "to_date"), progress)
+
+def _hsn_summary(db: Session, params: Dict[str, Any], progress: ProgressFn):
+    return generate_hsn_summary(
+        db, _date_param(params, "from_date"), _date_param(params, "to_date"), params.get("nature") or "Sales", progress
+    )
+
+REPORTS: Dict[str, Callable[[Session, Dict[str, Any], ProgressFn], Any]] = {
+    "trial-balance": _trial_balance,
+    "profit-loss": _profit_loss,
+    "balance-sheet": _balance_sheet,
+    "gstr1": _gstr1,
+    "gstr3b": _gstr3b,
+    "hsn-summary": _hsn_summary,
+}
+
+def _params_hash(report: str, params: Dict[str, Any]) -> str:
+    canonical = json.dumps(jsonable_encoder(params), sort_keys=True)
+    return hashlib.sha1(f"{report}|{canonical}".encode("utf-8")).hexdigest()
+
+# --- Queue Operations ---
+
+def submit_job(db: Session, report: str, params: Dict[str, Any]) -> ReportJob:
+    """
+    Queues a report, or returns the identical job that is already queued / running /
+    finished (and unexpired) against the same version of the books.
+    """
+    if report not in REPORTS:
+        raise HTTPException(status_code=400, detail=f"Unknown report '{report}'")
+    params = jsonable_encoder(params or {})
+    params_hash = _params_hash(report, params)
+    version = get_data_version(db)
+
+    existing = db.query(ReportJob).filter(
+        ReportJob.params_hash == params_hash,
+        ReportJob.data_version == version,
+        ReportJob.status.in_([ReportJobStatus.QUEUED, ReportJobStatus.RUNNING, ReportJobStatus.DONE])
+    ).order_by(ReportJob.id.desc()).first()
+    if existing and (existing.status != ReportJobStatus.DONE or existing.expires_at > datetime.utcnow()):
+        return existing
+
+    job = ReportJob(
+        report=report,
+        params=params,
+        params_hash=params_hash,
+        data_version=version,
+        status=ReportJobStatus.QUEUED,
+        progress=0
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def claim_next_job(db: Session, worker_id: str) -> Optional[ReportJob]:
+    """
+    Atomically moves the oldest claimable job to RUNNING.
+    The conditional UPDATE is the lock: of several workers racing for a row, one sees rowcount 1.
+    """
+    now = datetime.utcnow()
+    candidates = db.query(ReportJob.id).filter(
+        (ReportJob.status == ReportJobStatus.QUEUED) |
+        ((ReportJob.status == ReportJobStatus.RUNNING) & (ReportJob.started_at < now - STALE_RUNNING_AFTER))
+    ).order_by(ReportJob.id).limit(5).all()
+
+    for (job_id,) in candidates:
+        res = db.execute(
+            update(ReportJob).where(
+                ReportJob.id == job_id,
+                (ReportJob.status == ReportJobStatus.QUEUED) |
+                ((ReportJob.status == ReportJobStatus.RUNNING) & (ReportJob.started_at < now - STALE_RUNNING_AFTER))
+            ).values(status=ReportJobStatus.RUNNING, worker=worker_id, started_at=now, progress=5)
+        )
+        db.commit()
+        if res.rowcount == 1:
+            return db.query(ReportJob).filter(ReportJob.id == job_id).first()
+    return None
+
+def run_job(db: Session, job: ReportJob):
+    def progress(pct: int):
+        job.progress = max(job.progress or 0, min(int(pct), 99))
+        db.commit()
+
+    try:
+        result = REPORTS[job.report](db, dict(job.params or {}), progress)
+        job.result = jsonable_encoder(result)
+        job.status = ReportJobStatus.DONE
+        job.progress = 100
+    except HTTPException as e:
+        db.rollback()
+        job.status = ReportJobStatus.FAILED
+        job.error = str(e.detail)
+    except Exception as e:
+        db.rollback()
+        job.status = ReportJobStatus.FAILED
+        job.error = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+
+    job.finished_at = datetime.utcnow()
+    job.expires_at = job.finished_at + timedelta(seconds=settings.REPORT_JOB_TTL_SECONDS)
+    db.commit()
+
+def purge_expired_jobs(db: Session) -> int:
+    count = db.query(ReportJob).filter(
+        ReportJob.expires_at != None,
+        ReportJob.expires_at < datetime.utcnow()
+    ).delete(synchronize_session=False)
+    db.commit()
+    return count
+
+def run_pending_jobs(db: Session, worker_id: str = "inline") -> int:
+    """
+    Drains the queue on the calling thread (used by workers and by tests).
+    """
+    done = 0
+    while True:
+        job = claim_next_job(db, worker_id)
+        if not job:
+            return done
+        run_job(db, job)
+        done += 1
+
+# --- Worker Pool ---
+
+class ReportWorkerPool:
+    """
+    N daemon threads per process polling the report_jobs table.
+    Several uvicorn processes can each run a pool; claim_next_job keeps them apart.
+    """
+    def __init__(self, size: int, poll_seconds: float):
+        self.size = size
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        host = f"{socket.gethostname()}:{os.getpid()}"
+        for n in range(self.size):
+            t = threading.Thread(target=self._loop, args=(f"{host}/{n}",), daemon=True, name=f"report-worker-{n}")
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+
+    def _loop(self, worker_id: str):
+        polls = 0
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                polls += 1
+                if polls % 60 == 0:
+                    purge_expired_jobs(db)
+                if run_pending_jobs(db, worker_id):
+                    continue
+            except Exception:
+                traceback.print_exc()
+            finally:
+                db.close()
+            self._stop.wait(self.poll_seconds)
+
+worker_pool = ReportWorkerPool(settings.REPORT_WORKERS, settings.REPORT_JOB_POLL_SECONDS)
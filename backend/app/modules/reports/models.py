@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from datetime import datetime
+from app.core.db import Base
+
+class ReportJobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class ReportJob(Base):
+    """
+    A report computed off the request path.
+    Lives in the DB so any worker process can claim it.
+    """
+    __tablename__ = "report_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    report = Column(String, nullable=False) # e.g. balance-sheet, gstr1
+    params = Column(JSON, nullable=True)
+    params_hash = Column(String, nullable=False) # sha1(report + canonical params), for de-duplication
+    data_version = Column(Integer, nullable=False, default=0) # Books version the job was submitted against
+
+    status = Column(String, nullable=False, default=ReportJobStatus.QUEUED, index=True)
+    progress = Column(Integer, default=0) # 0 - 100
+    worker = Column(String, nullable=True)
+
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True, index=True) # Result TTL
+
+    __table_args__ = (
+        Index("ix_report_jobs_dedup", "params_hash", "data_version", "status"),
+    )
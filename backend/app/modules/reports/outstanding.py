@@ -0,0 +1,181 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, case, select, update
+from sqlalchemy.orm import Session
+
+from app.modules.accounting.models import BillAllocation, Ledger, Voucher, VoucherEntry
+
+# Upper bounds (days overdue) of the aging buckets; anything beyond the last goes to "> N"
+DEFAULT_AGING = [30, 60, 90]
+
+NEW_REF = "New Ref"
+
+# Residue below this is treated as settled (float paise)
+SETTLED = 0.005
+
+def _bucket_labels(aging: List[int]) -> List[str]:
+    labels = ["Not Due"]
+    lower = 1
+    for upper in aging:
+        labels.append(f"{lower}-{upper} days")
+        lower = upper + 1
+    labels.append(f"> {aging[-1]} days")
+    return labels
+
+def _bucket_index(overdue_days: int, aging: List[int]) -> int:
+    if overdue_days <= 0:
+        return 0
+    for k, upper in enumerate(aging):
+        if overdue_days <= upper:
+            return k + 1
+    return len(aging) + 1
+
+def _bill_rows(db: Session, as_of: date, ledger_id: Optional[int] = None):
+    """
+    One grouped query: every (party ledger, ref_name) with its pending amount (Dr positive),
+    bill date (effective date of the New Ref voucher) and due date (New Ref credit_period).
+    """
+    signed = case((VoucherEntry.is_debit, BillAllocation.amount), else_=-BillAllocation.amount)
+    is_new = BillAllocation.ref_type == NEW_REF
+    bill_date = func.min(case((is_new, func.coalesce(Voucher.effective_date, Voucher.date))))
+    due_date = func.min(case((is_new, BillAllocation.credit_period)))
+    pending = func.sum(signed)
+
+    query = db.query(
+        BillAllocation.ledger_id,
+        BillAllocation.ref_name,
+        pending.label("pending"),
+        bill_date.label("bill_date"),
+        due_date.label("due_date"),
+        func.min(Voucher.date).label("first_date")
+    ).join(VoucherEntry, BillAllocation.voucher_entry_id == VoucherEntry.id).join(
+        Voucher, VoucherEntry.voucher_id == Voucher.id
+    ).filter(Voucher.date <= as_of)
+    if ledger_id is not None:
+        query = query.filter(BillAllocation.ledger_id == ledger_id)
+
+    return query.group_by(BillAllocation.ledger_id, BillAllocation.ref_name).having(
+        func.abs(pending) > SETTLED
+    )
+
+def ensure_bill_ledgers(db: Session) -> int:
+    """
+    Startup hook: copies the party ledger from the voucher entry onto allocations written
+    before bill_allocations.ledger_id existed, so they group under their party.
+    """
+    if not db.query(BillAllocation.id).filter(BillAllocation.ledger_id == None).first():
+        return 0
+    entry_ledger = select(VoucherEntry.ledger_id).where(
+        VoucherEntry.id == BillAllocation.voucher_entry_id
+    ).scalar_subquery()
+    res = db.execute(
+        update(BillAllocation).where(BillAllocation.ledger_id == None).values(ledger_id=entry_ledger)
+    )
+    db.commit()
+    return res.rowcount
+
+def _bill_out(row, as_of: date) -> Dict[str, Any]:
+    bill_date = row.bill_date or row.first_date
+    due = row.due_date or bill_date
+    return {
+        "ref_name": row.ref_name,
+        "bill_date": bill_date,
+        "due_date": due,
+        "pending": row.pending,
+        "overdue_days": max((as_of - due).days, 0)
+    }
+
+def open_bills(db: Session, as_of: date) -> List[Dict[str, Any]]:
+    """
+    Every unsettled bill of every party (pending signed, Dr positive) with its due date.
+    """
+    bills = []
+    for row in _bill_rows(db, as_of):
+        bill = _bill_out(row, as_of)
+        bill["ledger_id"] = row.ledger_id
+        bills.append(bill)
+    return bills
+
+def get_outstanding(
+    db: Session,
+    as_of: date,
+    kind: str = "receivables",
+    aging: Optional[List[int]] = None,
+    include_bills: bool = False
+) -> Dict[str, Any]:
+    """
+    Bill-wise outstanding for all parties.
+    Receivables are bills pending on the debit side, payables on the credit side;
+    amounts are reported positive either way.
+    """
+    aging = sorted(aging or DEFAULT_AGING)
+    labels = _bucket_labels(aging)
+    sign = 1 if kind == "receivables" else -1
+
+    parties = {}
+    for row in _bill_rows(db, as_of):
+        amount = row.pending * sign
+        if amount <= 0:
+            continue
+        bill = _bill_out(row, as_of)
+        bill["pending"] = amount
+
+        party = parties.get(row.ledger_id)
+        if not party:
+            party = parties[row.ledger_id] = {
+                "ledger_id": row.ledger_id,
+                "name": None,
+                "pending": 0.0,
+                "buckets": [0.0] * len(labels),
+                "bills": []
+            }
+        party["pending"] += amount
+        party["buckets"][_bucket_index(bill["overdue_days"], aging)] += amount
+        if include_bills:
+            party["bills"].append(bill)
+
+    if parties:
+        names = db.query(Ledger.id, Ledger.name).filter(Ledger.id.in_(list(parties))).all()
+        for l_id, name in names:
+            parties[l_id]["name"] = name
+
+    result = sorted(parties.values(), key=lambda p: -p["pending"])
+    if not include_bills:
+        for p in result:
+            del p["bills"]
+    else:
+        for p in result:
+            p["bills"].sort(key=lambda b: (b["due_date"] or as_of, b["ref_name"]))
+
+    return {
+        "as_of": as_of,
+        "kind": kind,
+        "buckets": labels,
+        "parties": result,
+        "totals": {
+            "pending": sum(p["pending"] for p in result),
+            "buckets": [sum(p["buckets"][k] for p in result) for k in range(len(labels))]
+        }
+    }
+
+def get_pending_bills(
+    db: Session,
+    ledger_id: int,
+    prefix: Optional[str] = None,
+    as_of: Optional[date] = None,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    Open bills of one party, for Agst Ref selection while typing.
+    The prefix is a range on ref_name, so (ledger_id, ref_name) is an index seek on any backend.
+    """
+    as_of = as_of or date.today()
+    query = _bill_rows(db, as_of, ledger_id)
+    if prefix:
+        query = query.filter(
+            BillAllocation.ref_name >= prefix,
+            BillAllocation.ref_name < prefix + "\uffff"
+        )
+    rows = query.order_by(BillAllocation.ref_name).limit(limit).all()
+    return [_bill_out(row, as_of) for row in rows]
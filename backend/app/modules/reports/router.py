@@ -1,34 +1,226 @@
-from fastapi import APIRouter, Depends
+import json
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from datetime import date
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Literal
 
 from app.core.db import get_db
-from app.modules.reports.engine import ReportEngine
-from app.modules.reports.gst import generate_gstr1_json
+from app.modules.reports.engine import ReportEngine, fy_start_for
+from app.modules.accounting.models import Organization
+from app.modules.reports.gst import gstr1_sections, iter_gstr1_json, generate_gstr3b_json, generate_hsn_summary
+from app.modules.reports.gstr2b import reconcile_gstr2b
+from app.modules.reports.cache import cached_report
+from app.modules.reports.models import ReportJob, ReportJobStatus
+from app.modules.reports.jobs import submit_job
+from app.modules.reports.outstanding import get_outstanding, get_pending_bills
 
 router = APIRouter()
 
+ColumnsOption = Optional[Literal["monthly", "quarterly"]]
+
 @router.get("/trial-balance")
-def get_trial_balance(end_date: date, db: Session = Depends(get_db)):
+def get_trial_balance(
+    end_date: date,
+    request: Request,
+    response: Response,
+    start_date: Optional[date] = None,
+    columns: ColumnsOption = None,
+    db: Session = Depends(get_db)
+):
     """
     Returns the hierarchical Trial Balance.
+    With `columns`, returns one closing balance per month/quarter from start_date (default: FY start).
     """
     engine = ReportEngine(db)
-    return engine.build_trial_balance_tree(end_date)
+    if columns:
+        start_date = start_date or fy_start_for(end_date)
+        return cached_report(
+            request, response, db, "trial-balance",
+            {"start_date": start_date, "end_date": end_date, "columns": columns},
+            lambda: engine.build_columnar_trial_balance(start_date, end_date, columns)
+        )
+    return cached_report(
+        request, response, db, "trial-balance", {"end_date": end_date},
+        lambda: engine.build_trial_balance_tree(end_date)
+    )
 
 @router.get("/profit-loss")
-def get_profit_loss(start_date: date, end_date: date, db: Session = Depends(get_db)):
+def get_profit_loss(
+    start_date: date,
+    end_date: date,
+    request: Request,
+    response: Response,
+    columns: ColumnsOption = None,
+    db: Session = Depends(get_db)
+):
     """
     Returns Profit & Loss statement with Income, Expenses, and Net Profit.
+    With `columns`, every figure becomes a list with one value per month/quarter.
     """
     engine = ReportEngine(db)
-    return engine.get_profit_loss(start_date, end_date)
+    if columns:
+        return cached_report(
+            request, response, db, "profit-loss",
+            {"start_date": start_date, "end_date": end_date, "columns": columns},
+            lambda: engine.get_columnar_profit_loss(start_date, end_date, columns)
+        )
+    return cached_report(
+        request, response, db, "profit-loss", {"start_date": start_date, "end_date": end_date},
+        lambda: engine.get_profit_loss(start_date, end_date)
+    )
 
 @router.get("/balance-sheet")
-def get_balance_sheet(end_date: date, db: Session = Depends(get_db)):
+def get_balance_sheet(end_date: date, request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Returns Balance Sheet with Assets, Liabilities, and calculated Capital Account.
     """
     engine = ReportEngine(db)
-    return engine.get_balance_sheet(end_date)
+    return cached_report(
+        request, response, db, "balance-sheet", {"end_date": end_date},
+        lambda: engine.get_balance_sheet(end_date)
+    )
+
+def _gst_report(result: Dict[str, Any]) -> Dict[str, Any]:
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@router.get("/gstr1")
+def get_gstr1(from_date: date, to_date: date, db: Session = Depends(get_db)):
+    """
+    GSTR-1 JSON for the period, streamed section by section as each is built.
+    For a full year, prefer a background job (POST /reports/jobs with report=gstr1).
+    """
+    org = db.query(Organization).first()
+    if not org or not org.gstin:
+        raise HTTPException(status_code=400, detail="Organization GSTIN not set")
+    filename = f"GSTR1_{to_date.strftime('%m%Y')}.json"
+    return StreamingResponse(
+        iter_gstr1_json(gstr1_sections(db, org, from_date, to_date)),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/gstr3b")
+def get_gstr3b(from_date: date, to_date: date, request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+    GSTR-3B summary: outward taxable / nil-exempt supplies, eligible ITC, rate-wise split
+    and the tax actually booked to duty ledgers.
+    """
+    return cached_report(
+        request, response, db, "gstr3b", {"from_date": from_date, "to_date": to_date},
+        lambda: _gst_report(generate_gstr3b_json(db, from_date, to_date))
+    )
+
+@router.get("/hsn-summary")
+def get_hsn_summary(
+    from_date: date,
+    to_date: date,
+    request: Request,
+    response: Response,
+    nature: Literal["Sales", "Purchase"] = "Sales",
+    db: Session = Depends(get_db)
+):
+    """
+    HSN-wise quantity, taxable value and tax, by HSN and rate.
+    """
+    return cached_report(
+        request, response, db, "hsn-summary", {"from_date": from_date, "to_date": to_date, "nature": nature},
+        lambda: _gst_report(generate_hsn_summary(db, from_date, to_date, nature))
+    )
+
+@router.post("/gstr2b/reconcile")
+def reconcile_gstr2b_upload(
+    file: UploadFile = File(...),
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    date_window_days: int = Query(3, ge=0, le=31),
+    amount_tolerance: float = Query(1.0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    ITC reconciliation: a GSTR-2B JSON download matched against purchase vouchers.
+    Returns matched / mismatched pairs and the invoices missing on either side.
+    """
+    try:
+        payload = json.loads(file.file.read())
+        return reconcile_gstr2b(db, payload, from_date, to_date, date_window_days, amount_tolerance)
+    except (ValueError, AttributeError, TypeError) as e: # JSONDecodeError is a ValueError
+        raise HTTPException(status_code=400, detail=f"Invalid GSTR-2B file: {e}")
+
+# --- Bill-wise Outstanding ---
+
+@router.get("/outstanding")
+def get_outstanding_report(
+    request: Request,
+    response: Response,
+    kind: Literal["receivables", "payables"] = "receivables",
+    as_of: Optional[date] = None,
+    include_bills: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Pending bills per party with aging buckets (Not Due, 1-30, 31-60, 61-90, > 90 days past due).
+    """
+    as_of = as_of or date.today()
+    return cached_report(
+        request, response, db, "outstanding",
+        {"kind": kind, "as_of": as_of, "include_bills": include_bills},
+        lambda: get_outstanding(db, as_of, kind, include_bills=include_bills)
+    )
+
+@router.get("/outstanding/{ledger_id}/pending-bills")
+def get_party_pending_bills(
+    ledger_id: int,
+    q: Optional[str] = None,
+    as_of: Optional[date] = None,
+    limit: int = 20,
+    db: Session = Depends(get_db)
+):
+    """
+    Open bills of one party whose reference starts with `q` (Agst Ref picker).
+    """
+    return get_pending_bills(db, ledger_id, q, as_of, min(limit, 100))
+
+# --- Background Jobs ---
+
+class ReportJobCreate(BaseModel):
+    report: str # trial-balance, profit-loss, balance-sheet, gstr1, gstr3b, hsn-summary
+    params: Dict[str, Any] = {}
+
+def _job_out(job: ReportJob, with_result: bool = False) -> Dict[str, Any]:
+    out = {
+        "id": job.id,
+        "report": job.report,
+        "params": job.params,
+        "status": job.status,
+        "progress": job.progress,
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        "expires_at": job.expires_at
+    }
+    if with_result and job.status == ReportJobStatus.DONE:
+        out["result"] = job.result
+    return out
+
+@router.post("/jobs", status_code=202)
+def create_report_job(payload: ReportJobCreate, db: Session = Depends(get_db)):
+    """
+    Queues a long report for the background workers.
+    An identical job for the same data version is returned instead of queueing a duplicate.
+    """
+    job = submit_job(db, payload.report, payload.params)
+    return _job_out(job)
+
+@router.get("/jobs/{job_id}")
+def get_report_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Poll for status/progress; `result` is included once the job is done.
+    """
+    job = db.query(ReportJob).filter(ReportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found (or expired)")
+    return _job_out(job, with_result=True)
@@ -1,6 +1,11 @@
 from datetime import date
 from typing import List, Dict, Optional, Tuple
 
+try:
+    import numpy as np # Optional: vectorized GST kernel
+except ImportError:
+    np = None
+
 class TaxCalculationResult:
     def __init__(self):
         self.taxable_value: float = 0.0
@@ -13,13 +18,68 @@ class TaxCalculationResult:
     def total_amount(self):
         return self.taxable_value + self.total_tax
 
+# --- Paise Kernel ---
+# Tax is worked out in integer paise with half-up rounding: value in paise x rate in
+# hundredths of a percent, divided by 10000 (IGST) or 20000 (each of CGST / SGST).
+# The scalar and array paths run the same integer arithmetic, so they agree to the paisa.
+# NumPy is optional; without it the arrays are plain lists.
+
+_ROUND_EPS = 1e-6 # absorbs float noise such as 1.005 * 100 == 100.49999999999999
+
+def _to_units(value: float, scale: int) -> int:
+    # Half-up (away from zero) to an integer number of 1/scale units
+    units = int(abs(value) * scale + 0.5 + _ROUND_EPS)
+    return -units if value < 0 else units
+
+def _tax_paise(value_paise: int, rate_bp: int, divisor: int) -> int:
+    if rate_bp <= 0:
+        return 0
+    tax = (abs(value_paise) * rate_bp * 2 + divisor) // (2 * divisor)
+    return -tax if value_paise < 0 else tax
+
+def gst_split_paise(taxable_value: float, rate: float, is_inter_state: bool) -> Tuple[int, int, int]:
+    """
+    (igst, cgst, sgst) in paise for one line.
+    """
+    value_paise = _to_units(taxable_value, 100)
+    rate_bp = _to_units(rate, 100)
+    if is_inter_state:
+        return _tax_paise(value_paise, rate_bp, 10000), 0, 0
+    half = _tax_paise(value_paise, rate_bp, 20000)
+    return 0, half, half
+
+def calculate_gst_arrays(taxable_values, rates, inter_state):
+    """
+    Vectorized GST over parallel sequences of taxable values, rates (percent) and inter-state flags.
+    Returns (igst, cgst, sgst) in rupees: NumPy float arrays when NumPy is installed, lists otherwise.
+    """
+    if np is None:
+        split = [gst_split_paise(v, r, i) for v, r, i in zip(taxable_values, rates, inter_state)]
+        return tuple([p / 100 for p in col] for col in zip(*split)) if split else ([], [], [])
+
+    values = np.asarray(taxable_values, dtype=np.float64)
+    rate_arr = np.asarray(rates, dtype=np.float64)
+    inter = np.asarray(inter_state, dtype=bool)
+
+    sign = np.where(values < 0, -1, 1).astype(np.int64)
+    value_paise = np.floor(np.abs(values) * 100 + 0.5 + _ROUND_EPS).astype(np.int64)
+    rate_bp = np.floor(np.abs(rate_arr) * 100 + 0.5 + _ROUND_EPS).astype(np.int64)
+    rate_bp = np.where(rate_arr > 0, rate_bp, 0)
+    product = value_paise * rate_bp * 2
+
+    full = sign * ((product + 10000) // 20000)
+    half = sign * ((product + 20000) // 40000)
+    igst = np.where(inter, full, 0)
+    local = np.where(inter, 0, half)
+    return igst / 100.0, local / 100.0, local / 100.0
+
 def calculate_gst(
     taxable_value: float,
     rate: float,
     is_inter_state: bool, # True for IGST, False for CGST+SGST
 ) -> TaxCalculationResult:
     """
-    Core calculation logic.
+    Core calculation logic (one line of the paise kernel).
     """
     res = TaxCalculationResult()
     res.taxable_value = taxable_value
@@ -27,16 +87,11 @@ def calculate_gst(
     if rate <= 0:
         return res
         
-    tax_amount = taxable_value * (rate / 100.0)
-    
-    if is_inter_state:
-        res.igst_amount = round(tax_amount, 2)
-    else:
-        half_tax = round(tax_amount / 2, 2)
-        res.cgst_amount = half_tax
-        res.sgst_amount = half_tax # Potential rounding issue if odd? Tally splits 18% -> 9% + 9%, so usually fine.
-        
-    res.total_tax = res.cgst_amount + res.sgst_amount + res.igst_amount
+    igst, cgst, sgst = gst_split_paise(taxable_value, rate, is_inter_state)
+    res.igst_amount = igst / 100
+    res.cgst_amount = cgst / 100
+    res.sgst_amount = sgst / 100 # Each half rounded on its own, so CGST == SGST always
+    res.total_tax = (igst + cgst + sgst) / 100
     return res
 
 def determine_place_of_supply(org_state: str, party_state: str) -> str:
@@ -0,0 +1,147 @@
+import threading
+from bisect import bisect_right
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.modules.accounting.models import AccountGroup, Ledger
+from app.modules.accounting.versioning import GST_RATES_SCOPE, bump_data_version, get_data_version
+from app.modules.inventory.models import StockGroup, StockItem
+from app.modules.tax.models import GstRateHistory, GstSubject
+
+RateHsn = Tuple[float, Optional[str]]
+
+# Subject -> (master model, column holding its own current rate)
+RATE_SUBJECTS = {
+    GstSubject.STOCK_ITEM: (StockItem, "gst_rate"),
+    GstSubject.STOCK_GROUP: (StockGroup, "gst_rate"),
+    GstSubject.LEDGER: (Ledger, "percentage_of_calculation"),
+    GstSubject.ACCOUNT_GROUP: (AccountGroup, "gst_rate"),
+}
+_SUBJECT_OF_MODEL = {model: (subject_type, rate_attr) for subject_type, (model, rate_attr) in RATE_SUBJECTS.items()}
+
+class GstRateBook:
+    """
+    Every rate history row plus both group trees, loaded once.
+    A subject's rows are kept as a sorted list of effective dates, so the rate on a date is a
+    bisect; the group fallback walks in-memory parent maps. No query per line.
+    """
+    def __init__(self, db: Session):
+        self._dates: Dict[Tuple[str, int], List[date]] = {}
+        self._values: Dict[Tuple[str, int], List[RateHsn]] = {}
+        rows = db.query(
+            GstRateHistory.subject_type, GstRateHistory.subject_id, GstRateHistory.effective_from,
+            GstRateHistory.rate, GstRateHistory.hsn_code
+        ).order_by(GstRateHistory.subject_type, GstRateHistory.subject_id, GstRateHistory.effective_from).all()
+        for r in rows:
+            key = (r.subject_type, r.subject_id)
+            self._dates.setdefault(key, []).append(r.effective_from)
+            self._values.setdefault(key, []).append((r.rate or 0.0, r.hsn_code))
+        self.change_dates = sorted({r.effective_from for r in rows})
+
+        self._groups: Dict[str, Dict[int, tuple]] = {
+            GstSubject.STOCK_GROUP: {
+                g.id: (g.parent_id, g.gst_rate or 0.0, g.hsn_code)
+                for g in db.query(StockGroup.id, StockGroup.parent_id, StockGroup.gst_rate, StockGroup.hsn_code)
+            },
+            GstSubject.ACCOUNT_GROUP: {
+                g.id: (g.parent_id, g.gst_rate or 0.0, g.hsn_code)
+                for g in db.query(AccountGroup.id, AccountGroup.parent_id, AccountGroup.gst_rate, AccountGroup.hsn_code)
+            },
+        }
+
+    def own(self, subject_type: str, subject_id: int, on_date: date, rate: float, hsn: Optional[str] = None) -> RateHsn:
+        """
+        The subject's own (rate, hsn) on a date; `rate` / `hsn` are the master's current values.
+        """
+        key = (subject_type, subject_id)
+        dates = self._dates.get(key)
+        if dates:
+            k = bisect_right(dates, on_date) - 1
+            if k >= 0:
+                return self._values[key][k]
+        return rate or 0.0, hsn
+
+    def group(self, subject_type: str, group_id: Optional[int], on_date: date) -> RateHsn:
+        """
+        Nearest non-empty rate and HSN up a group chain, each as of the date.
+        """
+        groups = self._groups[subject_type]
+        rate, hsn = 0.0, None
+        seen = set()
+        while group_id is not None and group_id in groups and group_id not in seen:
+            seen.add(group_id)
+            parent_id, cur_rate, cur_hsn = groups[group_id]
+            g_rate, g_hsn = self.own(subject_type, group_id, on_date, cur_rate, cur_hsn)
+            rate = rate or g_rate
+            hsn = hsn or g_hsn
+            if rate and hsn:
+                break
+            group_id = parent_id
+        return rate, hsn
+
+    def item(self, item_id: int, group_id: Optional[int], on_date: date, rate: float, hsn: Optional[str] = None) -> RateHsn:
+        i_rate, i_hsn = self.own(GstSubject.STOCK_ITEM, item_id, on_date, rate, hsn)
+        if i_rate and i_hsn:
+            return i_rate, i_hsn
+        g_rate, g_hsn = self.group(GstSubject.STOCK_GROUP, group_id, on_date)
+        return i_rate or g_rate, i_hsn or g_hsn
+
+    def ledger(self, ledger_id: int, group_id: Optional[int], on_date: date, rate: float) -> RateHsn:
+        # Ledgers carry no HSN of their own
+        l_rate, _ = self.own(GstSubject.LEDGER, ledger_id, on_date, rate)
+        g_rate, g_hsn = self.group(GstSubject.ACCOUNT_GROUP, group_id, on_date)
+        return l_rate or g_rate, g_hsn
+
+    def periods(self, from_date: date, to_date: date) -> List[date]:
+        """
+        Start dates of the sub-periods of [from_date, to_date] within which no rate changes.
+        """
+        return [from_date] + [d for d in self.change_dates if from_date < d <= to_date]
+
+# One book per (database, GST rates version): rate history and group edits rebuild it,
+# voucher saves do not.
+_cache_lock = threading.Lock()
+_cached: Tuple[Optional[tuple], Optional[GstRateBook]] = (None, None)
+
+def gst_rate_book(db: Session) -> GstRateBook:
+    global _cached
+    key = (id(db.get_bind()), get_data_version(db, GST_RATES_SCOPE))
+    cached_key, book = _cached
+    if book is not None and cached_key == key:
+        return book
+    book = GstRateBook(db)
+    with _cache_lock:
+        _cached = (key, book)
+    return book
+
+@event.listens_for(Session, "before_flush")
+def _record_master_rate_edits(session, flush_context, instances):
+    # Once a subject has rate history, the history wins over its master on every date, so a
+    # rate / HSN edit on the master is recorded as a change effective today.
+    today = date.today()
+    for obj in list(session.dirty):
+        subject = _SUBJECT_OF_MODEL.get(type(obj))
+        if subject is None:
+            continue
+        subject_type, rate_attr = subject
+        attrs = [rate_attr] + (["hsn_code"] if hasattr(obj, "hsn_code") else [])
+        state = inspect(obj)
+        if not any(state.attrs[a].history.has_changes() for a in attrs):
+            continue
+        with session.no_autoflush:
+            rows = session.query(GstRateHistory).filter(
+                GstRateHistory.subject_type == subject_type,
+                GstRateHistory.subject_id == obj.id
+            ).all()
+        if not rows:
+            continue # No history yet: the master alone is the rate
+        row = next((r for r in rows if r.effective_from == today), None)
+        if row is None:
+            row = GstRateHistory(subject_type=subject_type, subject_id=obj.id, effective_from=today)
+            session.add(row)
+        row.rate = getattr(obj, rate_attr) or 0.0
+        row.hsn_code = getattr(obj, "hsn_code", None)
+        bump_data_version(session, GST_RATES_SCOPE) # the version listener has already run
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Date, Float, Index
+from app.core.db import Base
+
+class GstSubject:
+    STOCK_ITEM = "stock_item"
+    STOCK_GROUP = "stock_group"
+    LEDGER = "ledger"
+    ACCOUNT_GROUP = "account_group"
+
+class GstRateHistory(Base):
+    """
+    Effective-dated GST rate of a stock item / stock group / ledger / account group.
+    A row applies from effective_from until the subject's next row; dates before a subject's
+    first row (or subjects without rows) use the rate on the master.
+    """
+    __tablename__ = "gst_rate_history"
+
+    id = Column(Integer, primary_key=True, index=True)
+    subject_type = Column(String, nullable=False) # GstSubject
+    subject_id = Column(Integer, nullable=False)
+    effective_from = Column(Date, nullable=False)
+    rate = Column(Float, default=0.0)
+    hsn_code = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_gst_rate_history_subject", "subject_type", "subject_id", "effective_from", unique=True),
+    )
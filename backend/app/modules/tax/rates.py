@@ -0,0 +1,122 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import case, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.modules.accounting.models import AccountGroup, Ledger
+from app.modules.inventory.models import StockGroup, StockItem
+
+# --- Stored Effective GST Rate ---
+# Ledgers and stock items carry effective_gst_rate (own rate if set, else the nearest group
+# rate), so reads never walk group.parent. Groups store the resolved rate of their own chain.
+# A group whose gst_rate / parent changes re-resolves its whole subtree with one recursive
+# CTE per table; a ledger / item that changes only re-reads its group's stored rate.
+
+# (group model, member model, member's own-rate column)
+HIERARCHIES = (
+    (AccountGroup, Ledger, "percentage_of_calculation"),
+    (StockGroup, StockItem, "gst_rate"),
+)
+
+def _own_or(own, fallback):
+    return case((own > 0, own), else_=fallback)
+
+def _subtree_rates(group_model, root_id: Optional[int] = None):
+    """
+    Recursive CTE of (id, rate) for the subtree under root_id, or for every tree when None.
+    The root resolves against its parent's stored rate; every level below against the CTE.
+    """
+    groups = group_model.__table__
+    if root_id is None:
+        anchor = select(groups.c.id, _own_or(groups.c.gst_rate, 0.0).label("rate")).where(groups.c.parent_id == None)
+    else:
+        parent = groups.alias("parent_group")
+        anchor = select(
+            groups.c.id,
+            _own_or(groups.c.gst_rate, func.coalesce(parent.c.effective_gst_rate, 0.0)).label("rate")
+        ).select_from(groups.outerjoin(parent, groups.c.parent_id == parent.c.id)).where(groups.c.id == root_id)
+    tree = anchor.cte("rate_tree", recursive=True)
+    child = groups.alias("child_group")
+    # UNION (not UNION ALL) so a corrupt parent cycle terminates
+    return tree.union(
+        select(child.c.id, _own_or(child.c.gst_rate, tree.c.rate)).where(child.c.parent_id == tree.c.id)
+    )
+
+def _member_rate(group_model, member_model, own_attr: str):
+    groups = group_model.__table__
+    members = member_model.__table__
+    group_rate = select(groups.c.effective_gst_rate).where(groups.c.id == members.c.group_id).scalar_subquery()
+    return _own_or(members.c[own_attr], func.coalesce(group_rate, 0.0))
+
+def propagate_group_rate(conn, group_model, member_model, own_attr: str, root_id: Optional[int] = None):
+    """
+    Re-resolves every group under root_id (all groups when None), then every ledger / item in them.
+    """
+    groups = group_model.__table__
+    members = member_model.__table__
+    tree = _subtree_rates(group_model, root_id)
+    conn.execute(
+        update(groups)
+        .where(groups.c.id.in_(select(tree.c.id)))
+        .values(effective_gst_rate=select(tree.c.rate).where(tree.c.id == groups.c.id).limit(1).scalar_subquery())
+    )
+    stmt = update(members).values(effective_gst_rate=_member_rate(group_model, member_model, own_attr))
+    if root_id is not None:
+        # Full rebuilds cover every row, ungrouped stock items included
+        stmt = stmt.where(members.c.group_id.in_(select(_subtree_rates(group_model, root_id).c.id)))
+    conn.execute(stmt)
+
+def refresh_member_rates(conn, group_model, member_model, own_attr: str, member_ids: Iterable[int]):
+    members = member_model.__table__
+    ids = list(member_ids)
+    if ids:
+        conn.execute(
+            update(members).where(members.c.id.in_(ids)).values(effective_gst_rate=_member_rate(group_model, member_model, own_attr))
+        )
+
+def rebuild_effective_gst_rates(db: Session):
+    """
+    Resolves every stored rate from scratch (startup backfill / after bulk edits to groups).
+    """
+    conn = db.connection()
+    for group_model, member_model, own_attr in HIERARCHIES:
+        propagate_group_rate(conn, group_model, member_model, own_attr)
+    db.commit()
+
+def _changed(obj, *attrs) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+@event.listens_for(Session, "after_flush")
+def _maintain_effective_rates(session, flush_context):
+    # new / dirty and attribute history still describe this flush here
+    touched = []
+    conn = None
+    for group_model, member_model, own_attr in HIERARCHIES:
+        roots = [
+            obj.id for obj in list(session.new) + list(session.dirty)
+            if isinstance(obj, group_model) and (obj in session.new or _changed(obj, "gst_rate", "parent_id"))
+        ]
+        members = [
+            obj.id for obj in list(session.new) + list(session.dirty)
+            if isinstance(obj, member_model) and (obj in session.new or _changed(obj, own_attr, "group_id"))
+        ]
+        if not (roots or members):
+            continue
+        conn = conn or session.connection()
+        for root_id in roots:
+            propagate_group_rate(conn, group_model, member_model, own_attr, root_id)
+        refresh_member_rates(conn, group_model, member_model, own_attr, members)
+        touched.extend((group_model, member_model))
+    if touched:
+        session.info["effective_rate_models"] = tuple(touched)
+
+@event.listens_for(Session, "after_flush_postexec")
+def _expire_effective_rates(session, flush_context):
+    # In-memory rows reload the rates written above on next access
+    models = session.info.pop("effective_rate_models", None)
+    if not models:
+        return
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, models):
+            session.expire(obj, ["effective_gst_rate"])
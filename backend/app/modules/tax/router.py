@@ -1,16 +1,23 @@
+import threading
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Callable, Dict, List, Literal, Optional, Tuple
+from pydantic import BaseModel, Field
 from datetime import date
 
 from app.core.db import get_db
 from app.modules.accounting.models import Ledger, Organization
+from app.modules.accounting.versioning import get_data_version
 from app.modules.inventory.models import StockItem
 from app.modules.tax.engine import calculate_gst, determine_place_of_supply
+from app.modules.tax.history import RATE_SUBJECTS, gst_rate_book
+from app.modules.tax.models import GstRateHistory
+import app.modules.tax.rates # Keeps the stored effective_gst_rate columns current
 
 router = APIRouter()
 
+MAX_BATCH_VOUCHERS = 1000
+
 class TaxEntryRequest(BaseModel):
     ledger_id: int
     amount: float # Absolute amount
@@ -21,6 +28,9 @@ class TaxAnalysisRequest(BaseModel):
     date: date
     entries: List[TaxEntryRequest]
 
+class TaxBatchRequest(BaseModel):
+    vouchers: List[TaxAnalysisRequest] = Field(..., max_length=MAX_BATCH_VOUCHERS)
+
 class TaxLineResponse(BaseModel):
     tax_type: str # IGST, CGST, SGST
     rate: float
@@ -28,47 +38,58 @@ class TaxLineResponse(BaseModel):
     tax_amount: float
     ledger_name: str # Suggested name, e.g. "Output IGST 18%"
 
-@router.post("/calculate", response_model=List[TaxLineResponse])
-def calculate_voucher_tax(req: TaxAnalysisRequest, db: Session = Depends(get_db)):
-    """
-    Analyzes a draft voucher and returns the calculated tax breakdown.
-    """
-    
-    # 1. Fetch Organization State
-    org = db.query(Organization).first()
-    org_state = org.state if org and org.state else "Karnataka" # Default
-    
-    # 2. Identify Party State and Taxable Items
+# --- Master Lookups ---
+# Organization state per (database, data version): the organization table is versioned, so
+# it is read once per change instead of once per call.
+_org_cache_lock = threading.Lock()
+_org_cache: Tuple[Optional[tuple], Optional[str]] = (None, None)
+
+def _org_state(db: Session, version: int) -> str:
+    global _org_cache
+    key = (id(db.get_bind()), version)
+    cached_key, state = _org_cache
+    if state is not None and cached_key == key:
+        return state
+    org = db.query(Organization.state).first()
+    state = org.state if org and org.state else "Karnataka" # Default
+    with _org_cache_lock:
+        _org_cache = (key, state)
+    return state
+
+def _analyze_voucher(
+    req: TaxAnalysisRequest,
+    org_state: str,
+    ledger_states: Dict[int, Optional[str]],
+    item_rate: Callable[[int, date], float]
+) -> List[TaxLineResponse]:
+    # 1. Identify Party State and Taxable Items
     party_state = None
     taxable_value_by_rate = {} # { rate: total_amount }
     
     for e in req.entries:
-        ledger = db.query(Ledger).filter(Ledger.id == e.ledger_id).first()
-        if not ledger: 
+        if e.ledger_id not in ledger_states:
             continue
             
         # Detect Party State
         # Logic: If ledger has state defined, use it.
         # Priority: If multiple ledgers have state, last one wins? 
         # Usually validity check ensures only one party.
-        if ledger.state:
-            party_state = ledger.state
+        if ledger_states[e.ledger_id]:
+            party_state = ledger_states[e.ledger_id]
             
         # Detect Item Rate
         if e.stock_item_id:
-            item = db.query(StockItem).filter(StockItem.id == e.stock_item_id).first()
-            if item:
-                rate = item.effective_gst_rate
-                if rate > 0:
-                    current = taxable_value_by_rate.get(rate, 0.0)
-                    taxable_value_by_rate[rate] = current + e.amount
+            rate = item_rate(e.stock_item_id, req.date)
+            if rate > 0:
+                current = taxable_value_by_rate.get(rate, 0.0)
+                taxable_value_by_rate[rate] = current + e.amount
     
-    # 3. Determine Supply Type
+    # 2. Determine Supply Type
     # If no party state found, assume Intra (Counter Sales)
     supply_type = determine_place_of_supply(org_state, party_state or org_state)
     is_inter_state = (supply_type == "Inter")
     
-    # 4. Calculate Tax
+    # 3. Calculate Tax
     results = []
     
     for rate, amount in taxable_value_by_rate.items():
@@ -101,3 +122,115 @@ def calculate_voucher_tax(req: TaxAnalysisRequest, db: Session = Depends(get_db)
              ))
              
     return results
+
+def calculate_tax_batch(db: Session, vouchers: List[TaxAnalysisRequest]) -> List[List[TaxLineResponse]]:
+    """
+    Tax breakdown for every draft, in input order.
+    All ledgers / items referenced by any draft are loaded with one IN query each.
+    """
+    ledger_ids = {e.ledger_id for v in vouchers for e in v.entries}
+    item_ids = {e.stock_item_id for v in vouchers for e in v.entries if e.stock_item_id}
+    ledger_states = dict(db.query(Ledger.id, Ledger.state).filter(Ledger.id.in_(ledger_ids)).all()) if ledger_ids else {}
+    items = {
+        i.id: i for i in db.query(
+            StockItem.id, StockItem.group_id, StockItem.gst_rate, StockItem.effective_gst_rate
+        ).filter(StockItem.id.in_(item_ids)).all()
+    } if item_ids else {}
+    org_state = _org_state(db, get_data_version(db))
+    book = gst_rate_book(db)
+
+    def item_rate(item_id: int, on_date: date) -> float:
+        item = items.get(item_id)
+        if not item:
+            return 0.0
+        if not book.change_dates:
+            return item.effective_gst_rate or 0.0 # No rate history: the stored rate is current
+        return book.item(item.id, item.group_id, on_date, item.gst_rate)[0]
+
+    return [_analyze_voucher(v, org_state, ledger_states, item_rate) for v in vouchers]
+
+@router.post("/calculate", response_model=List[TaxLineResponse])
+def calculate_voucher_tax(req: TaxAnalysisRequest, db: Session = Depends(get_db)):
+    """
+    Analyzes a draft voucher and returns the calculated tax breakdown.
+    """
+    return calculate_tax_batch(db, [req])[0]
+
+@router.post("/calculate/batch", response_model=List[List[TaxLineResponse]])
+def calculate_voucher_tax_batch(req: TaxBatchRequest, db: Session = Depends(get_db)):
+    """
+    Tax breakdown for many draft vouchers at once (one list of lines per voucher, same order).
+    """
+    return calculate_tax_batch(db, req.vouchers)
+
+# --- GST Rate History ---
+
+class GstRateChange(BaseModel):
+    subject_type: Literal["stock_item", "stock_group", "ledger", "account_group"]
+    subject_id: int
+    effective_from: date
+    rate: float = Field(..., ge=0)
+    hsn_code: Optional[str] = None
+
+class GstRateHistorySchema(GstRateChange):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+# The rate a subject had before its first recorded change starts here
+HISTORY_START = date(1900, 1, 1)
+
+@router.get("/gst-rate-history", response_model=List[GstRateHistorySchema])
+def list_gst_rate_history(
+    subject_type: Optional[str] = None,
+    subject_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    query = db.query(GstRateHistory)
+    if subject_type:
+        query = query.filter(GstRateHistory.subject_type == subject_type)
+    if subject_id is not None:
+        query = query.filter(GstRateHistory.subject_id == subject_id)
+    return query.order_by(GstRateHistory.subject_type, GstRateHistory.subject_id, GstRateHistory.effective_from).all()
+
+@router.post("/gst-rate-history", response_model=GstRateHistorySchema)
+def record_gst_rate_change(change: GstRateChange, db: Session = Depends(get_db)):
+    """
+    Records a rate that applies from `effective_from`.
+    The first change of a subject also records its current rate as the rate before that date,
+    so earlier invoices keep it. The master is left as is: every transaction resolves the
+    rate in force on its own date from this history (GstRateBook), future-dated changes included.
+    Later edits on the master are recorded here as changes effective on the day of the edit.
+    """
+    model, rate_attr = RATE_SUBJECTS[change.subject_type]
+    subject = db.query(model).filter(model.id == change.subject_id).first()
+    if not subject:
+        raise HTTPException(status_code=404, detail=f"{change.subject_type} {change.subject_id} not found")
+    current_hsn = getattr(subject, "hsn_code", None)
+
+    rows = db.query(GstRateHistory).filter(
+        GstRateHistory.subject_type == change.subject_type,
+        GstRateHistory.subject_id == change.subject_id
+    ).order_by(GstRateHistory.effective_from).all()
+    if not rows and change.effective_from > HISTORY_START:
+        db.add(GstRateHistory(
+            subject_type=change.subject_type, subject_id=change.subject_id, effective_from=HISTORY_START,
+            rate=getattr(subject, rate_attr) or 0.0, hsn_code=current_hsn
+        ))
+
+    row = next((r for r in rows if r.effective_from == change.effective_from), None)
+    if row is None:
+        row = GstRateHistory(**change.dict())
+        db.add(row)
+    else:
+        row.rate = change.rate
+        row.hsn_code = change.hsn_code
+    if row.hsn_code is None:
+        # Keep the HSN in force just before this date
+        earlier = [r for r in rows if r.effective_from < change.effective_from]
+        row.hsn_code = earlier[-1].hsn_code if earlier else current_hsn
+
+    db.commit()
+    db.refresh(row)
+    return row
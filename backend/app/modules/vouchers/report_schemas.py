@@ -12,6 +12,9 @@ class VoucherEntrySchema(BaseModel):
     stock_item_name: Optional[str] = None
     quantity: float
     rate: float
+    godown_id: Optional[int] = None
+    unit_id: Optional[int] = None
+    base_quantity: Optional[float] = None
     hsn_code: Optional[str] = None
     gst_rate: Optional[float] = None
 
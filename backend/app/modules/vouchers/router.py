@@ -5,13 +5,16 @@ from datetime import date
 from pydantic import BaseModel
 
 from app.core.db import get_db
-from app.modules.accounting.models import Voucher, VoucherEntry, VoucherType
+from app.modules.accounting.models import Voucher, VoucherEntry, VoucherType, VoucherTypeNature
 # from app.modules.vouchers.schemas import VoucherCreate # defined locally now
 from app.modules.vouchers.report_schemas import VoucherSchema
 from app.modules.auth.deps import get_current_user
 from app.modules.auth.models import User
 from app.modules.auth.permissions import allow_admin
 from app.modules.audit.service import log_change
+from app.modules.accounting.period_close import ensure_period_open
+from app.modules.tax.history import gst_rate_book
+from app.modules.tax.models import GstSubject
 from fastapi.encoders import jsonable_encoder
 
 class VoucherEntryCreate(BaseModel):
@@ -21,6 +24,8 @@ class VoucherEntryCreate(BaseModel):
     stock_item_id: Optional[int] = None
     quantity: float = 0.0
     rate: float = 0.0
+    godown_id: Optional[int] = None
+    unit_id: Optional[int] = None # None = the item's own unit
     
     # Bill Allocations
     bill_allocations: Optional[List['BillAllocationCreate']] = None
@@ -43,6 +48,62 @@ class VoucherCreate(BaseModel):
 
 router = APIRouter()
 
+def base_quantities(db: Session, entries: List[VoucherEntryCreate]) -> List[Optional[float]]:
+    """
+    Each line's quantity in its item's stock unit (None for non-stock lines),
+    via the cached unit converter, so stock reports can SUM one column.
+    """
+    from app.modules.inventory.models import StockItem
+    from app.modules.inventory.units import unit_converter
+
+    item_ids = {e.stock_item_id for e in entries if e.stock_item_id}
+    if not item_ids:
+        return [None] * len(entries)
+    item_units = dict(db.query(StockItem.id, StockItem.unit_id).filter(StockItem.id.in_(item_ids)).all())
+    convert = unit_converter(db)
+
+    result = []
+    for e in entries:
+        if not e.stock_item_id:
+            result.append(None)
+            continue
+        try:
+            result.append(convert(e.quantity, e.unit_id, item_units.get(e.stock_item_id)))
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unit {e.unit_id} is not convertible to the unit of Stock Item {e.stock_item_id}"
+            )
+    return result
+
+def validate_stock_transfer(
+    v_type: VoucherType,
+    entries: List[VoucherEntryCreate],
+    base_qtys: Optional[List[Optional[float]]] = None
+):
+    """
+    A Stock Transfer only moves stock between godowns: every stock line names a godown,
+    and each item leaves (Cr) and arrives (Dr) in equal quantity (in its stock unit).
+    """
+    if v_type.nature != VoucherTypeNature.STOCK_TRANSFER:
+        return
+    moved = {}
+    for k, e in enumerate(entries):
+        if not e.stock_item_id:
+            continue
+        if e.godown_id is None:
+            raise HTTPException(status_code=400, detail="Stock Transfer lines need a godown")
+        qty = base_qtys[k] if base_qtys else e.quantity
+        moved[e.stock_item_id] = moved.get(e.stock_item_id, 0.0) + (qty if e.is_debit else -qty)
+    if not moved:
+        raise HTTPException(status_code=400, detail="Stock Transfer has no stock lines")
+    unbalanced = [item_id for item_id, qty in moved.items() if abs(qty) > 1e-9]
+    if unbalanced:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Stock Transfer quantities out and in must match for items {unbalanced}"
+        )
+
 @router.get("/day-book", response_model=List[VoucherSchema])
 def get_day_book(
     date: date = Query(..., description="The date to fetch vouchers for"),
@@ -94,6 +155,9 @@ def create_voucher(
     v_type = db.query(VoucherType).filter(VoucherType.id == voucher_in.voucher_type_id).first()
     if not v_type:
         raise HTTPException(status_code=404, detail="Voucher Type not found")
+    ensure_period_open(db, voucher_in.date)
+    base_qtys = base_quantities(db, voucher_in.entries)
+    validate_stock_transfer(v_type, voucher_in.entries, base_qtys)
 
     # 2. Generate Number (Simple Auto-Increment for now)
     # Tally Parity: Logic is complex (Daily/Monthly/Yearly/Manual).
@@ -127,7 +191,7 @@ def create_voucher(
     # 4. Create Entries
     from app.modules.accounting.models import BillAllocation
     
-    for entry in voucher_in.entries:
+    for entry, base_qty in zip(voucher_in.entries, base_qtys):
         db_entry = VoucherEntry(
             voucher_id=voucher.id,
             ledger_id=entry.ledger_id,
@@ -135,7 +199,10 @@ def create_voucher(
             is_debit=entry.is_debit,
             stock_item_id=entry.stock_item_id,
             quantity=entry.quantity,
-            rate=entry.rate
+            rate=entry.rate,
+            godown_id=entry.godown_id,
+            unit_id=entry.unit_id,
+            base_quantity=base_qty
         )
         db.add(db_entry)
         db.flush() # Need ID for Bill Allocations
@@ -144,6 +211,7 @@ def create_voucher(
             for bill in entry.bill_allocations:
                 db_bill = BillAllocation(
                     voucher_entry_id=db_entry.id,
+                    ledger_id=db_entry.ledger_id,
                     ref_type=bill.ref_type,
                     ref_name=bill.ref_name,
                     amount=bill.amount,
@@ -163,6 +231,12 @@ def create_voucher(
         jsonable_encoder(voucher_in)
     )
 
+    from app.modules.accounting.search import record_usage
+    record_usage(
+        [e.ledger_id for e in voucher_in.entries],
+        [e.stock_item_id for e in voucher_in.entries if e.stock_item_id]
+    )
+
     return {"status": "success", "id": voucher.id, "number": final_v_number}
 
 from app.modules.vouchers.report_schemas import VoucherDetailSchema
@@ -182,8 +256,12 @@ def get_voucher_by_id(id: int, db: Session = Depends(get_db)):
     # VoucherEntryDetailSchema expects `ledger_name` (str) but model has `ledger` (Obj).
     # We can do a transformation here.
     
+    book = gst_rate_book(db) # Item rate / HSN as of the voucher date
     entries_data = []
     for e in voucher.entries:
+        item_rate, item_hsn = book.own(
+            GstSubject.STOCK_ITEM, e.stock_item.id, voucher.date, e.stock_item.gst_rate, e.stock_item.hsn_code
+        ) if e.stock_item else (None, None)
         entries_data.append({
             "id": e.id,
             "ledger_id": e.ledger_id,
@@ -194,8 +272,11 @@ def get_voucher_by_id(id: int, db: Session = Depends(get_db)):
             "stock_item_name": e.stock_item.name if e.stock_item else None,
             "quantity": e.quantity,
             "rate": e.rate,
-            "hsn_code": e.stock_item.hsn_code if e.stock_item else None,
-            "gst_rate": e.stock_item.gst_rate if e.stock_item else None
+            "godown_id": e.godown_id,
+            "unit_id": e.unit_id,
+            "base_quantity": e.base_quantity,
+            "hsn_code": item_hsn,
+            "gst_rate": item_rate
         })
         
     return {
@@ -217,6 +298,9 @@ def update_voucher(
     voucher = db.query(Voucher).filter(Voucher.id == id).first()
     if not voucher:
         raise HTTPException(status_code=404, detail="Voucher not found")
+    ensure_period_open(db, voucher.date, voucher_in.date)
+    base_qtys = base_quantities(db, voucher_in.entries)
+    validate_stock_transfer(voucher.voucher_type, voucher_in.entries, base_qtys)
 
     # 1. Update Header
     voucher.date = voucher_in.date
@@ -232,7 +316,7 @@ def update_voucher(
         db.delete(e)
     db.flush() # Ensure deletion happens before re-insertion
     
-    for entry in voucher_in.entries:
+    for entry, base_qty in zip(voucher_in.entries, base_qtys):
         db_entry = VoucherEntry(
             voucher_id=voucher.id,
             ledger_id=entry.ledger_id,
@@ -240,7 +324,10 @@ def update_voucher(
             is_debit=entry.is_debit,
             stock_item_id=entry.stock_item_id,
             quantity=entry.quantity,
-            rate=entry.rate
+            rate=entry.rate,
+            godown_id=entry.godown_id,
+            unit_id=entry.unit_id,
+            base_quantity=base_qty
         )
         db.add(db_entry)
         db.flush()
@@ -250,6 +337,7 @@ def update_voucher(
             for bill in entry.bill_allocations:
                 db_bill = BillAllocation(
                     voucher_entry_id=db_entry.id,
+                    ledger_id=db_entry.ledger_id,
                     ref_type=bill.ref_type,
                     ref_name=bill.ref_name,
                     amount=bill.amount,
@@ -280,9 +368,13 @@ def delete_voucher(
     voucher = db.query(Voucher).filter(Voucher.id == id).first()
     if not voucher:
         raise HTTPException(status_code=404, detail="Voucher not found")
+    ensure_period_open(db, voucher.date)
         
     # Cascade delete is usually handled by DB, but explicit is safer for logic
-    db.query(VoucherEntry).filter(VoucherEntry.voucher_id == id).delete()
+    from app.modules.accounting.models import BillAllocation
+    entry_ids = db.query(VoucherEntry.id).filter(VoucherEntry.voucher_id == id)
+    db.query(BillAllocation).filter(BillAllocation.voucher_entry_id.in_(entry_ids)).delete(synchronize_session=False)
+    # Entries go through the ORM cascade so the stock balance listener sees them
     db.delete(voucher)
     db.commit()
     
@@ -0,0 +1,84 @@
+import sys
+import os
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Response
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry
+import app.modules.inventory.models # units / godowns / stock item FKs
+from app.modules.banking.router import get_bank_entries
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_bank_entries():
+    print("--- Testing Bank Reconciliation Listing ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    assets = AccountGroup(name="BE Bank Accounts", nature="Assets")
+    db.add(assets)
+    db.flush()
+    bank = Ledger(name="BE Current A/c", group_id=assets.id)
+    party = Ledger(name="BE Customer", group_id=assets.id)
+    vt = VoucherType(name="BE Receipt", nature="Receipt")
+    db.add_all([bank, party, vt])
+    db.flush()
+
+    start = date(2024, 4, 1)
+    for n in range(30):
+        v = Voucher(voucher_type_id=vt.id, date=start + timedelta(days=n), voucher_number=f"BE/{n}")
+        db.add(v)
+        db.flush()
+        # Every third line is still uncleared; the rest cleared two days later
+        cleared = None if n % 3 == 0 else v.date + timedelta(days=2)
+        db.add_all([
+            VoucherEntry(voucher_id=v.id, ledger_id=bank.id, amount=100 + n, is_debit=True,
+                         bank_date=cleared, instrument_number=f"CHQ{n}"),
+            VoucherEntry(voucher_id=v.id, ledger_id=party.id, amount=100 + n, is_debit=False),
+        ])
+    db.commit()
+
+    # Uncleared (10) + cleared between 10th and 19th April (n = 8..17 minus uncleared 9, 12, 15)
+    bank_id = bank.id
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    response = Response()
+    rows = get_bank_entries(bank_id, response, start_date=date(2024, 4, 10), end_date=date(2024, 4, 19),
+                            offset=0, limit=500, db=db)
+    event.remove(engine, "before_cursor_execute", listener)
+    print("Rows:", len(rows), "Queries:", len(statements))
+    assert len(statements) == 2 # count + page, no lazy loads
+    assert response.headers["X-Total-Count"] == "17"
+    assert len(rows) == 17
+    assert [r.voucher_number for r in rows[:3]] == ["BE/0", "BE/3", "BE/6"]
+    assert rows[0].particulars == "BE Customer"
+    assert rows[0].debit == 100 and rows[0].credit == 0 and rows[0].instrument_number == "CHQ0"
+    assert all(r.bank_date is None or date(2024, 4, 10) <= r.bank_date <= date(2024, 4, 19) for r in rows)
+
+    # Paging keeps voucher date order
+    page = get_bank_entries(bank.id, Response(), start_date=date(2024, 4, 10), end_date=date(2024, 4, 19),
+                            offset=15, limit=5, db=db)
+    assert [r.id for r in page] == [r.id for r in rows[15:]]
+
+    # Without a range every line is listed
+    everything = Response()
+    get_bank_entries(bank.id, everything, start_date=None, end_date=None, offset=0, limit=1, db=db)
+    assert everything.headers["X-Total-Count"] == "30"
+
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM voucher_entries WHERE ledger_id = :l AND bank_date IS NULL"
+    ), {"l": bank.id}).fetchall()
+    assert any("ix_voucher_entries_ledger_bank_date" in str(row) for row in plan), plan
+
+    db.close()
+    print("Bank Reconciliation Listing Passed.")
+
+if __name__ == "__main__":
+    test_bank_entries()
@@ -0,0 +1,131 @@
+import sys
+import os
+import io
+import json
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry
+import app.modules.inventory.models # units / godowns / stock item FKs
+import app.modules.auth.models # audit log user FK
+from app.modules.banking.router import apply_statement_matches, match_bank_statement
+from app.modules.banking.schemas import ReconcileRequest
+from app.modules.banking.statement import match_statement, parse_statement
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def upload(text):
+    return UploadFile(file=io.BytesIO(text.encode()), filename="statement.csv")
+
+def test_bank_statement():
+    print("--- Testing Bank Statement Import ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    assets = AccountGroup(name="BS Bank Accounts", nature="Assets")
+    db.add(assets)
+    db.flush()
+    bank = Ledger(name="BS Current A/c", group_id=assets.id)
+    party = Ledger(name="BS Party", group_id=assets.id)
+    vt = VoucherType(name="BS Payment", nature="Payment")
+    db.add_all([bank, party, vt])
+    db.flush()
+
+    def post(number, day, amount, is_debit, instrument=None):
+        v = Voucher(voucher_type_id=vt.id, date=day, voucher_number=number)
+        db.add(v)
+        db.flush()
+        e = VoucherEntry(voucher_id=v.id, ledger_id=bank.id, amount=amount, is_debit=is_debit, instrument_number=instrument)
+        db.add_all([e, VoucherEntry(voucher_id=v.id, ledger_id=party.id, amount=amount, is_debit=not is_debit)])
+        db.flush()
+        return e.id
+
+    d = date(2024, 5, 1)
+    cheque = post("BS/1", d, 5000, False, "000451")  # cheque issued
+    receipt = post("BS/2", d, 1200, True)            # deposit, no reference
+    twin_a = post("BS/3", d, 300, False)             # two identical withdrawals
+    twin_b = post("BS/4", d + timedelta(days=2), 300, False)
+    post("BS/5", d, 999, True)                       # not on the statement
+    db.commit()
+
+    statement = "\n".join([
+        "Txn Date,Narration,Chq./Ref.No.,Withdrawal Amt,Deposit Amt",
+        "03/05/2024,CHQ PAID,451,\"5,000.00\",",
+        "02/05/2024,NEFT IN,,,1200.00",
+        "04/05/2024,ATM,,300.00,",
+        "05/05/2024,ATM,,300.00,",
+        "06/05/2024,BANK CHARGES,,59.00,",
+    ])
+    result = match_bank_statement(bank.id, upload(statement), columns=None, date_window_days=5, db=db)
+    print("Matched", result["matched"], "of", result["lines"])
+    by_entry = {m["entry_id"]: m for m in result["matches"]}
+    assert by_entry[cheque]["basis"] == "instrument" and by_entry[cheque]["confidence"] == 1.0
+    assert by_entry[cheque]["bank_date"] == date(2024, 5, 3)
+    assert by_entry[receipt]["basis"] == "amount_date" and by_entry[receipt]["confidence"] == 0.8
+    assert {twin_a, twin_b} <= set(by_entry) # each ATM line claims its own entry
+    assert by_entry[twin_b]["confidence"] == 0.5 # nearest of two candidates for the first ATM line
+    assert [u["description"] for u in result["unmatched"]] == ["BANK CHARGES"]
+
+    # Generic mapping: one signed amount column, explicit date format
+    mapped = "When,What,Value\n2024-05-02,Deposit,1200\n"
+    columns = json.dumps({"date": "When", "description": "What", "amount": "Value", "date_format": "%Y-%m-%d"})
+    result = match_bank_statement(bank.id, upload(mapped), columns=columns, date_window_days=5, db=db)
+    assert [m["entry_id"] for m in result["matches"]] == [receipt]
+
+    try:
+        match_bank_statement(bank.id, upload("Foo,Bar\n1,2\n"), columns=None, date_window_days=5, db=db)
+        assert False, "Statement without known columns accepted"
+    except HTTPException as e:
+        assert e.status_code == 400
+
+    user = SimpleNamespace(id=None)
+    # Confirmed matches in one bulk update; an already reconciled entry is skipped
+    applied = apply_statement_matches([
+        ReconcileRequest(entry_id=cheque, bank_date=date(2024, 5, 3)),
+        ReconcileRequest(entry_id=receipt, bank_date=date(2024, 5, 2)),
+    ], db=db, current_user=user)
+    assert applied["reconciled"] == 2
+    again = apply_statement_matches([ReconcileRequest(entry_id=cheque, bank_date=date(2024, 6, 1))], db=db, current_user=user)
+    assert again["reconciled"] == 0 and again["already_reconciled"] == [cheque]
+    assert db.query(VoucherEntry.bank_date).filter(VoucherEntry.id == cheque).scalar() == date(2024, 5, 3)
+
+    # 50k statement lines against 50k unreconciled entries
+    n = 50000
+    start_id = 1000
+    db.execute(insert(Voucher), [
+        {"id": start_id + i, "voucher_type_id": vt.id, "date": date(2024, 7, 1) + timedelta(days=i % 30), "voucher_number": f"BULK/{i}"}
+        for i in range(n)
+    ])
+    db.execute(insert(VoucherEntry), [
+        {"voucher_id": start_id + i, "ledger_id": bank.id, "amount": 10 + i % 5000, "is_debit": i % 2 == 0,
+         "instrument_number": str(100000 + i) if i % 4 == 0 else None}
+        for i in range(n)
+    ])
+    db.commit()
+    rows = ["Date,Description,Cheque No,Debit,Credit"]
+    for i in range(n):
+        day = (date(2024, 7, 1) + timedelta(days=i % 30 + 1)).strftime("%d/%m/%Y")
+        amount = f"{10 + i % 5000:.2f}"
+        rows.append(f"{day},LINE {i},{100000 + i if i % 4 == 0 else ''},{'' if i % 2 == 0 else amount},{amount if i % 2 == 0 else ''}")
+    started = time.perf_counter()
+    lines = parse_statement("\n".join(rows))
+    result = match_statement(db, bank.id, lines, 5)
+    elapsed = time.perf_counter() - started
+    print(f"Matched {result['matched']} of {n} lines in {elapsed:.2f}s")
+    assert result["matched"] == n
+    assert elapsed < 10
+
+    db.close()
+    print("Bank Statement Import Passed.")
+
+if __name__ == "__main__":
+    test_bank_statement()
@@ -0,0 +1,82 @@
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry
+import app.modules.inventory.models # units / godowns / stock item FKs
+from app.modules.banking.router import get_reconciliation_summary
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_brs_summary():
+    print("--- Testing Bank Reconciliation Summary ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    assets = AccountGroup(name="BR Bank Accounts", nature="Assets")
+    db.add(assets)
+    db.flush()
+    bank = Ledger(name="BR Current A/c", group_id=assets.id, opening_balance=10000, opening_balance_is_dr=True)
+    idle = Ledger(name="BR Idle A/c", group_id=assets.id, opening_balance=500, opening_balance_is_dr=False)
+    party = Ledger(name="BR Party", group_id=assets.id)
+    vt = VoucherType(name="BR Journal", nature="Journal")
+    db.add_all([bank, idle, party, vt])
+    db.flush()
+
+    def post(day, amount, is_debit, bank_date=None):
+        v = Voucher(voucher_type_id=vt.id, date=day, voucher_number=f"BR/{day}/{amount}")
+        db.add(v)
+        db.flush()
+        db.add_all([
+            VoucherEntry(voucher_id=v.id, ledger_id=bank.id, amount=amount, is_debit=is_debit, bank_date=bank_date),
+            VoucherEntry(voucher_id=v.id, ledger_id=party.id, amount=amount, is_debit=not is_debit),
+        ])
+
+    post(date(2024, 6, 5), 4000, True, date(2024, 6, 6))    # deposit, cleared
+    post(date(2024, 6, 20), 1500, True)                     # deposit, uncleared
+    post(date(2024, 6, 25), 2500, False, date(2024, 7, 3))  # cheque, clears after month end
+    post(date(2024, 6, 28), 700, False)                     # cheque, uncleared
+    post(date(2024, 7, 10), 9999, True)                     # after as_of, ignored
+    db.commit()
+    bank_id, idle_id = bank.id, idle.id
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    summary = get_reconciliation_summary(bank_id, as_of=date(2024, 6, 30), db=db)
+    event.remove(engine, "before_cursor_execute", listener)
+    print(summary)
+    assert len(statements) == 1
+    assert summary.balance_as_per_books == 10000 + 4000 + 1500 - 2500 - 700
+    assert (summary.uncleared_deposits, summary.uncleared_deposit_count) == (1500, 1)
+    assert (summary.uncleared_payments, summary.uncleared_payment_count) == (3200, 2)
+    assert summary.balance_as_per_bank == 12300 - 1500 + 3200
+
+    # A week later the first cheque has cleared
+    later = get_reconciliation_summary(bank_id, as_of=date(2024, 7, 5), db=db)
+    assert later.uncleared_payments == 700 and later.balance_as_per_bank == 12300 - 1500 + 700
+
+    # No entries: only the (credit) opening balance
+    empty = get_reconciliation_summary(idle_id, as_of=date(2024, 6, 30), db=db)
+    assert empty.balance_as_per_books == -500 and empty.balance_as_per_bank == -500
+    assert empty.uncleared_deposit_count == 0
+
+    try:
+        get_reconciliation_summary(9999, as_of=None, db=db)
+        assert False, "Unknown ledger accepted"
+    except HTTPException as e:
+        assert e.status_code == 404
+
+    db.close()
+    print("Bank Reconciliation Summary Passed.")
+
+if __name__ == "__main__":
+    test_brs_summary()
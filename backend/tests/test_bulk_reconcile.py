@@ -0,0 +1,99 @@
+import sys
+import os
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry
+from app.modules.accounting.versioning import get_data_version
+from app.modules.audit.models import AuditLog
+import app.modules.inventory.models # units / godowns / stock item FKs
+import app.modules.auth.models # audit log user FK
+from app.modules.banking.router import reconcile_entries
+from app.modules.banking.schemas import ReconcileRequest
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+N = 20000
+
+def test_bulk_reconcile():
+    print("--- Testing Bulk Bank Reconciliation ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    user = SimpleNamespace(id=None)
+
+    assets = AccountGroup(name="BR Bank Accounts", nature="Assets")
+    db.add(assets)
+    db.flush()
+    bank = Ledger(name="BR Bank", group_id=assets.id)
+    vt = VoucherType(name="BR Payment", nature="Payment")
+    db.add_all([bank, vt])
+    db.commit()
+    bank_id, vt_id = bank.id, vt.id
+
+    start_day = date(2024, 4, 1)
+    db.execute(insert(Voucher), [
+        {"id": i + 1, "voucher_type_id": vt_id, "date": start_day + timedelta(days=i % 90), "voucher_number": f"BR/{i}"}
+        for i in range(N)
+    ])
+    db.execute(insert(VoucherEntry), [
+        {"id": i + 1, "voucher_id": i + 1, "ledger_id": bank_id, "amount": 100 + i % 50, "is_debit": False,
+         "bank_date": date(2024, 4, 2) if i < 10 else None}
+        for i in range(N)
+    ])
+    db.commit()
+
+    # Every bank entry in one request, plus two unknown ids and a repeated one
+    reqs = [ReconcileRequest(entry_id=i + 1, bank_date=start_day + timedelta(days=i % 90 + 1)) for i in range(N)]
+    reqs += [ReconcileRequest(entry_id=N + 500, bank_date=start_day), ReconcileRequest(entry_id=N + 501, bank_date=start_day)]
+    reqs.append(ReconcileRequest(entry_id=N, bank_date=date(2024, 9, 1))) # last date wins
+
+    version = get_data_version(db)
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    started = time.perf_counter()
+    result = reconcile_entries(reqs, db=db, current_user=user)
+    elapsed = time.perf_counter() - started
+    event.remove(engine, "before_cursor_execute", listener)
+    print(f"Reconciled {result['reconciled']} entries in {elapsed:.2f}s with {len(statements)} statements")
+
+    assert result["reconciled"] == N - 10
+    assert result["message"] == f"Reconciled {N - 10} entries"
+    assert result["not_found"] == [N + 500, N + 501]
+    assert result["already_reconciled"] == list(range(1, 11))
+    # Chunked SELECTs + executemany UPDATEs, never a statement per entry
+    assert len(statements) < 60, len(statements)
+    assert elapsed < 5
+    assert get_data_version(db) > version
+
+    # Earlier bank dates are kept; new ones written as sent
+    rows = dict(db.query(VoucherEntry.id, VoucherEntry.bank_date).filter(VoucherEntry.id.in_([1, 11, N])))
+    assert rows == {1: date(2024, 4, 2), 11: start_day + timedelta(days=11), N: date(2024, 9, 1)}
+    assert db.query(VoucherEntry).filter(VoucherEntry.ledger_id == bank_id, VoucherEntry.bank_date == None).count() == 0
+
+    # One audit record for the batch
+    logs = db.query(AuditLog).filter(AuditLog.entity_type == "BankReconciliation").all()
+    assert len(logs) == 1
+    assert logs[0].action == "RECONCILE" and logs[0].entity_id == bank_id
+    assert logs[0].details["reconciled"] == N - 10
+    assert len(logs[0].details["entries"]) == N - 10
+    assert logs[0].details["not_found"] == [N + 500, N + 501]
+
+    # Nothing left to do: reported, not logged
+    again = reconcile_entries([ReconcileRequest(entry_id=11, bank_date=date(2024, 9, 9))], db=db, current_user=user)
+    assert again["reconciled"] == 0 and again["already_reconciled"] == [11]
+    assert db.query(AuditLog).filter(AuditLog.entity_type == "BankReconciliation").count() == 1
+
+    db.close()
+    print("Bulk Reconcile Passed.")
+
+if __name__ == "__main__":
+    test_bulk_reconcile()
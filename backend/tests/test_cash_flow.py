@@ -0,0 +1,93 @@
+import sys
+import os
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry, BillAllocation
+from app.modules.analytics.router import _compute_cash_flow
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_cash_flow_buckets():
+    print("--- Testing Cash Flow ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    assets = AccountGroup(name="Current Assets", nature="Assets")
+    income = AccountGroup(name="CF Income", nature="Income")
+    db.add_all([assets, income])
+    db.flush()
+    cash_grp = AccountGroup(name="Cash-in-hand", nature="Assets", parent_id=assets.id)
+    bank_grp = AccountGroup(name="Bank Accounts", nature="Assets", parent_id=assets.id)
+    db.add_all([cash_grp, bank_grp])
+    db.flush()
+    cash = Ledger(name="CF Cash", group_id=cash_grp.id)
+    bank = Ledger(name="CF Bank", group_id=bank_grp.id)
+    party = Ledger(name="CF Party", group_id=assets.id)
+    sales = Ledger(name="CF Sales", group_id=income.id)
+    vt = VoucherType(name="CF Journal", nature="Journal")
+    db.add_all([cash, bank, party, sales, vt])
+    db.flush()
+
+    def post(on, cash_ledger, amount, inflow):
+        v = Voucher(voucher_type_id=vt.id, date=on, voucher_number=f"CF/{on}/{amount}")
+        db.add(v)
+        db.flush()
+        db.add(VoucherEntry(voucher_id=v.id, ledger_id=cash_ledger.id, amount=amount, is_debit=inflow))
+        e = VoucherEntry(voucher_id=v.id, ledger_id=sales.id, amount=amount, is_debit=not inflow)
+        db.add(e)
+
+    post(date(2024, 4, 1), cash, 100.0, True)   # Mon, ISO week 14
+    post(date(2024, 4, 3), bank, 40.0, False)   # week 14
+    post(date(2024, 4, 9), bank, 250.0, True)   # week 15
+    post(date(2024, 5, 2), cash, 30.0, False)
+    post(date(2024, 6, 1), cash, 999.0, True)   # outside to_date
+    db.commit()
+
+    res = _compute_cash_flow(db, date(2024, 4, 1), date(2024, 5, 31))
+    assert [(i.month, i.inflow, i.outflow) for i in res.items] == [("2024-04", 350.0, 40.0), ("2024-05", 0.0, 30.0)]
+    assert res.net_flow == 280.0
+    assert {l.name: (l.inflow, l.outflow) for l in res.ledgers} == {"CF Bank": (250.0, 40.0), "CF Cash": (100.0, 30.0)}
+
+    weekly = _compute_cash_flow(db, date(2024, 4, 1), date(2024, 4, 30), "week")
+    assert [(i.month, i.net) for i in weekly.items] == [("2024-W14", 60.0), ("2024-W15", 250.0)]
+
+    daily = _compute_cash_flow(db, date(2024, 4, 1), date(2024, 4, 30), "day")
+    assert [i.month for i in daily.items] == ["2024-04-01", "2024-04-03", "2024-04-09"]
+
+    # Projected: open bills by due date (overdue -> today)
+    today = date.today()
+    v = Voucher(voucher_type_id=vt.id, date=today - timedelta(days=60), voucher_number="INV/1")
+    db.add(v)
+    db.flush()
+    e = VoucherEntry(voucher_id=v.id, ledger_id=party.id, amount=500.0, is_debit=True)
+    db.add(e)
+    db.flush()
+    db.add(BillAllocation(voucher_entry_id=e.id, ledger_id=party.id, ref_type="New Ref", ref_name="INV/1",
+                          amount=500.0, credit_period=today - timedelta(days=30)))
+    e2 = VoucherEntry(voucher_id=v.id, ledger_id=party.id, amount=200.0, is_debit=False)
+    db.add(e2)
+    db.flush()
+    db.add(BillAllocation(voucher_entry_id=e2.id, ledger_id=party.id, ref_type="New Ref", ref_name="ADV/1",
+                          amount=200.0, credit_period=today + timedelta(days=400)))
+    db.commit()
+
+    projected = _compute_cash_flow(db, granularity="day", mode="projected")
+    assert projected.mode == "projected"
+    assert [(i.month, i.inflow, i.outflow) for i in projected.items] == [
+        (today.isoformat(), 500.0, 0.0), ((today + timedelta(days=400)).isoformat(), 0.0, 200.0)
+    ]
+    assert projected.ledgers[0].name == "CF Party"
+    assert len(_compute_cash_flow(db, to_date=today + timedelta(days=30), mode="projected").items) == 1
+
+    db.close()
+    print("SUCCESS: Cash flow aggregated per bucket and ledger")
+
+if __name__ == "__main__":
+    test_cash_flow_buckets()
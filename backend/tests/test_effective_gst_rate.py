@@ -0,0 +1,102 @@
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger
+from app.modules.inventory.models import StockGroup, StockItem
+from app.modules.tax.rates import rebuild_effective_gst_rates
+from app.modules.tax.router import TaxAnalysisRequest, TaxEntryRequest, calculate_voucher_tax
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_effective_gst_rate():
+    print("--- Testing Stored Effective GST Rate ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    # Income > Services (18%) > Consulting (inherits) ; Training (own 5%)
+    income = AccountGroup(name="EG Income", nature="Income")
+    db.add(income)
+    db.flush()
+    services = AccountGroup(name="EG Services", nature="Income", parent_id=income.id, gst_rate=18.0)
+    db.add(services)
+    db.flush()
+    consulting = AccountGroup(name="EG Consulting", nature="Income", parent_id=services.id)
+    db.add(consulting)
+    db.flush()
+    advisory = Ledger(name="EG Advisory", group_id=consulting.id)
+    training = Ledger(name="EG Training", group_id=consulting.id, percentage_of_calculation=5.0)
+    party = Ledger(name="EG Party", group_id=income.id, state="Maharashtra")
+    db.add_all([advisory, training, party])
+
+    goods = StockGroup(name="EG Goods", gst_rate=12.0)
+    db.add(goods)
+    db.flush()
+    bolts = StockItem(name="EG Bolts", group_id=goods.id)
+    nuts = StockItem(name="EG Nuts", group_id=goods.id, gst_rate=28.0)
+    loose = StockItem(name="EG Loose", gst_rate=3.0)
+    db.add_all([bolts, nuts, loose])
+    db.commit()
+
+    assert advisory.effective_gst_rate == 18.0
+    assert training.effective_gst_rate == 5.0
+    assert party.effective_gst_rate == 0.0
+    assert (bolts.effective_gst_rate, nuts.effective_gst_rate, loose.effective_gst_rate) == (12.0, 28.0, 3.0)
+
+    # A rate change on a group reaches the whole subtree; own rates still win
+    services.gst_rate = 12.0
+    db.commit()
+    assert consulting.effective_gst_rate == 12.0
+    assert advisory.effective_gst_rate == 12.0
+    assert training.effective_gst_rate == 5.0
+
+    # Moving a group re-resolves it against its new parent
+    consulting.parent_id = income.id
+    db.commit()
+    assert advisory.effective_gst_rate == 0.0
+
+    # Ledger / item edits re-read their group's stored rate
+    advisory.group_id = services.id
+    bolts.group_id = None
+    db.commit()
+    assert advisory.effective_gst_rate == 12.0
+    assert bolts.effective_gst_rate == 0.0
+
+    # Reads are plain column reads: loading ledgers fires no group queries
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    db.expire_all()
+    rates = [l.effective_gst_rate for l in db.query(Ledger).all()]
+    event.remove(engine, "before_cursor_execute", listener)
+    assert len(statements) == 1, statements
+    assert sorted(rates) == [0.0, 5.0, 12.0]
+
+    # Full rebuild agrees with the incremental state
+    db.query(Ledger).update({Ledger.effective_gst_rate: -1.0})
+    db.commit()
+    rebuild_effective_gst_rates(db)
+    assert sorted(r for (r,) in db.query(Ledger.effective_gst_rate)) == [0.0, 5.0, 12.0]
+
+    # Tax analysis: nuts at 28%, bolts (now ungrouped, 0%) ignored, inter-state party
+    lines = calculate_voucher_tax(TaxAnalysisRequest(date=date(2024, 4, 1), entries=[
+        TaxEntryRequest(ledger_id=party.id, amount=1280, is_debit=True),
+        TaxEntryRequest(ledger_id=advisory.id, amount=1000, is_debit=False, stock_item_id=nuts.id),
+        TaxEntryRequest(ledger_id=advisory.id, amount=500, is_debit=False, stock_item_id=bolts.id),
+    ]), db=db)
+    print("Tax lines:", [(l.tax_type, l.rate, l.tax_amount) for l in lines])
+    assert [(l.tax_type, l.rate) for l in lines] == [("IGST", 28.0)]
+    assert abs(lines[0].tax_amount - 280.0) < 0.01
+
+    db.close()
+    print("Effective GST Rate Passed.")
+
+if __name__ == "__main__":
+    test_effective_gst_rate()
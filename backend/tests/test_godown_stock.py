@@ -0,0 +1,106 @@
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry
+from app.modules.inventory.models import Godown, StockItem
+from app.modules.inventory.router import read_godown_stock
+from app.modules.inventory.valuation import calculate_item_valuation
+from app.modules.vouchers.router import VoucherEntryCreate, validate_stock_transfer
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def post(db, vtype, on, number, ledger, lines):
+    v = Voucher(voucher_type_id=vtype.id, date=on, voucher_number=number)
+    db.add(v)
+    db.flush()
+    for item, qty, amount, is_debit, godown in lines:
+        db.add(VoucherEntry(
+            voucher_id=v.id, ledger_id=ledger.id, amount=amount, is_debit=is_debit,
+            stock_item_id=item.id, quantity=qty, godown_id=godown.id if godown else None
+        ))
+    db.commit()
+
+def test_godown_stock():
+    print("--- Testing Godown-wise Stock ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    grp = AccountGroup(name="GD Stock", nature="Assets")
+    db.add(grp)
+    db.flush()
+    ledger = Ledger(name="GD Stock Ledger", group_id=grp.id)
+    north = Godown(name="GD North")
+    south = Godown(name="GD South")
+    db.add_all([ledger, north, south])
+    db.flush()
+    wh1 = Godown(name="GD North WH1", parent_id=north.id)
+    wh2 = Godown(name="GD North WH2", parent_id=north.id)
+    item = StockItem(name="GD Widget", opening_qty=100, opening_rate=10, opening_value=1000)
+    vt_pur = VoucherType(name="GD Purchase", nature="Purchase")
+    vt_sal = VoucherType(name="GD Sales", nature="Sales")
+    vt_tr = VoucherType(name="GD Transfer", nature="Stock Transfer")
+    db.add_all([wh1, wh2, item, vt_pur, vt_sal, vt_tr])
+    db.commit()
+
+    # Transfers must balance per item and name godowns on every stock line
+    try:
+        validate_stock_transfer(vt_tr, [
+            VoucherEntryCreate(ledger_id=ledger.id, amount=10, is_debit=False, stock_item_id=item.id, quantity=5, godown_id=wh1.id),
+            VoucherEntryCreate(ledger_id=ledger.id, amount=10, is_debit=True, stock_item_id=item.id, quantity=4, godown_id=wh2.id),
+        ])
+        assert False, "Unbalanced transfer accepted"
+    except HTTPException as e:
+        assert e.status_code == 400
+    try:
+        validate_stock_transfer(vt_tr, [
+            VoucherEntryCreate(ledger_id=ledger.id, amount=10, is_debit=True, stock_item_id=item.id, quantity=5),
+            VoucherEntryCreate(ledger_id=ledger.id, amount=10, is_debit=False, stock_item_id=item.id, quantity=5),
+        ])
+        assert False, "Transfer without godowns accepted"
+    except HTTPException as e:
+        assert e.status_code == 400
+
+    post(db, vt_pur, date(2024, 4, 1), "GD/P1", ledger, [(item, 50.0, 600.0, True, wh1)])
+    post(db, vt_tr, date(2024, 4, 2), "GD/T1", ledger, [
+        (item, 20.0, 240.0, False, wh1), (item, 20.0, 240.0, True, wh2)
+    ])
+    post(db, vt_sal, date(2024, 4, 3), "GD/S1", ledger, [(item, 10.0, 300.0, False, wh2)])
+
+    res = read_godown_stock(db=db)
+    by_name = {g["name"]: g for g in res["godowns"]}
+    print({name: (g["quantity"], g["total_quantity"]) for name, g in by_name.items()})
+
+    assert res["godowns"][0]["name"] == "Main Location"
+    assert by_name["Main Location"]["quantity"] == 100.0
+    assert by_name["GD North WH1"]["quantity"] == 30.0
+    assert by_name["GD North WH2"]["quantity"] == 10.0
+    assert by_name["GD North"]["quantity"] == 0.0
+    assert by_name["GD North"]["total_quantity"] == 40.0
+    assert by_name["GD North"]["items"][0]["total_quantity"] == 40.0
+    assert by_name["GD South"]["total_quantity"] == 0.0
+    assert by_name["GD North WH1"]["depth"] == 1
+
+    # As of the transfer date: the sale has not happened yet
+    res = read_godown_stock(as_of=date(2024, 4, 2), godown_id=north.id, db=db)
+    assert [g["name"] for g in res["godowns"]] == ["GD North", "GD North WH1", "GD North WH2"]
+    assert res["godowns"][0]["total_quantity"] == 50.0
+
+    # Transfers move stock between godowns without touching quantity or cost
+    val = calculate_item_valuation(db, item.id)
+    assert val.closing_qty == 140.0
+    assert abs(val.closing_value - 1600.0 * 140 / 150) < 0.001
+
+    db.close()
+    print("Godown Stock Passed.")
+
+if __name__ == "__main__":
+    test_godown_stock()
@@ -0,0 +1,91 @@
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry
+from app.modules.analytics.router import _compute_group_summary
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_group_summary_drilldown():
+    print("--- Testing Group Summary Drill-down ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    assets = AccountGroup(name="GS Current Assets", nature="Assets")
+    income = AccountGroup(name="GS Income", nature="Income")
+    db.add_all([assets, income])
+    db.flush()
+    debtors = AccountGroup(name="GS Debtors", nature="Assets", parent_id=assets.id)
+    db.add(debtors)
+    db.flush()
+    north = AccountGroup(name="GS North", nature="Assets", parent_id=debtors.id)
+    db.add(north)
+    db.flush()
+
+    a = Ledger(name="Alpha", group_id=debtors.id, opening_balance=100.0)
+    b = Ledger(name="Bravo", group_id=debtors.id, opening_balance=50.0, opening_balance_is_dr=False)
+    c = Ledger(name="Charlie", group_id=debtors.id, opening_balance=300.0)
+    idle = Ledger(name="Idle", group_id=debtors.id)
+    n = Ledger(name="North Party", group_id=north.id)
+    sales = Ledger(name="GS Sales", group_id=income.id)
+    vt = VoucherType(name="GS Journal", nature="Journal")
+    db.add_all([a, b, c, idle, n, sales, vt])
+    db.flush()
+
+    def post(on, party, amount):
+        v = Voucher(voucher_type_id=vt.id, date=on, voucher_number=f"GS/{on}/{party.name}")
+        db.add(v)
+        db.flush()
+        db.add(VoucherEntry(voucher_id=v.id, ledger_id=party.id, amount=amount, is_debit=True))
+        db.add(VoucherEntry(voucher_id=v.id, ledger_id=sales.id, amount=amount, is_debit=False))
+
+    post(date(2024, 3, 15), a, 20.0)  # Before the period -> opening
+    post(date(2024, 4, 10), a, 30.0)
+    post(date(2024, 4, 11), n, 500.0)
+    db.commit()
+
+    res = _compute_group_summary(db, "gs debtors", date(2024, 4, 1), date(2024, 4, 30))
+    assert res.group_id == debtors.id and res.group_name == "GS Debtors"
+    assert res.total_ledgers == 3 # Idle is hidden
+    assert [(i.type, i.name) for i in res.items] == [("group", "GS North"), ("ledger", "Alpha"), ("ledger", "Bravo"), ("ledger", "Charlie")]
+    alpha = res.items[1]
+    assert (alpha.opening, alpha.debit, alpha.credit, alpha.closing) == (120.0, 30.0, 0.0, 150.0)
+    bravo = res.items[2]
+    assert bravo.closing == -50.0 and not bravo.is_debit # Credit opening keeps its sign
+    assert (res.opening, res.debit, res.closing) == (370.0, 530.0, 900.0)
+    assert res.total_debit == 950.0 and res.total_credit == 50.0
+
+    # By id, sorted by balance, paged
+    page1 = _compute_group_summary(db, None, date(2024, 4, 1), date(2024, 4, 30), page=1, page_size=2, sort="balance", descending=True, group_id=debtors.id)
+    assert [i.name for i in page1.items if i.type == "ledger"] == ["Charlie", "Alpha"]
+    page2 = _compute_group_summary(db, None, date(2024, 4, 1), date(2024, 4, 30), page=2, page_size=2, sort="balance", descending=True, group_id=debtors.id)
+    assert [i.name for i in page2.items if i.type == "ledger"] == ["Bravo"]
+    assert page2.total_debit == res.total_debit
+
+    # Income with a from_date shows the period only
+    inc = _compute_group_summary(db, "GS Income", date(2024, 4, 1), date(2024, 4, 30))
+    assert inc.items[0].opening == 0.0 and inc.items[0].closing == -530.0
+
+    # A name made of digits is a name, not an id
+    year_group = AccountGroup(name=str(debtors.id), nature="Assets")
+    db.add(year_group)
+    db.commit()
+    by_name = _compute_group_summary(db, str(debtors.id), date(2024, 4, 1), date(2024, 4, 30))
+    assert by_name.group_id == year_group.id and by_name.items == []
+
+    missing = _compute_group_summary(db, "No Such Group")
+    assert missing.items == []
+
+    db.close()
+    print("SUCCESS: Group summary aggregated for the subtree only")
+
+if __name__ == "__main__":
+    test_group_summary_drilldown()
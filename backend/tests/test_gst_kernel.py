@@ -0,0 +1,52 @@
+import sys
+import os
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.modules.tax import engine
+from app.modules.tax.engine import calculate_gst, calculate_gst_arrays
+
+def test_gst_kernel():
+    print("--- Testing GST Paise Kernel ---")
+
+    # Half-up to the paisa, including float values just under a half
+    assert calculate_gst(1.005, 18, True).igst_amount == 0.18
+    assert calculate_gst(100.5, 5, False).cgst_amount == 2.51 # 2.5125
+    assert calculate_gst(250.25, 5, False).sgst_amount == 6.26 # 6.25625
+    assert calculate_gst(-33.3, 12, True).igst_amount == -4.0 # credit notes round away from zero
+    assert calculate_gst(100, 0, True).total_tax == 0.0
+    res = calculate_gst(999.99, 18, False)
+    assert res.cgst_amount == res.sgst_amount == 90.0 and res.total_tax == 180.0
+
+    rng = random.Random(7)
+    n = 20000
+    values = [round(rng.uniform(-5000, 100000), rng.choice([0, 1, 2])) for _ in range(n)]
+    rates = [rng.choice([0, 0.25, 3, 5, 12, 18, 28]) for _ in range(n)]
+    inter = [rng.random() < 0.4 for _ in range(n)]
+
+    scalar = [calculate_gst(v, r, i) for v, r, i in zip(values, rates, inter)]
+    expected = (
+        [s.igst_amount for s in scalar],
+        [s.cgst_amount for s in scalar],
+        [s.sgst_amount for s in scalar]
+    )
+
+    paths = [engine.np] if engine.np is None else [engine.np, None]
+    for np in paths:
+        engine.np = np
+        try:
+            start = time.perf_counter()
+            igst, cgst, sgst = calculate_gst_arrays(values, rates, inter)
+            elapsed = (time.perf_counter() - start) * 1000
+        finally:
+            engine.np = paths[0]
+        print(f"{'NumPy' if np is not None else 'Python'} kernel, {n} lines: {elapsed:.1f} ms")
+        assert [list(map(float, col)) for col in (igst, cgst, sgst)] == [list(col) for col in expected]
+
+    assert calculate_gst_arrays([], [], []) is not None
+    print("GST Kernel Passed.")
+
+if __name__ == "__main__":
+    test_gst_kernel()
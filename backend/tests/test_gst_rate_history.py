@@ -0,0 +1,155 @@
+import sys
+import os
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry, Organization
+from app.modules.inventory.models import StockItem, StockGroup
+from app.modules.inventory.router import StockItemCreate, update_stock_item
+from app.modules.reports.gst import generate_gstr1_json, generate_gstr3b_json, generate_hsn_summary
+from app.modules.tax.history import gst_rate_book
+from app.modules.tax.router import (
+    GstRateChange, TaxAnalysisRequest, TaxEntryRequest, calculate_voucher_tax,
+    list_gst_rate_history, record_gst_rate_change
+)
+from app.modules.vouchers.router import get_voucher_by_id
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_gst_rate_history():
+    print("--- Testing Effective-Dated GST Rates ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    db.add(Organization(
+        name="RH Org", state="Karnataka", gstin="29AAAAA0000A1Z5",
+        financial_year_start=date(2024, 4, 1), books_beginning_from=date(2024, 4, 1)
+    ))
+    debtors = AccountGroup(name="Sundry Debtors", nature="Assets")
+    sales_grp = AccountGroup(name="Sales Accounts", nature="Income")
+    db.add_all([debtors, sales_grp])
+    db.flush()
+    party = Ledger(name="RH Party", group_id=debtors.id, gstin="29BBBBB1111B1Z5", state="Karnataka")
+    sales = Ledger(name="RH Sales", group_id=sales_grp.id)
+    footwear = StockGroup(name="RH Footwear", hsn_code="6403", gst_rate=12.0)
+    db.add_all([party, sales, footwear])
+    db.flush()
+    shoe = StockItem(name="RH Shoe", group_id=footwear.id)
+    vt = VoucherType(name="RH Sales", nature="Sales")
+    db.add_all([shoe, vt])
+    db.flush()
+
+    for number, day in (("RH/1", date(2024, 9, 15)), ("RH/2", date(2024, 10, 15))):
+        v = Voucher(voucher_type_id=vt.id, date=day, voucher_number=number)
+        db.add(v)
+        db.flush()
+        if number == "RH/1":
+            first_voucher_id = v.id
+        db.add_all([
+            VoucherEntry(voucher_id=v.id, ledger_id=party.id, amount=1000, is_debit=True),
+            VoucherEntry(voucher_id=v.id, ledger_id=sales.id, amount=1000, is_debit=False, stock_item_id=shoe.id, quantity=1),
+        ])
+    db.commit()
+
+    # Footwear goes from 12% to 18% on 1 Oct 2024
+    row = record_gst_rate_change(GstRateChange(
+        subject_type="stock_group", subject_id=footwear.id, effective_from=date(2024, 10, 1), rate=18.0
+    ), db=db)
+    assert row.hsn_code == "6403"
+    history = list_gst_rate_history(subject_type="stock_group", subject_id=footwear.id, db=db)
+    assert [(h.effective_from, h.rate) for h in history] == [(date(1900, 1, 1), 12.0), (date(2024, 10, 1), 18.0)]
+    db.refresh(footwear)
+    db.refresh(shoe)
+    assert footwear.gst_rate == 12.0 and shoe.effective_gst_rate == 12.0 # history, not the master, carries changes
+
+    book = gst_rate_book(db)
+    assert book.item(shoe.id, footwear.id, date(2024, 9, 30), 0.0) == (12.0, "6403")
+    assert book.item(shoe.id, footwear.id, date(2024, 10, 1), 0.0) == (18.0, "6403")
+
+    # Returns recomputed later use the rate in force on each invoice date
+    gstr1 = generate_gstr1_json(db, date(2024, 9, 1), date(2024, 10, 31))
+    rates = [inv["itms"][0]["itm_det"]["rt"] for inv in gstr1["b2b"][0]["inv"]]
+    assert rates == [12.0, 18.0]
+
+    gstr3b = generate_gstr3b_json(db, date(2024, 9, 1), date(2024, 10, 31))
+    rate_wise = [(r["rt"], r["txval"], r["camt"]) for r in gstr3b["rate_wise"]["outward"]]
+    print("Rate-wise:", rate_wise)
+    assert rate_wise == [(12.0, 1000.0, 60.0), (18.0, 1000.0, 90.0)]
+    assert gstr3b["sup_details"]["osup_det"]["camt"] == 150.0
+
+    hsn = generate_hsn_summary(db, date(2024, 9, 1), date(2024, 10, 31))
+    assert [(d["hsn_sc"], d["rt"]) for d in hsn["hsn"]["data"]] == [("6403", 12.0), ("6403", 18.0)]
+
+    # Draft tax follows the voucher date
+    def draft_rate(day):
+        lines = calculate_voucher_tax(TaxAnalysisRequest(date=day, entries=[
+            TaxEntryRequest(ledger_id=sales.id, amount=100, is_debit=False, stock_item_id=shoe.id)
+        ]), db=db)
+        return lines[0].rate * 2
+    assert draft_rate(date(2024, 9, 20)) == 12.0
+    assert draft_rate(date(2024, 11, 1)) == 18.0
+
+    # An item-level change overrides the group from its date
+    record_gst_rate_change(GstRateChange(
+        subject_type="stock_item", subject_id=shoe.id, effective_from=date(2024, 10, 20), rate=5.0, hsn_code="640399"
+    ), db=db)
+    assert draft_rate(date(2024, 10, 19)) == 18.0
+    assert draft_rate(date(2024, 10, 20)) == 5.0
+
+    # A change dated after today applies once transactions reach its date
+    future = date.today() + timedelta(days=30)
+    record_gst_rate_change(GstRateChange(
+        subject_type="stock_item", subject_id=shoe.id, effective_from=future, rate=28.0
+    ), db=db)
+    assert draft_rate(date.today()) == 5.0
+    assert draft_rate(future) == 28.0
+
+    # Voucher detail shows the item's own rate / HSN in force on the voucher date
+    book = gst_rate_book(db)
+    v = Voucher(voucher_type_id=vt.id, date=future, voucher_number="RH/3")
+    db.add(v)
+    db.flush()
+    db.add(VoucherEntry(voucher_id=v.id, ledger_id=sales.id, amount=1000, is_debit=False, stock_item_id=shoe.id, quantity=1))
+    db.commit()
+    assert gst_rate_book(db) is book # voucher saves do not rebuild the rate book
+    def detail_rate(voucher_id):
+        detail = get_voucher_by_id(voucher_id, db=db)
+        return [(e["gst_rate"], e["hsn_code"]) for e in detail["entries"] if e["stock_item_id"]]
+    assert detail_rate(first_voucher_id) == [(0.0, None)] # rated through its group then
+    assert detail_rate(v.id) == [(28.0, "640399")]
+
+    # A later edit on the master is recorded as a change from today, not ignored
+    update_stock_item(shoe.id, StockItemCreate(
+        name=shoe.name, group_id=footwear.id, unit_id=None, hsn_code="640391", gst_rate=12.0
+    ), db=db)
+    history = list_gst_rate_history(subject_type="stock_item", subject_id=shoe.id, db=db)
+    assert (history[-2].effective_from, history[-2].rate, history[-2].hsn_code) == (date.today(), 12.0, "640391")
+    db.refresh(shoe)
+    assert shoe.effective_gst_rate == 12.0 and draft_rate(date.today()) == 12.0
+    assert draft_rate(future) == 28.0 # the later scheduled change still applies
+    assert detail_rate(v.id) == [(28.0, "640399")] # scheduled rows keep their own HSN
+
+    # Saving the master unchanged records nothing
+    update_stock_item(shoe.id, StockItemCreate(
+        name=shoe.name, group_id=footwear.id, unit_id=None, hsn_code="640391", gst_rate=12.0
+    ), db=db)
+    assert len(list_gst_rate_history(subject_type="stock_item", subject_id=shoe.id, db=db)) == len(history)
+
+    try:
+        record_gst_rate_change(GstRateChange(subject_type="ledger", subject_id=9999, effective_from=date(2024, 1, 1), rate=5), db=db)
+        assert False, "Unknown subject accepted"
+    except HTTPException as e:
+        assert e.status_code == 404
+
+    db.close()
+    print("GST Rate History Passed.")
+
+if __name__ == "__main__":
+    test_gst_rate_history()
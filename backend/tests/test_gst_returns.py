@@ -0,0 +1,109 @@
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry, Organization
+from app.modules.inventory.models import StockItem, StockGroup, Unit
+from app.modules.reports.gst import generate_gstr3b_json, generate_hsn_summary
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_gstr3b_and_hsn_summary():
+    print("--- Testing GSTR-3B / HSN Summary ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    db.add(Organization(
+        name="3B Org", state="Karnataka", gstin="29AAAAA0000A1Z5",
+        financial_year_start=date(2024, 4, 1), books_beginning_from=date(2024, 4, 1)
+    ))
+    liab = AccountGroup(name="Current Liabilities", nature="Liabilities")
+    assets = AccountGroup(name="Current Assets", nature="Assets")
+    sales_grp = AccountGroup(name="Sales Accounts", nature="Income")
+    purchase_grp = AccountGroup(name="Purchase Accounts", nature="Expenses")
+    db.add_all([liab, assets, sales_grp, purchase_grp])
+    db.flush()
+    duties = AccountGroup(name="Duties & Taxes", nature="Liabilities", parent_id=liab.id)
+    db.add(duties)
+    db.flush()
+
+    party = Ledger(name="3B Party", group_id=assets.id)
+    sales = Ledger(name="3B Sales", group_id=sales_grp.id)
+    purchase = Ledger(name="3B Purchase", group_id=purchase_grp.id)
+    cgst = Ledger(name="3B CGST", group_id=duties.id, tax_type="GST", duty_head="CGST")
+    sgst = Ledger(name="3B SGST", group_id=duties.id, tax_type="GST", duty_head="SGST")
+    igst = Ledger(name="3B IGST", group_id=duties.id, tax_type="GST", duty_head="IGST")
+    db.add_all([party, sales, purchase, cgst, sgst, igst])
+
+    nos = Unit(name="Numbers", symbol="Nos")
+    computers = StockGroup(name="Computers", hsn_code="8471", gst_rate=18.0)
+    db.add_all([nos, computers])
+    db.flush()
+    laptop = StockItem(name="Laptop", group_id=computers.id, unit_id=nos.id) # HSN + rate from group
+    medicine = StockItem(name="Medicine", hsn_code="3004", gst_rate=12.0, unit_id=nos.id)
+    milk = StockItem(name="Milk", hsn_code="0401", taxability="Exempt")
+    vt_sales = VoucherType(name="Sales", nature="Sales")
+    vt_pur = VoucherType(name="Purchase", nature="Purchase")
+    db.add_all([laptop, medicine, milk, vt_sales, vt_pur])
+    db.flush()
+
+    def post(vt, number, lines):
+        v = Voucher(voucher_type_id=vt.id, date=date(2024, 4, 10), voucher_number=number)
+        db.add(v)
+        db.flush()
+        for ledger, amount, is_debit, item, qty in lines:
+            db.add(VoucherEntry(
+                voucher_id=v.id, ledger_id=ledger.id, amount=amount, is_debit=is_debit,
+                stock_item_id=item.id if item else None, quantity=qty
+            ))
+
+    post(vt_sales, "S/1", [
+        (party, 1180.0, True, None, 0), (sales, 1000.0, False, laptop, 10),
+        (cgst, 90.0, False, None, 0), (sgst, 90.0, False, None, 0)
+    ])
+    post(vt_sales, "S/2", [ # Inter-state
+        (party, 560.0, True, None, 0), (sales, 500.0, False, medicine, 5), (igst, 60.0, False, None, 0)
+    ])
+    post(vt_sales, "S/3", [(party, 100.0, True, None, 0), (sales, 100.0, False, milk, 20)])
+    post(vt_pur, "P/1", [
+        (purchase, 400.0, True, laptop, 4), (cgst, 36.0, True, None, 0),
+        (sgst, 36.0, True, None, 0), (party, 472.0, False, None, 0)
+    ])
+    post(vt_pur, "P/2", [(purchase, 250.0, True, None, 0), (party, 250.0, False, None, 0)]) # Unrated service
+    db.commit()
+
+    res = generate_gstr3b_json(db, date(2024, 4, 1), date(2024, 4, 30))
+    assert res["ret_period"] == "042024"
+    osup = res["sup_details"]["osup_det"]
+    assert osup["txval"] == 1500.0 and osup["iamt"] == 60.0 and osup["camt"] == 90.0 and osup["samt"] == 90.0
+    assert res["sup_details"]["osup_nil_exmp"]["txval"] == 100.0
+    assert res["itc_elg"]["itc_net"] == {"iamt": 0.0, "camt": 36.0, "samt": 36.0, "csamt": 0.0} # no 18% on P/2
+    assert [(r["rt"], r["txval"]) for r in res["rate_wise"]["inward"]] == [(18.0, 400.0)]
+    assert res["tax_payable"] == {"iamt": 60.0, "camt": 54.0, "samt": 54.0, "csamt": 0.0}
+    assert [(r["rt"], r["supply_type"]) for r in res["rate_wise"]["outward"]] == [(12.0, "Inter-State"), (18.0, "Intra-State")]
+    assert res["booked_tax"]["outward"] == {"CGST": 90.0, "SGST": 90.0, "IGST": 60.0}
+    assert res["booked_tax"]["inward"] == {"CGST": 36.0, "SGST": 36.0}
+
+    hsn = generate_hsn_summary(db, date(2024, 4, 1), date(2024, 4, 30))["hsn"]["data"]
+    assert [(r["hsn_sc"], r["rt"]) for r in hsn] == [("0401", 0.0), ("3004", 12.0), ("8471", 18.0)]
+    laptops = hsn[2]
+    assert laptops["qty"] == 10 and laptops["uqc"] == "Nos" and laptops["txval"] == 1000.0
+    assert laptops["camt"] == 90.0 and laptops["val"] == 1180.0
+    assert hsn[1]["iamt"] == 60.0
+
+    inward = generate_hsn_summary(db, date(2024, 4, 1), date(2024, 4, 30), "Purchase")["hsn"]["data"]
+    assert [(r["hsn_sc"], r["rt"], r["txval"]) for r in inward] == [("", 0.0, 250.0), ("8471", 18.0, 400.0)]
+    assert inward[1]["qty"] == 4 and inward[0]["camt"] == 0.0
+
+    db.close()
+    print("SUCCESS: GSTR-3B and HSN summary aggregated in SQL")
+
+if __name__ == "__main__":
+    test_gstr3b_and_hsn_summary()
@@ -0,0 +1,107 @@
+import sys
+import os
+import json
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry, Organization
+from app.modules.inventory.models import StockItem, StockGroup
+from app.modules.reports.gst import generate_gstr1_json, gstr1_sections, iter_gstr1_json
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_gstr1_generation():
+    print("--- Testing GSTR-1 Generation ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    db.add(Organization(
+        name="GST Org", state="Karnataka", gstin="29AAAAA0000A1Z5",
+        financial_year_start=date(2024, 4, 1), books_beginning_from=date(2024, 4, 1)
+    ))
+    current_assets = AccountGroup(name="Current Assets", nature="Assets")
+    current_liab = AccountGroup(name="Current Liabilities", nature="Liabilities")
+    sales_accounts = AccountGroup(name="Sales Accounts", nature="Income")
+    db.add_all([current_assets, current_liab, sales_accounts])
+    db.flush()
+    debtors = AccountGroup(name="Sundry Debtors", nature="Assets", parent_id=current_assets.id)
+    cash_grp = AccountGroup(name="Cash-in-hand", nature="Assets", parent_id=current_assets.id)
+    duties = AccountGroup(name="Duties & Taxes", nature="Liabilities", parent_id=current_liab.id)
+    db.add_all([debtors, cash_grp, duties])
+    db.flush()
+
+    local = Ledger(name="Local Buyer", group_id=debtors.id, gstin="29BBBBB1111B1Z5", state="Karnataka")
+    remote = Ledger(name="Remote Buyer", group_id=debtors.id, gstin="27CCCCC2222C1Z5", state="Maharashtra")
+    cash = Ledger(name="Cash", group_id=cash_grp.id)
+    sales = Ledger(name="Sales", group_id=sales_accounts.id)
+    cgst = Ledger(name="Output CGST", group_id=duties.id)
+    db.add_all([local, remote, cash, sales, cgst])
+
+    sgrp = StockGroup(name="Electronics", gst_rate=12.0)
+    db.add(sgrp)
+    db.flush()
+    widget = StockItem(name="Widget", group_id=sgrp.id) # Rate inherited from stock group
+    gadget = StockItem(name="Gadget", gst_rate=28.0)
+    vt = VoucherType(name="Sales", nature="Sales")
+    db.add_all([widget, gadget, vt])
+    db.flush()
+
+    def sale(number, on, party, lines):
+        v = Voucher(voucher_type_id=vt.id, date=on, voucher_number=number)
+        db.add(v)
+        db.flush()
+        total = sum(amount for _, amount, _ in lines)
+        db.add(VoucherEntry(voucher_id=v.id, ledger_id=party.id, amount=total, is_debit=True))
+        for ledger, amount, item in lines:
+            db.add(VoucherEntry(
+                voucher_id=v.id, ledger_id=ledger.id, amount=amount, is_debit=False,
+                stock_item_id=item.id if item else None
+            ))
+
+    sale("S/1", date(2024, 4, 2), local, [(sales, 1000.0, widget), (cgst, 60.0, None)])
+    sale("S/2", date(2024, 4, 3), remote, [(sales, 500.0, gadget), (sales, 200.0, None)])
+    sale("S/3", date(2024, 4, 4), local, [(sales, 100.0, None)])
+    sale("S/4", date(2024, 4, 5), cash, [(sales, 50.0, None)]) # B2C
+    sale("S/5", date(2024, 5, 1), local, [(sales, 999.0, None)]) # Out of period
+    db.commit()
+
+    res = generate_gstr1_json(db, date(2024, 4, 1), date(2024, 4, 30))
+    assert res["fp"] == "042024"
+    assert [g["ctin"] for g in res["b2b"]] == ["29BBBBB1111B1Z5", "27CCCCC2222C1Z5"]
+
+    local_inv = res["b2b"][0]["inv"]
+    assert [i["inum"] for i in local_inv] == ["S/1", "S/3"]
+    s1 = local_inv[0]["itms"][0]["itm_det"]
+    assert s1["rt"] == 12.0 and s1["txval"] == 1000.0 and s1["camt"] == 60.0 and s1["iamt"] == 0
+    assert local_inv[1]["itms"][0]["itm_det"]["rt"] == 18.0 # Service default
+
+    s2 = {i["itm_det"]["rt"]: i["itm_det"] for i in res["b2b"][1]["inv"][0]["itms"]}
+    assert s2[28.0]["iamt"] == 140.0 and s2[18.0]["iamt"] == 36.0
+    assert res["b2b"][1]["inv"][0]["pos"] == "27"
+
+    # Streamed encoding is the same document
+    assert json.loads("".join(iter_gstr1_json(res, chunk_size=64))) == res
+    org = db.query(Organization).first()
+    assert json.loads("".join(iter_gstr1_json(gstr1_sections(db, org, date(2024, 4, 1), date(2024, 4, 30))))) == res
+    assert list(res) == ["gstin", "fp", "b2b", "b2cl", "b2cs", "hsn"]
+
+    # Sections are produced lazily: the header goes out before any sales query runs
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    chunks = iter_gstr1_json(gstr1_sections(db, org, date(2024, 4, 1), date(2024, 4, 30)), chunk_size=16)
+    first = next(chunks)
+    event.remove(engine, "before_cursor_execute", listener)
+    assert first.startswith('{"gstin": ') and statements == []
+
+    db.close()
+    print("SUCCESS: GSTR-1 built from one query, grouped by CTIN")
+
+if __name__ == "__main__":
+    test_gstr1_generation()
@@ -0,0 +1,142 @@
+import sys
+import os
+import io
+import json
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry
+from app.modules.reports.gstr2b import _norm_invoice, reconcile_gstr2b
+from app.modules.reports.router import reconcile_gstr2b_upload
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+GSTIN_A = "29AAAAA0000A1Z5"
+GSTIN_B = "27BBBBB1111B1Z5"
+
+def portal_invoice(inum, day, val, igst=0.0, cgst=0.0, sgst=0.0):
+    return {
+        "inum": inum, "dt": day.strftime("%d-%m-%Y"), "val": val, "itcavl": "Y",
+        "items": [{"num": 1, "rt": 18, "txval": val - igst - cgst - sgst, "igst": igst, "cgst": cgst, "sgst": sgst, "cess": 0}]
+    }
+
+def test_gstr2b_reconcile():
+    print("--- Testing GSTR-2B ITC Reconciliation ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    creditors = AccountGroup(name="2B Creditors", nature="Liabilities")
+    expenses = AccountGroup(name="2B Purchases", nature="Expenses")
+    duties = AccountGroup(name="2B Duties", nature="Liabilities")
+    db.add_all([creditors, expenses, duties])
+    db.flush()
+    supplier_a = Ledger(name="2B Supplier A", group_id=creditors.id, gstin=GSTIN_A)
+    supplier_b = Ledger(name="2B Supplier B", group_id=creditors.id, gstin=GSTIN_B)
+    purchase = Ledger(name="2B Purchase", group_id=expenses.id)
+    cgst = Ledger(name="2B CGST", group_id=duties.id, duty_head="CGST")
+    sgst = Ledger(name="2B SGST", group_id=duties.id, duty_head="SGST")
+    igst = Ledger(name="2B IGST", group_id=duties.id, duty_head="IGST")
+    vt = VoucherType(name="2B Purchase", nature="Purchase")
+    db.add_all([supplier_a, supplier_b, purchase, cgst, sgst, igst, vt])
+    db.flush()
+
+    def book(number, day, supplier, taxable, local=True):
+        v = Voucher(voucher_type_id=vt.id, date=day, voucher_number=number)
+        db.add(v)
+        db.flush()
+        tax = round(taxable * 0.18, 2)
+        lines = [(purchase, taxable, True), (supplier, taxable + tax, False)]
+        lines += [(cgst, tax / 2, True), (sgst, tax / 2, True)] if local else [(igst, tax, True)]
+        db.add_all([VoucherEntry(voucher_id=v.id, ledger_id=l.id, amount=a, is_debit=d) for l, a, d in lines])
+
+    # Zeros are stripped per number group; the groups stay apart
+    assert _norm_invoice("inv/24-25/007") == _norm_invoice("INV-24-25-7")
+    assert _norm_invoice("INV-2-4257") != _norm_invoice("INV-24-25-7")
+    assert _norm_invoice("inv-0001") == _norm_invoice("INV/001")
+
+    d = date(2024, 7, 10)
+    book("INV/001", d, supplier_a, 1000)                        # exact
+    book("INV/002", d, supplier_a, 2000)                        # value differs on portal
+    book("INV/003", d + timedelta(days=20), supplier_a, 500)    # date outside window
+    book("B-77", d, supplier_b, 100, local=False)               # number keyed differently
+    book("INV/005", d, supplier_a, 300)                         # not on the portal
+    book("inv/24-25/007", d, supplier_a, 400)                   # zero-padded inside a number group
+    db.commit()
+
+    payload = {"data": {"rtnprd": "072024", "docdata": {"b2b": [
+        {"ctin": GSTIN_A, "trdnm": "Supplier A", "inv": [
+            portal_invoice("inv-0001", d + timedelta(days=1), 1180, cgst=90, sgst=90),
+            portal_invoice("INV/002", d, 2400, cgst=180, sgst=180),
+            portal_invoice("INV/003", d, 590, cgst=45, sgst=45),
+            portal_invoice("INV/009", d, 999, cgst=76, sgst=76),
+            portal_invoice("INV-24-25-7", d, 472, cgst=36, sgst=36),
+            portal_invoice("INV-2-4257", d, 777, cgst=59, sgst=59),
+        ]},
+        {"ctin": GSTIN_B.lower(), "trdnm": "Supplier B", "inv": [
+            portal_invoice("B/0078", d, 118, igst=18),
+        ]},
+    ]}}}
+
+    result = reconcile_gstr2b(db, payload, date(2024, 7, 1), date(2024, 7, 31))
+    print("Summary:", result["summary"])
+    assert [m["books"]["voucher_number"] for m in result["matched"]] == ["INV/001", "inv/24-25/007"]
+    reasons = {m["books"]["voucher_number"]: m["reasons"] for m in result["mismatched"]}
+    print("Mismatched:", reasons)
+    assert reasons == {"INV/002": ["value"], "INV/003": ["date"], "B-77": ["invoice_number"]}
+    assert [p["inum"] for p in result["missing_in_books"]] == ["INV/009", "INV-2-4257"]
+    assert [b["voucher_number"] for b in result["missing_in_2b"]] == ["INV/005"]
+    assert result["summary"]["matched_itc"] == 252.0
+
+    # Upload endpoint
+    upload = UploadFile(file=io.BytesIO(json.dumps(payload).encode()), filename="2b.json")
+    via_api = reconcile_gstr2b_upload(upload, from_date=None, to_date=None, date_window_days=3, amount_tolerance=1.0, db=db)
+    assert via_api["summary"]["matched"] == 2
+    try:
+        reconcile_gstr2b_upload(UploadFile(file=io.BytesIO(b"{}"), filename="bad.json"), from_date=None,
+                                to_date=None, date_window_days=3, amount_tolerance=1.0, db=db)
+        assert False, "Malformed file accepted"
+    except HTTPException as e:
+        assert e.status_code == 400
+
+    # Scale: 50k booked invoices against a 50k invoice upload
+    n = 50000
+    vt_bulk = VoucherType(name="2B Bulk Purchase", nature="Purchase")
+    db.add(vt_bulk)
+    db.flush()
+    start_id = 1000
+    day = date(2024, 8, 1)
+    db.execute(insert(Voucher), [
+        {"id": start_id + i, "voucher_type_id": vt_bulk.id, "date": day + timedelta(days=i % 28), "voucher_number": f"BLK/{i}"}
+        for i in range(n)
+    ])
+    db.execute(insert(VoucherEntry), [
+        row for i in range(n) for row in (
+            {"voucher_id": start_id + i, "ledger_id": supplier_a.id, "amount": 118.0 + i, "is_debit": False},
+            {"voucher_id": start_id + i, "ledger_id": purchase.id, "amount": 100.0 + i, "is_debit": True},
+            {"voucher_id": start_id + i, "ledger_id": igst.id, "amount": 18.0, "is_debit": True},
+        )
+    ])
+    db.commit()
+    bulk = {"b2b": [{"ctin": GSTIN_A, "inv": [
+        portal_invoice(f"BLK-{i}", day + timedelta(days=i % 28), 118.0 + i, igst=18.0) for i in range(n)
+    ]}]}
+    started = time.perf_counter()
+    result = reconcile_gstr2b(db, bulk, date(2024, 8, 1), date(2024, 8, 31))
+    elapsed = time.perf_counter() - started
+    print(f"Reconciled {n} invoices in {elapsed:.2f}s")
+    assert result["summary"]["matched"] == n
+    assert elapsed < 10
+
+    db.close()
+    print("GSTR-2B Reconciliation Passed.")
+
+if __name__ == "__main__":
+    test_gstr2b_reconcile()
@@ -0,0 +1,114 @@
+import sys
+import os
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry
+from app.modules.inventory.models import StockItem
+from app.modules.inventory.router import get_item_movements
+from app.modules.inventory.valuation import calculate_item_valuation
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_item_movements():
+    print("--- Testing Item Movement Register ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    grp = AccountGroup(name="IM Expenses", nature="Expenses")
+    db.add(grp)
+    db.flush()
+    ledger = Ledger(name="IM Trading", group_id=grp.id)
+    item = StockItem(name="IM Widget", opening_qty=10, opening_rate=10, opening_value=100, valuation_method="FIFO")
+    vt_pur = VoucherType(name="IM Purchase", nature="Purchase")
+    vt_sal = VoucherType(name="IM Sales", nature="Sales")
+    db.add_all([ledger, item, vt_pur, vt_sal])
+    db.flush()
+
+    # 300 movements over 100 days, several per day: buy 2 @ rising rate, sell 1
+    start = date(2024, 4, 1)
+    for n in range(300):
+        buying = n % 3 != 2
+        v = Voucher(
+            voucher_type_id=(vt_pur if buying else vt_sal).id,
+            date=start + timedelta(days=n // 3), voucher_number=f"IM/{n}"
+        )
+        db.add(v)
+        db.flush()
+        qty = 2.0 if buying else 1.0
+        db.add(VoucherEntry(
+            voucher_id=v.id, ledger_id=ledger.id, is_debit=buying, stock_item_id=item.id,
+            quantity=qty, amount=qty * (10 + n) if buying else 500.0
+        ))
+    db.commit()
+
+    full = get_item_movements(item.id, limit=1000, db=db)
+    assert full["next_cursor"] is None and len(full["movements"]) == 300
+    assert full["valuation_method"] == "FIFO"
+    assert full["opening"]["qty"] == 10.0
+
+    # Keyset pages see exactly the same running figures as one big page
+    # The cursor carries the running state: later pages run the same queries as the second,
+    # with nothing replayed from the rows before them
+    paged = []
+    cursor = None
+    pages = 0
+    page_statements = []
+    while True:
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        page = get_item_movements(item.id, cursor=cursor, limit=45, db=db)
+        event.remove(engine, "before_cursor_execute", listener)
+        page_statements.append(len(statements))
+        paged.extend(page["movements"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    print(f"{pages} pages, {len(paged)} movements, statements per page {page_statements}")
+    assert pages == 7
+    assert set(page_statements[1:]) == {2} # item check + the page itself
+    assert [m["entry_id"] for m in paged] == [m["entry_id"] for m in full["movements"]]
+    for a, b in zip(paged, full["movements"]):
+        assert abs(a["running_value"] - b["running_value"]) < 0.001
+        assert a["running_qty"] == b["running_qty"]
+
+    last = paged[-1]
+    closing = calculate_item_valuation(db, item.id)
+    assert last["running_qty"] == closing.closing_qty == 10 + 200 * 2 - 100
+    assert abs(last["running_value"] - closing.closing_value) < 0.001
+
+    # Period view: opening is the state the day before from_date
+    from_date = start + timedelta(days=50)
+    period = get_item_movements(item.id, from_date=from_date, to_date=from_date, limit=100, db=db)
+    before = calculate_item_valuation(db, item.id, from_date - timedelta(days=1))
+    assert abs(period["opening"]["value"] - before.closing_value) < 0.001
+    assert len(period["movements"]) == 3
+    assert all(m["date"] == from_date for m in period["movements"])
+
+    for bad in ("garbage", "eJzLSM3JyQcABiwCFQ=="):
+        try:
+            get_item_movements(item.id, cursor=bad, limit=10, db=db)
+            assert False, "Bad cursor accepted"
+        except HTTPException as e:
+            assert e.status_code == 400
+    second = get_item_movements(item.id, limit=45, db=db)["next_cursor"]
+    try:
+        get_item_movements(item.id, cursor=second, limit=45, method="LIFO", db=db)
+        assert False, "Cursor reused across methods"
+    except HTTPException as e:
+        assert e.status_code == 400
+
+    db.close()
+    print("Item Movements Passed.")
+
+if __name__ == "__main__":
+    test_item_movements()
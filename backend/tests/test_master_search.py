@@ -0,0 +1,106 @@
+import sys
+import os
+import io
+import time
+import asyncio
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Response, UploadFile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.core.search import PrefixIndex
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry
+from app.modules.accounting.router import LedgerCreate, create_ledger, delete_ledger, list_ledgers, update_ledger
+from app.modules.accounting.search import load_ledger_index, record_usage
+from app.modules.inventory.router import StockItemCreate, create_stock_item, list_stock_items
+from app.modules.inventory.search import load_item_index
+from app.modules.impex.router import import_ledgers
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def names(rows):
+    return [r["name"] for r in rows]
+
+def test_master_search():
+    print("--- Testing Ledger / Stock Item Search ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    assets = AccountGroup(name="MS Cash-in-Hand", nature="Assets")
+    db.add(assets)
+    db.flush()
+    cash = Ledger(name="Cash", group_id=assets.id)
+    petty = Ledger(name="Petty Cash", group_id=assets.id)
+    cashew = Ledger(name="Cashew Traders", group_id=assets.id)
+    bank = Ledger(name="HDFC Bank", group_id=assets.id)
+    vt = VoucherType(name="MS Journal", nature="Journal")
+    db.add_all([cash, petty, cashew, bank, vt])
+    db.flush()
+
+    # Petty Cash was used recently, so it ranks first among the "cash" matches
+    v = Voucher(voucher_type_id=vt.id, date=date.today(), voucher_number="MS/1")
+    db.add(v)
+    db.flush()
+    db.add_all([
+        VoucherEntry(voucher_id=v.id, ledger_id=petty.id, amount=10, is_debit=True),
+        VoucherEntry(voucher_id=v.id, ledger_id=bank.id, amount=10, is_debit=False),
+    ])
+    db.commit()
+    load_ledger_index(db)
+    load_item_index(db)
+
+    response = Response()
+    rows = list_ledgers(response, q="cash", offset=0, limit=10, db=db)
+    print("cash ->", names(rows))
+    assert names(rows) == ["Petty Cash", "Cash", "Cashew Traders"]
+    assert response.headers["X-Total-Count"] == "3"
+    assert rows[0]["parent_group"] == "MS Cash-in-Hand"
+
+    # Plain listing is in name order and paged
+    response = Response()
+    rows = list_ledgers(response, q=None, offset=1, limit=2, db=db)
+    assert names(rows) == ["Cashew Traders", "HDFC Bank"]
+    assert response.headers["X-Total-Count"] == "4"
+
+    # Posting bumps usage; master endpoints keep the index current
+    record_usage([cashew.id, cashew.id], [])
+    assert names(list_ledgers(Response(), q="cash", offset=0, limit=1, db=db)) == ["Cashew Traders"]
+
+    created = create_ledger(LedgerCreate(name="Cash Float", group_id=assets.id), db=db)
+    assert "Cash Float" in names(list_ledgers(Response(), q="cash f", offset=0, limit=10, db=db))
+    update_ledger(created.id, LedgerCreate(name="Till Float", group_id=assets.id), db=db)
+    assert names(list_ledgers(Response(), q="till", offset=0, limit=10, db=db)) == ["Till Float"]
+    assert "Cash Float" not in names(list_ledgers(Response(), q="cash", offset=0, limit=10, db=db))
+    delete_ledger(created.id, db=db)
+    assert list_ledgers(Response(), q="till", offset=0, limit=10, db=db) == []
+
+    csv_file = UploadFile(file=io.BytesIO(b"Name,Group\nCash Counter 2,MS Cash-in-Hand\n"), filename="ledgers.csv")
+    result = asyncio.run(import_ledgers(file=csv_file, db=db, current_user=None))
+    assert result["imported"] == 1
+    assert names(list_ledgers(Response(), q="cash counter", offset=0, limit=10, db=db)) == ["Cash Counter 2"]
+
+    create_stock_item(StockItemCreate(name="Steel Rod 12mm", unit_id=None), db=db)
+    create_stock_item(StockItemCreate(name="Rod Cutter", unit_id=None), db=db)
+    assert names(list_stock_items(Response(), q="rod", offset=0, limit=10, db=db)) == ["Rod Cutter", "Steel Rod 12mm"]
+
+    # 100k masters: lookups stay in the low milliseconds
+    big = PrefixIndex()
+    big.load((i, f"Party {i:06d} Traders", {"id": i}) for i in range(100000))
+    start = time.perf_counter()
+    for n in range(200):
+        total, page = big.search(f"party 0{n % 10}{n % 7}", 0, 20)
+    per_lookup_ms = (time.perf_counter() - start) * 1000 / 200
+    print(f"Per lookup over 100k: {per_lookup_ms:.3f} ms")
+    assert total == 1000 and len(page) == 20
+    assert per_lookup_ms < 5
+
+    db.close()
+    print("Master Search Passed.")
+
+if __name__ == "__main__":
+    test_master_search()
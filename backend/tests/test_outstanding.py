@@ -0,0 +1,99 @@
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry, BillAllocation
+import app.modules.inventory.models # units / stock item FKs
+from app.modules.reports.outstanding import ensure_bill_ledgers, get_outstanding, get_pending_bills
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def post(db, vtype, on, number, party, other, amount, party_is_debit, bills):
+    v = Voucher(voucher_type_id=vtype.id, date=on, effective_date=on, voucher_number=number)
+    db.add(v)
+    db.flush()
+    e = VoucherEntry(voucher_id=v.id, ledger_id=party.id, amount=amount, is_debit=party_is_debit)
+    db.add_all([e, VoucherEntry(voucher_id=v.id, ledger_id=other.id, amount=amount, is_debit=not party_is_debit)])
+    db.flush()
+    for ref_type, ref_name, amt, due in bills:
+        db.add(BillAllocation(
+            voucher_entry_id=e.id, ledger_id=party.id, ref_type=ref_type,
+            ref_name=ref_name, amount=amt, credit_period=due
+        ))
+    db.commit()
+
+def test_bill_outstanding():
+    print("--- Testing Bill-wise Outstanding ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    debtors = AccountGroup(name="OS Debtors", nature="Assets")
+    creditors = AccountGroup(name="OS Creditors", nature="Liabilities")
+    income = AccountGroup(name="OS Income", nature="Income")
+    db.add_all([debtors, creditors, income])
+    db.flush()
+    acme = Ledger(name="OS Acme", group_id=debtors.id)
+    beta = Ledger(name="OS Beta", group_id=debtors.id)
+    supplier = Ledger(name="OS Supplier", group_id=creditors.id)
+    sales = Ledger(name="OS Sales", group_id=income.id)
+    db.add_all([acme, beta, supplier, sales])
+    vt = VoucherType(name="OS Journal", nature="Journal")
+    db.add(vt)
+    db.commit()
+
+    as_of = date(2024, 6, 30)
+    # Acme: INV/1 1000 due May 1 (60 days overdue), part-paid 400; INV/2 500 due July 15 (not due)
+    post(db, vt, date(2024, 4, 1), "J/1", acme, sales, 1000.0, True, [("New Ref", "INV/1", 1000.0, date(2024, 5, 1))])
+    post(db, vt, date(2024, 6, 1), "J/2", acme, sales, 500.0, True, [("New Ref", "INV/2", 500.0, date(2024, 7, 15))])
+    post(db, vt, date(2024, 6, 10), "J/3", acme, sales, 400.0, False, [("Agst Ref", "INV/1", 400.0, None)])
+    # Beta: fully settled
+    post(db, vt, date(2024, 4, 5), "J/4", beta, sales, 300.0, True, [("New Ref", "B/1", 300.0, None)])
+    post(db, vt, date(2024, 4, 20), "J/5", beta, sales, 300.0, False, [("Agst Ref", "B/1", 300.0, None)])
+    # Supplier: bill with no credit period -> aged from its date (Jan 1 = 181 days)
+    post(db, vt, date(2024, 1, 1), "J/6", supplier, sales, 700.0, False, [("New Ref", "SUP/9", 700.0, None)])
+    # After as_of: ignored
+    post(db, vt, date(2024, 7, 5), "J/7", acme, sales, 600.0, False, [("Agst Ref", "INV/2", 500.0, None)])
+
+    rec = get_outstanding(db, as_of, "receivables", include_bills=True)
+    assert rec["buckets"] == ["Not Due", "1-30 days", "31-60 days", "61-90 days", "> 90 days"]
+    assert len(rec["parties"]) == 1
+    party = rec["parties"][0]
+    assert party["name"] == "OS Acme"
+    assert party["pending"] == 1100.0
+    assert party["buckets"] == [500.0, 0.0, 600.0, 0.0, 0.0]
+    assert [b["ref_name"] for b in party["bills"]] == ["INV/1", "INV/2"]
+
+    pay = get_outstanding(db, as_of, "payables")
+    assert pay["totals"]["pending"] == 700.0
+    assert pay["totals"]["buckets"][4] == 700.0
+    assert "bills" not in pay["parties"][0]
+
+    # Pending-bills picker: prefix lookup for one party
+    bills = get_pending_bills(db, acme.id, "INV/", as_of)
+    assert [b["ref_name"] for b in bills] == ["INV/1", "INV/2"]
+    assert bills[0]["pending"] == 600.0
+    assert [b["ref_name"] for b in get_pending_bills(db, acme.id, "INV/2", as_of)] == ["INV/2"]
+    assert get_pending_bills(db, acme.id, "INV/2", date(2024, 7, 31)) == []
+    assert get_pending_bills(db, beta.id, None, as_of) == []
+
+    # Allocations written before ledger_id existed are backfilled from their entry at startup
+    db.execute(update(BillAllocation.__table__).values(ledger_id=None))
+    db.commit()
+    assert [p["ledger_id"] for p in get_outstanding(db, as_of, "payables")["parties"]] == [None] # collapsed
+    assert ensure_bill_ledgers(db) == db.query(BillAllocation).count()
+    assert ensure_bill_ledgers(db) == 0
+    assert [(p["name"], p["pending"]) for p in get_outstanding(db, as_of, "payables")["parties"]] == [("OS Supplier", 700.0)]
+    assert get_outstanding(db, as_of, "receivables")["parties"][0]["pending"] == 1100.0
+
+    db.close()
+    print("SUCCESS: Outstanding matched by party + reference, aged and looked up by prefix")
+
+if __name__ == "__main__":
+    test_bill_outstanding()
@@ -0,0 +1,154 @@
+import sys
+import os
+from datetime import date
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import (
+    AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry, FinancialYear, PeriodCloseSnapshot
+)
+from app.modules.inventory.models import StockItem
+from app.modules.accounting.period_close import PeriodLockedError, ensure_period_open
+from app.modules.accounting.router import LedgerCreate, lock_financial_year, unlock_financial_year, update_ledger
+from app.modules.inventory.valuation import calculate_weighted_average, value_stock_at_dates
+from app.modules.reports.engine import ReportEngine
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def post(db, vtype, on, number, entries):
+    v = Voucher(voucher_type_id=vtype.id, date=on, voucher_number=number)
+    db.add(v)
+    db.flush()
+    for ledger, amount, is_debit, item, qty in entries:
+        db.add(VoucherEntry(
+            voucher_id=v.id, ledger_id=ledger.id, amount=amount, is_debit=is_debit,
+            stock_item_id=item.id if item else None, quantity=qty
+        ))
+    db.commit()
+    return v
+
+def test_period_close_snapshots():
+    print("--- Testing Period Close Snapshots ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    assets = AccountGroup(name="PC Assets", nature="Assets")
+    income = AccountGroup(name="PC Income", nature="Income")
+    expenses = AccountGroup(name="PC Expenses", nature="Expenses")
+    db.add_all([assets, income, expenses])
+    db.flush()
+    cash = Ledger(name="PC Cash", group_id=assets.id, opening_balance=1000.0)
+    sales = Ledger(name="PC Sales", group_id=income.id)
+    purchase = Ledger(name="PC Purchase", group_id=expenses.id)
+    db.add_all([cash, sales, purchase])
+    item = StockItem(name="PC Widget", opening_qty=10.0, opening_rate=10.0, opening_value=100.0)
+    vt_sales = VoucherType(name="PC Sales", nature="Sales")
+    vt_pur = VoucherType(name="PC Purchase", nature="Purchase")
+    db.add_all([item, vt_sales, vt_pur])
+    fy24 = FinancialYear(name="2024-25", start_date=date(2024, 4, 1), end_date=date(2025, 3, 31))
+    fy25 = FinancialYear(name="2025-26", start_date=date(2025, 4, 1), end_date=date(2026, 3, 31))
+    db.add_all([fy24, fy25])
+    db.commit()
+
+    old_purchase = post(db, vt_pur, date(2024, 6, 1), "P/1", [
+        (purchase, 200.0, True, item, 10.0), (cash, 200.0, False, None, 0.0)
+    ])
+    post(db, vt_sales, date(2025, 1, 10), "S/1", [
+        (cash, 300.0, True, None, 0.0), (sales, 300.0, False, item, 5.0)
+    ])
+    post(db, vt_sales, date(2025, 5, 5), "S/2", [
+        (cash, 90.0, True, None, 0.0), (sales, 90.0, False, item, 3.0)
+    ])
+
+    rep = ReportEngine(db)
+    check = date(2025, 9, 30)
+    before = (
+        rep.get_ledger_balances(check),
+        value_stock_at_dates(db, [date(2025, 3, 31), check]),
+        calculate_weighted_average(db, item.id, check).closing_value,
+        rep.build_columnar_trial_balance(date(2025, 4, 1), check, "quarterly")["groups"]
+    )
+
+    # 1. Lock writes one row per ledger and per item
+    fy24_id = fy24.id
+    admin = SimpleNamespace(id=None, role="admin")
+    res = lock_financial_year(fy24_id, db=db, current_user=admin)
+    assert res["snapshot_rows"] == 4
+    assert db.query(FinancialYear).get(fy24_id).is_locked
+
+    # 2. Reports are unchanged
+    after = (
+        rep.get_ledger_balances(check),
+        value_stock_at_dates(db, [date(2025, 3, 31), check]),
+        calculate_weighted_average(db, item.id, check).closing_value,
+        rep.build_columnar_trial_balance(date(2025, 4, 1), check, "quarterly")["groups"]
+    )
+    assert after == before
+    assert before[1] == [225.0, 180.0] # 15 @ 15, then 12 @ 15
+
+    # 3. Postings inside the closed period are rejected
+    try:
+        ensure_period_open(db, date(2025, 3, 31))
+        assert False, "Expected 400"
+    except Exception as e:
+        assert getattr(e, "status_code", None) == 400
+    ensure_period_open(db, date(2025, 4, 1))
+
+    # 4. Later reports start from the snapshot: a back-door edit of a closed voucher is not seen
+    old_purchase.entries[0].amount = 999.0
+    db.commit()
+    assert rep.get_ledger_balances(check)[purchase.id] == before[0][purchase.id]
+
+    # 5. Openings are baked into the snapshot: editing one is rejected while the year is locked
+    for obj, field in [(cash, "opening_balance"), (item, "opening_qty")]:
+        setattr(obj, field, 5000.0)
+        try:
+            db.commit()
+            assert False, "Expected PeriodLockedError"
+        except PeriodLockedError:
+            db.rollback()
+    try:
+        update_ledger(cash.id, LedgerCreate(name=cash.name, group_id=assets.id, opening_balance=5000.0), db=db)
+        assert False, "Expected 400"
+    except HTTPException as e:
+        assert e.status_code == 400 and "PC Cash" in e.detail
+    cash.name = "PC Cash Box" # other fields stay editable
+    db.commit()
+    late = Ledger(name="PC Late", group_id=assets.id) # not in the snapshot: its opening is free
+    db.add(late)
+    db.commit()
+    late.opening_balance = 50.0
+    db.commit()
+    assert rep.get_ledger_balances(check)[late.id] == 50.0
+
+    # 6. The guard follows FinancialYear.is_locked itself
+    fy25_obj = db.query(FinancialYear).filter(FinancialYear.name == "2025-26").first()
+    fy25_obj.is_locked = True
+    db.commit()
+    try:
+        ensure_period_open(db, date(2025, 4, 1))
+        assert False, "Expected 400"
+    except Exception as e:
+        assert getattr(e, "status_code", None) == 400
+    fy25_obj.is_locked = False
+    db.commit()
+
+    # 7. Unlock drops the snapshot and reports go back to scanning everything
+    unlock_financial_year(fy24_id, db=db, current_user=admin)
+    assert db.query(PeriodCloseSnapshot).count() == 0
+    assert rep.get_ledger_balances(check)[purchase.id] == 999.0
+    cash.opening_balance = 5000.0
+    db.commit()
+
+    db.close()
+    print("SUCCESS: Period close snapshots frozen, guarded and reused")
+
+if __name__ == "__main__":
+    test_period_close_snapshots()
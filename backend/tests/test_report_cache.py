@@ -0,0 +1,83 @@
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from fastapi import Request, Response
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry
+from app.modules.inventory.models import StockItem
+from app.modules.accounting.versioning import get_data_version
+from app.modules.reports.router import get_trial_balance
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def make_request(if_none_match=None):
+    headers = []
+    if if_none_match:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+
+def test_report_etag_and_cache():
+    print("--- Testing Report ETag / Data Version ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    grp = AccountGroup(name="Cache Assets", nature="Assets")
+    db.add(grp)
+    db.flush()
+    cash = Ledger(name="Cache Cash", group_id=grp.id, opening_balance=100.0)
+    db.add(cash)
+    db.commit()
+
+    v1 = get_data_version(db)
+    assert v1 > 0 # Master creation bumped the version
+
+    # 1. First request computes and carries an ETag
+    resp = Response()
+    tree = get_trial_balance(date(2025, 3, 31), make_request(), resp, db=db)
+    etag = resp.headers["etag"]
+    assert tree[0]["total_balance"] == 100.0
+
+    # 2. Conditional request -> 304
+    res = get_trial_balance(date(2025, 3, 31), make_request(etag), Response(), db=db)
+    assert res.status_code == 304
+
+    # 3. Different parameters -> different ETag
+    resp2 = Response()
+    get_trial_balance(date(2025, 4, 30), make_request(etag), resp2, db=db)
+    assert resp2.headers["etag"] != etag
+
+    # 4. Posting a voucher bumps the version and invalidates the ETag
+    vt = VoucherType(name="Journal", nature="Journal")
+    db.add(vt)
+    db.flush()
+    v = Voucher(voucher_type_id=vt.id, date=date(2025, 1, 1), voucher_number="J/1")
+    db.add(v)
+    db.flush()
+    db.add(VoucherEntry(voucher_id=v.id, ledger_id=cash.id, amount=50.0, is_debit=True))
+    db.commit()
+    assert get_data_version(db) > v1
+
+    resp3 = Response()
+    tree = get_trial_balance(date(2025, 3, 31), make_request(etag), resp3, db=db)
+    assert not isinstance(tree, Response)
+    assert resp3.headers["etag"] != etag
+    assert tree[0]["total_balance"] == 150.0
+
+    # 5. Bulk statements bump too
+    v2 = get_data_version(db)
+    db.query(Ledger).filter(Ledger.id == cash.id).update({"opening_balance": 200.0})
+    db.commit()
+    assert get_data_version(db) > v2
+
+    print("Report Cache Validation Passed.")
+    db.close()
+
+if __name__ == "__main__":
+    test_report_etag_and_cache()
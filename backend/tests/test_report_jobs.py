@@ -0,0 +1,106 @@
+import sys
+import os
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import Organization, AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry
+from app.modules.reports.models import ReportJob, ReportJobStatus
+from app.modules.reports.jobs import REPORTS, submit_job, claim_next_job, run_pending_jobs, purge_expired_jobs
+from app.modules.reports.router import get_report_job
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_report_job_queue():
+    print("--- Testing Background Report Jobs ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    grp = AccountGroup(name="Job Assets", nature="Assets")
+    db.add(grp)
+    db.flush()
+    db.add(Ledger(name="Job Cash", group_id=grp.id, opening_balance=250.0))
+    db.commit()
+
+    # 1. Identical submissions share one job
+    job = submit_job(db, "trial-balance", {"end_date": "2025-03-31"})
+    dup = submit_job(db, "trial-balance", {"end_date": date(2025, 3, 31)})
+    assert dup.id == job.id
+    assert job.status == ReportJobStatus.QUEUED
+
+    # 2. Unknown report / bad params
+    try:
+        submit_job(db, "no-such-report", {})
+        assert False, "Expected 400"
+    except Exception as e:
+        assert getattr(e, "status_code", None) == 400
+    bad = submit_job(db, "balance-sheet", {"end_date": "31/03/2025"})
+
+    # 3. Worker drains the queue
+    assert run_pending_jobs(db) == 2
+    out = get_report_job(job.id, db=db)
+    assert out["status"] == ReportJobStatus.DONE
+    assert out["progress"] == 100
+    assert out["result"][0]["total_balance"] == 250.0
+
+    failed = get_report_job(bad.id, db=db)
+    assert failed["status"] == ReportJobStatus.FAILED
+    assert "YYYY-MM-DD" in failed["error"]
+    assert "result" not in failed
+
+    # 4. Finished result is reused until the books change
+    assert submit_job(db, "trial-balance", {"end_date": "2025-03-31"}).id == job.id
+    vt = VoucherType(name="Journal", nature="Journal")
+    db.add(vt)
+    db.flush()
+    v = Voucher(voucher_type_id=vt.id, date=date(2025, 1, 1), voucher_number="J/1")
+    db.add(v)
+    db.commit()
+    fresh = submit_job(db, "trial-balance", {"end_date": "2025-03-31"})
+    assert fresh.id != job.id
+
+    # 5. A claimed job cannot be claimed twice
+    claimed = claim_next_job(db, "w1")
+    assert claimed.id == fresh.id and claimed.status == ReportJobStatus.RUNNING
+    assert claim_next_job(db, "w2") is None
+
+    # 6. Runners report progress as each phase completes, not just at start / finish
+    db.add(Organization(name="Job Org", gstin="29AAAAA0000A1Z5", state="Karnataka",
+                        financial_year_start=date(2024, 4, 1), books_beginning_from=date(2024, 4, 1)))
+    db.commit()
+    for report, params in [
+        ("trial-balance", {"end_date": "2025-03-31"}),
+        ("trial-balance", {"start_date": "2024-04-01", "end_date": "2025-03-31", "columns": "quarterly"}),
+        ("profit-loss", {"start_date": "2024-04-01", "end_date": "2025-03-31", "columns": "monthly"}),
+        ("balance-sheet", {"end_date": "2025-03-31"}),
+        ("gstr1", {"from_date": "2024-04-01", "to_date": "2025-03-31"}),
+        ("gstr3b", {"from_date": "2024-04-01", "to_date": "2025-03-31"}),
+        ("hsn-summary", {"from_date": "2024-04-01", "to_date": "2025-03-31"}),
+    ]:
+        steps = []
+        REPORTS[report](db, params, steps.append)
+        print(report, params.get("columns", ""), "progress:", steps)
+        assert steps and all(0 < p <= 100 for p in steps), (report, steps)
+
+    # 7. Expired results are purged
+    expired_id = job.id
+    done = db.query(ReportJob).filter(ReportJob.id == expired_id).first()
+    done.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    assert purge_expired_jobs(db) >= 1
+    try:
+        get_report_job(expired_id, db=db)
+        assert False, "Expected 404"
+    except Exception as e:
+        assert getattr(e, "status_code", None) == 404
+
+    db.close()
+    print("SUCCESS: Report jobs queued, deduplicated, run and expired")
+
+if __name__ == "__main__":
+    test_report_job_queue()
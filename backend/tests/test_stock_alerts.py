@@ -0,0 +1,84 @@
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry
+from app.modules.inventory.models import StockItem, StockItemBalance
+from app.modules.inventory.balances import rebuild_stock_balances, stock_alerts
+from app.modules.analytics.router import get_dashboard_data
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def balances(db):
+    return dict(db.query(StockItemBalance.stock_item_id, StockItemBalance.quantity).all())
+
+def test_stock_alerts():
+    print("--- Testing Stock Balances & Alerts ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    grp = AccountGroup(name="SA Expenses", nature="Expenses")
+    db.add(grp)
+    db.flush()
+    ledger = Ledger(name="SA Trading", group_id=grp.id)
+    low = StockItem(name="SA Low", opening_qty=5, reorder_level=10)
+    short = StockItem(name="SA Short", opening_qty=0)
+    plenty = StockItem(name="SA Plenty", opening_qty=100, reorder_level=10)
+    vt_sal = VoucherType(name="SA Sales", nature="Sales")
+    db.add_all([ledger, low, short, plenty, vt_sal])
+    db.commit()
+    assert balances(db) == {low.id: 5.0, short.id: 0.0, plenty.id: 100.0}
+
+    v = Voucher(voucher_type_id=vt_sal.id, date=date(2024, 4, 1), voucher_number="SA/1")
+    db.add(v)
+    db.flush()
+    sale = VoucherEntry(voucher_id=v.id, ledger_id=ledger.id, amount=30, is_debit=False, stock_item_id=short.id, quantity=3)
+    db.add_all([
+        sale,
+        VoucherEntry(voucher_id=v.id, ledger_id=ledger.id, amount=50, is_debit=False, stock_item_id=plenty.id, quantity=50),
+    ])
+    db.commit()
+    assert balances(db)[short.id] == -3.0
+    assert balances(db)[plenty.id] == 50.0
+
+    alerts = stock_alerts(db)
+    print("Alerts:", [(a["name"], a["kind"], a["quantity"]) for a in alerts])
+    assert [(a["stock_item_id"], a["kind"]) for a in alerts] == [(short.id, "negative"), (low.id, "reorder")]
+
+    # Edits move the delta between items; opening changes count too
+    sale.quantity = 1
+    sale.stock_item_id = low.id
+    low.opening_qty = 20
+    db.commit()
+    assert balances(db)[short.id] == 0.0
+    assert balances(db)[low.id] == 19.0
+    assert stock_alerts(db) == []
+
+    # Deleting the voucher (ORM cascade) gives the stock back
+    db.delete(v)
+    db.commit()
+    assert balances(db) == {low.id: 20.0, short.id: 0.0, plenty.id: 100.0}
+
+    # The incremental table always equals a full rebuild
+    expected = balances(db)
+    rebuild_stock_balances(db)
+    assert balances(db) == expected
+
+    plenty.reorder_level = 150
+    db.commit()
+    dashboard = get_dashboard_data(db=db)
+    assert [a.id for a in dashboard.alerts] == [f"stock-reorder-{plenty.id}"]
+    assert dashboard.alerts[0].type == "warning"
+
+    db.close()
+    print("Stock Alerts Passed.")
+
+if __name__ == "__main__":
+    test_stock_alerts()
@@ -0,0 +1,76 @@
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, Organization
+from app.modules.inventory.models import StockItem
+from app.modules.tax.router import (
+    TaxAnalysisRequest, TaxBatchRequest, TaxEntryRequest, calculate_voucher_tax, calculate_voucher_tax_batch
+)
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_tax_batch():
+    print("--- Testing Batch Tax Calculation ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    db.add(Organization(name="TB Co", state="Karnataka",
+                        financial_year_start=date(2024, 4, 1), books_beginning_from=date(2024, 4, 1)))
+    grp = AccountGroup(name="TB Parties", nature="Assets")
+    db.add(grp)
+    db.flush()
+    local = Ledger(name="TB Local Party", group_id=grp.id, state="Karnataka")
+    remote = Ledger(name="TB Remote Party", group_id=grp.id, state="Kerala")
+    sales = Ledger(name="TB Sales", group_id=grp.id)
+    pen = StockItem(name="TB Pen", gst_rate=18.0)
+    ink = StockItem(name="TB Ink", gst_rate=5.0)
+    db.add_all([local, remote, sales, pen, ink])
+    db.commit()
+
+    def draft(party, n):
+        return TaxAnalysisRequest(date=date(2024, 4, 1), entries=[
+            TaxEntryRequest(ledger_id=party.id, amount=0, is_debit=True),
+            TaxEntryRequest(ledger_id=sales.id, amount=100 * n, is_debit=False, stock_item_id=pen.id),
+            TaxEntryRequest(ledger_id=sales.id, amount=40, is_debit=False, stock_item_id=ink.id),
+        ])
+
+    drafts = [draft(local if n % 2 else remote, n) for n in range(1, 201)]
+    calculate_voucher_tax(drafts[0], db=db) # warm the organization cache
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    batch = calculate_voucher_tax_batch(TaxBatchRequest(vouchers=drafts), db=db)
+    event.remove(engine, "before_cursor_execute", listener)
+    print("Queries for 200 drafts:", len(statements))
+    assert len(statements) == 4 # ledgers, items, company version, GST rates version
+
+    assert len(batch) == 200
+    intra = [(l.tax_type, l.rate, l.tax_amount) for l in batch[0]]
+    assert intra == [("CGST", 9.0, 9.0), ("SGST", 9.0, 9.0), ("CGST", 2.5, 1.0), ("SGST", 2.5, 1.0)]
+    inter = [(l.tax_type, l.rate, l.tax_amount) for l in batch[1]]
+    assert inter == [("IGST", 18.0, 36.0), ("IGST", 5.0, 2.0)]
+
+    # Single calls go through the same path and agree with the batch
+    for n in (0, 1, 57):
+        single = calculate_voucher_tax(drafts[n], db=db)
+        assert [l.dict() for l in single] == [l.dict() for l in batch[n]]
+
+    # An organization edit is seen on the next call
+    db.query(Organization).update({Organization.state: "Kerala"})
+    db.commit()
+    assert [l.tax_type for l in calculate_voucher_tax(drafts[1], db=db)] == ["CGST", "SGST", "CGST", "SGST"]
+
+    db.close()
+    print("Batch Tax Passed.")
+
+if __name__ == "__main__":
+    test_tax_batch()
@@ -0,0 +1,101 @@
+import sys
+import os
+from datetime import date
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+import app.modules.auth.models # users table for the audit log FK
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, VoucherEntry
+from app.modules.inventory.models import StockItem, StockItemBalance, Unit
+from app.modules.inventory.units import unit_converter
+from app.modules.inventory.valuation import calculate_item_valuation
+from app.modules.analytics.router import _compute_stock_summary
+from app.modules.vouchers.router import VoucherCreate, VoucherEntryCreate, create_voucher
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_unit_conversion():
+    print("--- Testing Compound Unit Normalization ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    user = SimpleNamespace(id=None)
+
+    nos = Unit(name="Numbers", symbol="UC-Nos")
+    kg = Unit(name="Kilograms", symbol="UC-Kg")
+    db.add_all([nos, kg])
+    db.flush()
+    box = Unit(name="Box of 10", symbol="UC-Box", base_unit_id=nos.id, conversion_factor=10)
+    db.add(box)
+    db.flush()
+    carton = Unit(name="Carton of 12 Box", symbol="UC-Ctn", base_unit_id=box.id, conversion_factor=12)
+    grp = AccountGroup(name="UC Expenses", nature="Expenses")
+    db.add_all([carton, grp])
+    db.flush()
+    ledger = Ledger(name="UC Trading", group_id=grp.id)
+    item = StockItem(name="UC Widget", unit_id=box.id, opening_qty=5, opening_rate=100, opening_value=500)
+    vt_pur = VoucherType(name="UC Purchase", nature="Purchase")
+    vt_sal = VoucherType(name="UC Sales", nature="Sales")
+    db.add_all([ledger, item, vt_pur, vt_sal])
+    db.commit()
+
+    convert = unit_converter(db)
+    assert convert(1, carton.id, nos.id) == 120
+    assert convert(30, nos.id, box.id) == 3
+    assert unit_converter(db) is convert # cached until the masters change
+    try:
+        convert(1, kg.id, box.id)
+        assert False, "Unrelated units converted"
+    except ValueError:
+        pass
+
+    # 2 Cartons in, 30 Nos out: stored as 24 and 3 Box
+    create_voucher(VoucherCreate(
+        voucher_type_id=vt_pur.id, date=date(2024, 4, 1), voucher_number="UC/P1",
+        entries=[VoucherEntryCreate(ledger_id=ledger.id, amount=2400, is_debit=True,
+                                    stock_item_id=item.id, quantity=2, unit_id=carton.id)]
+    ), db=db, current_user=user)
+    create_voucher(VoucherCreate(
+        voucher_type_id=vt_sal.id, date=date(2024, 4, 2), voucher_number="UC/S1",
+        entries=[VoucherEntryCreate(ledger_id=ledger.id, amount=900, is_debit=False,
+                                    stock_item_id=item.id, quantity=30, unit_id=nos.id)]
+    ), db=db, current_user=user)
+
+    stored = sorted((e.quantity, e.base_quantity) for e in db.query(VoucherEntry).all())
+    print("Stored (entered, base):", stored)
+    assert stored == [(2.0, 24.0), (30.0, 3.0)]
+    assert unit_converter(db) is convert # voucher saves leave the units version alone
+
+    # Every stock aggregate works in Boxes
+    assert db.query(StockItemBalance.quantity).filter(StockItemBalance.stock_item_id == item.id).scalar() == 26.0
+    val = calculate_item_valuation(db, item.id)
+    assert val.closing_qty == 26.0
+    assert abs(val.closing_rate - 2900.0 / 29) < 0.001 # purchase costed at 100 per Box
+    summary = _compute_stock_summary(db)
+    assert summary["items"][0].closing_qty == 26.0
+
+    try:
+        create_voucher(VoucherCreate(
+            voucher_type_id=vt_sal.id, date=date(2024, 4, 3), voucher_number="UC/S2",
+            entries=[VoucherEntryCreate(ledger_id=ledger.id, amount=10, is_debit=False,
+                                        stock_item_id=item.id, quantity=1, unit_id=kg.id)]
+        ), db=db, current_user=user)
+        assert False, "Unconvertible unit accepted"
+    except HTTPException as e:
+        assert e.status_code == 400
+
+    carton.conversion_factor = 6
+    db.commit()
+    assert unit_converter(db) is not convert and unit_converter(db)(1, carton.id, nos.id) == 60
+
+    db.close()
+    print("Unit Conversion Passed.")
+
+if __name__ == "__main__":
+    test_unit_conversion()
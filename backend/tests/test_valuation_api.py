@@ -87,7 +87,7 @@ def test_valuation_api():
         response = get_item_valuation(item_id, None, db)
         print("Response:", response)
         
-        assert response.closing_qty == 20.0
+        assert response.closing_quantity == 20.0
         assert response.closing_rate == 150.0
         assert response.closing_value == 3000.0
         
@@ -0,0 +1,166 @@
+import sys
+import os
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.modules.accounting.models import AccountGroup, Ledger, VoucherType, Voucher, VoucherEntry, FinancialYear, PeriodCloseSnapshot
+from app.modules.accounting.period_close import lock_financial_year
+from app.modules.inventory.models import StockGroup, StockItem
+from app.modules.inventory.router import StockGroupCreate, get_item_valuation, update_stock_group
+from app.modules.inventory.valuation import (
+    FIFO, calculate_item_valuation, item_valuation_settings, stock_states_at, value_stock_at_dates
+)
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def post(db, vtype, on, number, ledger, lines):
+    v = Voucher(voucher_type_id=vtype.id, date=on, voucher_number=number)
+    db.add(v)
+    db.flush()
+    for item, qty, amount, is_debit in lines:
+        db.add(VoucherEntry(
+            voucher_id=v.id, ledger_id=ledger.id, amount=amount, is_debit=is_debit,
+            stock_item_id=item.id, quantity=qty, rate=(amount / qty) if qty else 0.0
+        ))
+    db.commit()
+
+def test_valuation_methods():
+    print("--- Testing FIFO / LIFO / Standard Cost Valuation ---")
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    grp = AccountGroup(name="VM Expenses", nature="Expenses")
+    db.add(grp)
+    db.flush()
+    ledger = Ledger(name="VM Trading", group_id=grp.id)
+    parent = StockGroup(name="VM FIFO Lines", valuation_method="FIFO")
+    db.add_all([ledger, parent])
+    db.flush()
+    child = StockGroup(name="VM FIFO Child", parent_id=parent.id)
+    db.add(child)
+    db.flush()
+
+    fifo = StockItem(name="VM Fifo", group_id=child.id, opening_qty=10, opening_rate=10, opening_value=100)
+    lifo = StockItem(name="VM Lifo", group_id=child.id, valuation_method="LIFO",
+                     opening_qty=10, opening_rate=10, opening_value=100)
+    std = StockItem(name="VM Std", valuation_method="Standard Cost", standard_cost=12.0,
+                    opening_qty=10, opening_rate=10, opening_value=100)
+    avg = StockItem(name="VM Avg", opening_qty=10, opening_rate=10, opening_value=100)
+    short = StockItem(name="VM Short", group_id=parent.id)
+    vt_pur = VoucherType(name="VM Purchase", nature="Purchase")
+    vt_sal = VoucherType(name="VM Sales", nature="Sales")
+    db.add_all([fifo, lifo, std, avg, short, vt_pur, vt_sal])
+    db.commit()
+
+    settings = item_valuation_settings(db)
+    assert settings[fifo.id] == ("FIFO", 0.0) # inherited through two groups
+    assert settings[lifo.id][0] == "LIFO"
+    assert settings[std.id] == ("Standard Cost", 12.0)
+    assert settings[avg.id][0] == "Weighted Average"
+
+    # Buy 10 @ 20 each, then sell 15 each (selling price is irrelevant to cost)
+    post(db, vt_pur, date(2024, 4, 1), "VM/P1", ledger, [(i, 10.0, 200.0, True) for i in (fifo, lifo, std, avg)])
+    post(db, vt_sal, date(2024, 4, 2), "VM/S1", ledger, [(i, 15.0, 999.0, False) for i in (fifo, lifo, std, avg)])
+
+    expected = {
+        fifo.id: (5.0, 100.0), # 10@10 and 5@20 issued, 5@20 left
+        lifo.id: (5.0, 50.0),  # 10@20 and 5@10 issued, 5@10 left
+        std.id: (5.0, 60.0),   # always @12
+        avg.id: (5.0, 75.0),   # average 15
+    }
+    for item_id, (qty, value) in expected.items():
+        res = calculate_item_valuation(db, item_id)
+        print(f"{res.method}: Qty={res.closing_qty}, Value={res.closing_value}")
+        assert res.closing_qty == qty
+        assert abs(res.closing_value - value) < 0.001
+
+    # Negative stock is costed at the last rate and netted by the next receipt
+    post(db, vt_sal, date(2024, 4, 3), "VM/S2", ledger, [(short, 5.0, 100.0, False)])
+    post(db, vt_pur, date(2024, 4, 4), "VM/P2", ledger, [(short, 10.0, 100.0, True)])
+    res = calculate_item_valuation(db, short.id)
+    assert res.closing_qty == 5.0 and abs(res.closing_value - 50.0) < 0.001
+
+    # P&L stock figures: every item by its own method, at each boundary
+    totals = value_stock_at_dates(db, [date(2024, 4, 1), date(2024, 4, 2)])
+    print("Stock at boundaries:", totals)
+    assert abs(totals[0] - (300 + 300 + 240 + 300)) < 0.001
+    assert abs(totals[1] - (100 + 50 + 60 + 75 + 0)) < 0.001
+
+    states = stock_states_at(db, date(2024, 4, 30))
+    assert abs(states[fifo.id][1] - 100.0) < 0.001
+    assert abs(states[short.id][1] - 50.0) < 0.001
+
+    # Endpoint: configured method, and an explicit override
+    response = get_item_valuation(fifo.id, None, db)
+    assert response.valuation_method == "FIFO"
+    assert response.closing_quantity == 5.0 and abs(response.closing_value - 100.0) < 0.001
+    response = get_item_valuation(fifo.id, None, db, method="Weighted Average")
+    assert abs(response.closing_value - 75.0) < 0.001
+
+    # Locking a year keeps the open FIFO / LIFO layers: later figures do not move
+    post(db, vt_pur, date(2024, 4, 5), "VM/P3", ledger, [(i, 5.0, 150.0, True) for i in (fifo, lifo)])
+    post(db, vt_sal, date(2024, 4, 10), "VM/S3", ledger, [(i, 7.0, 999.0, False) for i in (fifo, lifo)])
+    check = date(2024, 4, 30)
+
+    def figures():
+        return [
+            calculate_item_valuation(db, fifo.id, check).closing_value,
+            calculate_item_valuation(db, lifo.id, check).closing_value,
+            calculate_item_valuation(db, fifo.id, check, "Weighted Average").closing_value,
+            value_stock_at_dates(db, [check])[0]
+        ]
+
+    before = figures()
+    assert abs(before[0] - 90.0) < 0.001 # 5@20 + 2@30 issued, 3@30 left
+    assert abs(before[1] - 30.0) < 0.001 # 5@30 + 2@10 issued, 3@10 left
+    fy = FinancialYear(name="VM Close", start_date=date(2024, 4, 1), end_date=date(2024, 4, 5))
+    db.add(fy)
+    db.commit()
+    lock_financial_year(db, fy)
+    snap = db.query(PeriodCloseSnapshot).filter(PeriodCloseSnapshot.stock_item_id == fifo.id).one()
+    assert snap.valuation_method == "FIFO" and snap.cost_layers["layers"] == [[5.0, 20.0], [5.0, 30.0]]
+    after = figures()
+    print("Before / after lock:", before, after)
+    assert all(abs(a - b) < 0.001 for a, b in zip(after, before))
+
+    # Bulk item: thousands of small layers consumed by one issue
+    layers = FIFO(0.0, 0.0, 0.0)
+    for n in range(5000):
+        layers.inward(1.0, float(n))
+    cost = layers.outward(4990.0)
+    assert abs(cost - sum(range(4990))) < 0.001
+    assert len(layers.layers) == 10 and abs(layers.value - sum(range(4990, 5000))) < 0.001
+
+    # A group cannot move under its own sub-group
+    try:
+        update_stock_group(parent.id, StockGroupCreate(name=parent.name, parent_id=child.id, valuation_method="FIFO"), db=db)
+        assert False, "Parent cycle accepted"
+    except HTTPException as e:
+        assert e.status_code == 400
+    db.rollback()
+
+    # A cycle already in the data resolves to the default instead of looping
+    loop_a = StockGroup(name="VM Loop A")
+    db.add(loop_a)
+    db.flush()
+    loop_b = StockGroup(name="VM Loop B", parent_id=loop_a.id)
+    db.add(loop_b)
+    db.flush()
+    loop_a.parent_id = loop_b.id
+    looped = StockItem(name="VM Looped", group_id=loop_b.id)
+    db.add(looped)
+    db.commit()
+    assert item_valuation_settings(db, looped.id)[looped.id][0] == "Weighted Average"
+
+    db.close()
+    print("Valuation Methods Passed.")
+
+if __name__ == "__main__":
+    test_valuation_methods()
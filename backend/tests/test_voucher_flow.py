@@ -1,6 +1,7 @@
 import sys
 import os
 from datetime import date
+from types import SimpleNamespace
 
 # Add parent dir to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -82,7 +83,7 @@ def test_voucher_lifecycle():
         entries=entries
     )
     
-    result = create_voucher(v_in, db)
+    result = create_voucher(v_in, db, current_user=SimpleNamespace(id=None))
     v_id = result["id"]
     print(f"Voucher Created: ID={v_id}, Number={result['number']}")
     
@@ -112,7 +113,7 @@ def test_voucher_lifecycle():
         entries=entries
     )
     
-    update_voucher(v_id, v_update, db)
+    update_voucher(v_id, v_update, db, current_user=SimpleNamespace(id=None))
     
     # Verify Update
     db.expire_all()